@@ -51,6 +51,11 @@ setup(
             'ipython',
         ]
     },
+    entry_points={
+        'console_scripts': [
+            'xyzpy = xyzpy.__main__:main',
+        ],
+    },
     python_requires='>=3.5',
     classifiers=[
         'Development Status :: 3 - Alpha',
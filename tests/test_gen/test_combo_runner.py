@@ -2,6 +2,7 @@ from collections import OrderedDict
 from functools import partial
 import pytest
 import numpy as np
+import pandas as pd
 from numpy.testing import assert_allclose
 import xarray as xr
 
@@ -9,6 +10,9 @@ from xyzpy.gen.combo_runner import (
     combo_runner,
     results_to_ds,
     combo_runner_to_ds,
+    combo_runner_to_df,
+    multi_concat,
+    multi_stack,
 )
 from . import (
     foo3_scalar,
@@ -249,3 +253,83 @@ class TestComboRunnerToDS:
         assert fds.sel(a=4, b=9, x=2, y='bar')['apples'].values == 49
         assert fds.sel(a=5, b=7, y='bar')['lemons'].values == 57
         assert 'output' not in fds
+
+    @pytest.mark.parametrize('as_dataarray', [False, True])
+    def test_multi_stack_matches_multi_concat(self, as_dataarray):
+
+        def fn(a, b):
+            x = xr.DataArray(np.arange(3) * a + b, dims=['t'],
+                             coords={'t': [10, 20, 30]}, name='x')
+            return x if as_dataarray else x.to_dataset()
+
+        results = combo_runner(fn, combos={'a': [1, 2], 'b': [3, 4, 5]},
+                               verbosity=0)
+        # mixed dtypes, e.g. from nan placeholders for missing cases
+        results = (results[0], results[1][:2] + (xr.full_like(
+            results[1][2], np.nan, dtype=float),))
+
+        stacked = multi_stack(results, ('a', 'b'))
+        concated = multi_concat(results, ('a', 'b'))
+        assert stacked.identical(concated)
+
+    def test_multi_stack_heterogeneous_falls_back(self):
+
+        def fn(a):
+            return xr.Dataset({'x': ('t', np.arange(a))},
+                              coords={'t': np.arange(a)})
+
+        results = tuple(fn(a) for a in [2, 3])
+        assert multi_stack(results, ('a',)) is None
+
+        ds = combo_runner_to_ds(fn, combos={'a': [2, 3]}, var_names=None)
+        assert ds['x'].sel(a=2).isnull().sum() == 1
+
+
+class TestComboRunnerToDF:
+
+    @pytest.mark.parametrize('shuffle', [False, True])
+    def test_columns(self, shuffle):
+
+        def fn(a, b, s, k, unused):
+            return a + b, s + k
+
+        df = combo_runner_to_df(
+            fn, combos={'a': [1, 2], 'b': [10, 20, 30], 's': ['x', 'y']},
+            constants={'k': 'z'}, resources={'unused': 1},
+            attrs={'note': 'hi'}, var_names=['sum', 'cat'],
+            shuffle=shuffle, verbosity=0)
+
+        assert df.columns.tolist() == ['a', 'b', 's', 'k', 'note',
+                                       'sum', 'cat']
+        assert len(df) == 12
+        assert df['s'].dtype.name == 'category'
+        # single valued string constants and attrs keep the plain dtype
+        #     that pandas gives them when built row by row
+        plain = pd.DataFrame([{'k': 'z'}])['k'].dtype
+        assert df['k'].dtype == df['note'].dtype == plain
+        assert 'int' in df['a'].dtype.name
+        assert (df['sum'] == df['a'] + df['b']).all()
+        assert (df['cat'] == df['s'].astype(str) + 'z').all()
+
+    def test_mixed_cases_combos(self):
+        df = combo_runner_to_df(
+            foo3_scalar, combos={'c': [100, 200]},
+            cases=[{'a': 1, 'b': 10}, {'a': 2, 'b': 20}],
+            var_names='x', verbosity=0)
+        assert df.columns.tolist() == ['a', 'b', 'c', 'x']
+        assert df['x'].tolist() == [111, 211, 122, 222]
+
+    def test_arrow(self):
+        pa = pytest.importorskip('pyarrow')
+        table = combo_runner_to_df(
+            foo3_scalar, combos={'a': [1, 2], 'b': [10, 20]},
+            constants={'c': 100}, var_names='x', arrow=True, verbosity=0)
+        assert isinstance(table, pa.Table)
+        assert table.column_names == ['a', 'b', 'c', 'x']
+        assert table['x'].to_pylist() == [111, 121, 112, 122]
+
+        table = combo_runner_to_df(
+            lambda a, b, c: b + c, combos={'a': [1, 2], 'b': ['x', 'y']},
+            constants={'c': 'z'}, var_names='x', arrow=True, verbosity=0)
+        assert pa.types.is_dictionary(table['b'].type)
+        assert pa.types.is_string(table['c'].type)
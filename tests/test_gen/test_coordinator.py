@@ -0,0 +1,163 @@
+import os
+import sys
+import subprocess
+import threading
+from multiprocessing import AuthenticationError
+from tempfile import TemporaryDirectory
+
+import pytest
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import xyzpy
+from xyzpy import Runner
+from xyzpy.gen.cropping import Crop, XYZError, worker
+from xyzpy.__main__ import main
+from xyzpy.gen.coordinator import (
+    CropServer,
+    parse_address,
+    parse_authkey,
+    remote_worker,
+)
+
+
+def array_add(a, b):
+    return np.arange(3.0) + a + b
+
+
+COMBOS = (('a', [1, 2, 3]), ('b', [10, 20]))
+
+
+def expected():
+    return np.array([[np.arange(3.0) + a + b for b in (10, 20)]
+                     for a in (1, 2, 3)])
+
+
+class TestCoordinator:
+
+    def test_parse(self, monkeypatch):
+        assert parse_address('localhost:5000') == ('localhost', 5000)
+        assert parse_address(':0') == ('', 0)
+        with pytest.raises(ValueError):
+            parse_address('localhost')
+
+        monkeypatch.delenv('XYZPY_AUTHKEY', raising=False)
+        with pytest.raises(XYZError, match="XYZPY_AUTHKEY"):
+            parse_authkey()
+        monkeypatch.setenv('XYZPY_AUTHKEY', 'secret')
+        assert parse_authkey() == b'secret'
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_remote_worker(self, storage):
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=array_add, parent_dir=tdir, batchsize=2,
+                        storage=storage)
+            crop.sow_combos(COMBOS)
+
+            with CropServer(crop, address='127.0.0.1:0',
+                            authkey='secret') as server:
+                assert remote_worker(server.address, 'secret',
+                                     max_batches=1, verbosity=0) == 1
+                assert crop.missing_results() == (2, 3)
+                assert worker(connect=server.address, authkey='secret',
+                              verbosity=0) == 2
+                # nothing left
+                assert remote_worker(server.address, 'secret',
+                                     verbosity=0) == 0
+
+            assert not crop.storage.claimed_ids()
+            assert len(crop.storage.read_telemetry()) == 3
+            results = np.array(crop.reap())
+
+        assert_array_equal(results, expected())
+
+    def test_connect_unsupported_options(self):
+        with pytest.raises(XYZError, match="checkpoint_interval"):
+            worker(connect='127.0.0.1:1', authkey='secret',
+                   checkpoint_interval=1.0)
+        with pytest.raises(XYZError, match="lease"):
+            worker(connect='127.0.0.1:1', authkey='secret', lease=1.0)
+        with pytest.raises(SystemExit, match="--connect"):
+            main(['worker', '--connect', '127.0.0.1:1',
+                  '--checkpoint-interval', '1'])
+
+    def test_shutdown_stops_server_process(self):
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=array_add, parent_dir=tdir)
+            crop.sow_combos(COMBOS)
+            server = CropServer(crop, address='127.0.0.1:0',
+                                authkey='secret')
+            address = server.address
+            server.shutdown()
+            server.shutdown()
+            assert remote_worker(address, 'secret', verbosity=0) == 0
+            assert crop.num_results == 0
+
+    def test_wrong_authkey(self):
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=array_add, parent_dir=tdir)
+            crop.sow_combos(COMBOS)
+            with CropServer(crop, address='127.0.0.1:0',
+                            authkey='secret') as server:
+                with pytest.raises(AuthenticationError):
+                    remote_worker(server.address, 'guess', verbosity=0)
+            assert crop.num_results == 0
+
+    def test_serve_until_finished_region(self):
+        runner = Runner(array_add, var_names=['x'], var_dims={'x': 't'})
+
+        with TemporaryDirectory() as tdir:
+            crop = runner.Crop(parent_dir=tdir, batchsize=2,
+                               zarr_store=os.path.join(tdir, 'out.zarr'))
+            crop.sow_combos(COMBOS)
+
+            server = CropServer(crop, address='127.0.0.1:0',
+                                authkey='secret')
+            serving = threading.Thread(
+                target=server.serve_forever,
+                kwargs={'until_finished': True, 'poll_interval': 0.05})
+            serving.start()
+            remote_worker(server.address, 'secret', verbosity=0)
+            serving.join(timeout=10)
+            assert not serving.is_alive()
+
+            # the server has stopped
+            assert remote_worker(server.address, 'secret', verbosity=0) == 0
+
+            ds = crop.reap().load()
+            ds.close()
+
+        assert_array_equal(ds['x'].transpose('a', 'b', 't'), expected())
+
+    def test_command_line_workers(self, monkeypatch):
+
+        def fn(a, b):
+            # defined here so that it is pickled by value
+            import numpy as np
+            return np.arange(3.0) + a + b
+
+        monkeypatch.setenv('XYZPY_AUTHKEY', 'secret')
+
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=fn, parent_dir=tdir, batchsize=1)
+            crop.sow_combos(COMBOS)
+
+            with CropServer(crop, address='127.0.0.1:0') as server:
+                # the workers don't know where the crop is
+                env = {**os.environ, 'PYTHONPATH': os.pathsep.join(
+                    [os.path.dirname(os.path.dirname(xyzpy.__file__))] +
+                    sys.path)}
+                procs = [
+                    subprocess.Popen(
+                        [sys.executable, '-m', 'xyzpy', 'worker',
+                         '--connect', server.address, '-v', '0'],
+                        cwd=os.path.expanduser('~'), env=env)
+                    for _ in range(2)
+                ]
+                for proc in procs:
+                    assert proc.wait(timeout=60) == 0
+
+            assert crop.is_ready_to_reap()
+            results = np.array(crop.reap())
+
+        assert_array_equal(results, expected())
@@ -1,4 +1,8 @@
 import os
+import re
+import sys
+import shlex
+import time
 from tempfile import TemporaryDirectory
 
 import pytest
@@ -6,14 +10,29 @@ import numpy as np
 import xarray as xr
 from numpy.testing import assert_allclose
 
-from xyzpy import combo_runner, combo_runner_to_ds, Runner, Harvester, label
+import xyzpy
+from xyzpy import (
+    combo_runner,
+    combo_runner_to_ds,
+    Runner,
+    Harvester,
+    Sampler,
+    label,
+)
+from xyzpy.gen.combo_runner import combo_runner_core
 from xyzpy.gen.cropping import (
     XYZError,
     Crop,
     parse_crop_details,
     grow,
     load_crops,
+    pack_by_cost,
+    _in_case_order,
+    region_chunks,
+    parse_batch_ids,
+    format_batch_ids,
 )
+from xyzpy.__main__ import main
 
 from . import (
     foo3_scalar,
@@ -28,6 +47,18 @@ def foo_add(a, b, c):
     return a + b
 
 
+def cluster_task_args(script, task_id):
+    """Get the arguments of ``python -m xyzpy`` for task ``task_id`` of a
+    generated cluster script, as the shell would pass them.
+    """
+    # the command is last, though quoted setup code can span several lines
+    command = script[script.rindex("\n", 0, script.index(" -m xyzpy ")):]
+    command = re.sub(r"\$(SGE_TASK_ID|PBS_ARRAY_INDEX|SLURM_ARRAY_TASK_ID)",
+                     str(task_id), command)
+    args = shlex.split(command)
+    return args[args.index('xyzpy') + 1:]
+
+
 class TestSowerReaper:
     @pytest.mark.parametrize(
         "fn, crop_name, crop_loc, expected",
@@ -89,8 +120,22 @@ class TestSowerReaper:
         print(c)
         repr(c)
 
+    def test_storage_options_reloaded(self):
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=5,
+                        storage=('sqlite', {'journal_mode': 'delete',
+                                            'timeout': 5.0}))
+            crop.sow_combos([('a', [1, 2]), ('b', [3, 4])],
+                            constants={'c': True})
+            c = Crop(parent_dir=tdir, name='foo_add')
+            assert c.storage.journal_mode == 'delete'
+            assert c.storage.timeout == 5.0
+            c.storage.close()
+            crop.storage.close()
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
     @pytest.mark.parametrize('shuffle', [False, True, 2])
-    def test_batch(self, shuffle):
+    def test_batch(self, shuffle, storage):
 
         combos = [
             ('a', [10, 20, 30]),
@@ -101,7 +146,8 @@ class TestSowerReaper:
         with TemporaryDirectory() as tdir:
 
             # sow seeds
-            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=5)
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=5,
+                        storage=storage)
 
             assert not crop.is_prepared()
             assert crop.num_sown_batches == crop.num_results == -1
@@ -114,7 +160,9 @@ class TestSowerReaper:
 
             # grow seeds
             for i in range(1, 4):
-                grow(i, Crop(parent_dir=tdir, name='foo_add'))
+                c = Crop(parent_dir=tdir, name='foo_add')
+                assert c.storage.name == storage
+                grow(i, c)
 
                 if i == 1:
                     assert crop.missing_results() == (2, 3,)
@@ -129,6 +177,136 @@ class TestSowerReaper:
 
         assert results == expected
 
+    @pytest.mark.parametrize('shuffle', [False, True, 3])
+    @pytest.mark.parametrize('num_batches', [1, 4, 7])
+    def test_index_batches_match_kwargs(self, shuffle, num_batches):
+
+        def fn(a, b, c, d, e):
+            return f"{a}{b}{c}{d}{e}"
+
+        combos = {'b': [5, 6, 7], 'd': [7, 8]}
+        cases = [{'a': 1, 'c': 3}, {'a': 2, 'c': 4}]
+
+        with TemporaryDirectory() as tdir:
+            crops = {}
+            for index_batches in (True, False):
+                crop = Crop(fn=fn, name=f'idx{index_batches}',
+                            parent_dir=tdir, num_batches=num_batches)
+                crop.sow_combos(combos, cases=cases, constants={'e': 9},
+                                shuffle=shuffle, index_batches=index_batches)
+                crops[index_batches] = crop
+
+            assert isinstance(crops[True].storage.read_batch(1),
+                              np.ndarray if shuffle else range)
+            assert isinstance(crops[False].storage.read_batch(1), list)
+
+            n = crops[True].num_sown_batches
+            assert n == crops[False].num_sown_batches == num_batches
+            for i in range(1, n + 1):
+                assert (crops[True]._batch_cases(i) ==
+                        crops[False]._batch_cases(i))
+
+            for crop in crops.values():
+                crop.grow_missing()
+            assert crops[True].reap() == crops[False].reap()
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    @pytest.mark.parametrize('index_batches', [True, False])
+    @pytest.mark.parametrize('shuffle', [False, True])
+    def test_sow_threaded_compressed(self, storage, index_batches, shuffle):
+        combos = [('b', [5, 6, 7]), ('d', [7, 8])]
+        cases = [{'a': 1, 'c': 3}, {'a': 2, 'c': 4}]
+
+        sown = []
+        combo_runner_core(lambda **kws: sown.append(kws), combos=combos,
+                          cases=cases, constants={'e': 9}, shuffle=shuffle,
+                          verbosity=0)
+
+        with TemporaryDirectory() as tdir:
+            for num_threads in (1, 3):
+                crop = Crop(fn=foo_add, name=f'thr{num_threads}',
+                            parent_dir=tdir, num_batches=5, storage=storage)
+                crop.sow_combos(combos, cases=cases, constants={'e': 9},
+                                shuffle=shuffle, index_batches=index_batches,
+                                num_threads=num_threads, compress=True,
+                                verbosity=0)
+                assert crop.num_sown_batches == 5
+                assert [kws for i in range(1, 6)
+                        for kws in crop._batch_cases(i)] == sown
+
+    def test_pack_by_cost(self):
+        costs = [1, 9, 2, 8, 3, 7, 4, 6, 5, 5]
+        order, bounds = pack_by_cost(costs, 3)
+        assert sorted(order.tolist()) == list(range(10))
+        totals = [sum(costs[k] for k in order[i:j])
+                  for i, j in zip(bounds[:-1], bounds[1:])]
+        assert max(totals) - min(totals) <= 1
+        with pytest.raises(ValueError):
+            pack_by_cost([1, -1], 2)
+
+    def test_in_case_order(self):
+        import weakref
+
+        class Batch(list):
+            pass
+
+        # batch 1 holds cases 3-5, batch 2 cases 0-2
+        order, bounds = np.array([3, 4, 5, 0, 1, 2]), np.array([0, 3, 6])
+        loaded = {}
+
+        def load(i):
+            assert i not in loaded
+            batch = Batch(order[bounds[i - 1]:bounds[i]].tolist())
+            loaded[i] = weakref.ref(batch)
+            return batch
+
+        results = []
+        for r in _in_case_order(load, order, bounds):
+            results.append(r)
+            if r == 3:
+                # finished with batch 2 before loading batch 1
+                assert loaded[2]() is None
+
+        assert results == list(range(6))
+        assert sorted(loaded) == [1, 2]
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    @pytest.mark.parametrize('index_batches', [True, False])
+    def test_sow_cost_packed(self, storage, index_batches):
+        combos = [('a', [1, 2, 3, 4, 5, 6]), ('b', [1, 10, 100])]
+        expected = combo_runner(foo_add, combos, constants={'c': None})
+
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, num_batches=4,
+                        storage=storage)
+            crop.sow_combos(combos, constants={'c': None},
+                            index_batches=index_batches,
+                            cost=lambda a, b, c: a * b)
+
+            totals = [sum(kws['a'] * kws['b'] for kws in crop._batch_cases(i))
+                      for i in range(1, 5)]
+            # the single most costly case is 600, out of 2331 in total
+            assert max(totals) == 600
+
+            # from disk, and partially reaped
+            c = Crop(name='foo_add', parent_dir=tdir)
+            c.grow((2, 4))
+            partial = c.reap(allow_incomplete=True)
+            grown = [(kws['a'], kws['b']) for i in (2, 4)
+                     for kws in c._batch_cases(i)]
+            for i, a in enumerate(combos[0][1]):
+                for j, b in enumerate(combos[1][1]):
+                    if (a, b) in grown:
+                        assert partial[i][j] == a + b
+                    else:
+                        assert np.isnan(partial[i][j])
+
+            c.grow_missing()
+            assert c.reap() == expected
+
+            with pytest.raises(ValueError):
+                crop.sow_combos(combos, constants={'c': None}, cost=[1, 2])
+
     def test_field_name_and_overlapping(self):
         combos1 = [('a', [10, 20, 30]),
                    ('b', [4, 5, 6, 7])]
@@ -159,19 +337,70 @@ class TestSowerReaper:
         assert results1 == expected1
         assert results2 == expected2
 
+    @pytest.mark.parametrize("storage", ['files', 'sqlite'])
     @pytest.mark.parametrize("num_workers", [None, 2])
     @pytest.mark.parametrize('shuffle', [False, True, 2])
-    def test_crop_grow_missing(self, num_workers, shuffle):
+    @pytest.mark.parametrize('within_batch', [False, True])
+    def test_crop_grow_missing(self, num_workers, shuffle, storage,
+                               within_batch):
         combos1 = [('a', [10, 20, 30]),
                    ('b', [4, 5, 6, 7])]
         expected1 = combo_runner(foo_add, combos1, constants={'c': True})
         with TemporaryDirectory() as tdir:
-            c1 = Crop(name='run1', fn=foo_add, parent_dir=tdir, batchsize=5)
+            c1 = Crop(name='run1', fn=foo_add, parent_dir=tdir, batchsize=5,
+                      storage=storage)
             c1.sow_combos(combos1, constants={'c': True}, shuffle=shuffle)
-            c1.grow_missing(num_workers=num_workers)
+            c1.grow_missing(num_workers=num_workers, claim=True,
+                            within_batch=within_batch)
             results1 = c1.reap()
         assert results1 == expected1
 
+    def test_grow_within_batch_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        combos = [('a', [10, 20, 30]), ('b', [4, 5, 6, 7])]
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, num_batches=2)
+            crop.sow_combos(combos, constants={'c': True}, shuffle=True)
+            with ThreadPoolExecutor(3) as executor:
+                assert grow(1, crop=crop, executor=executor, verbosity=0)
+            assert grow(2, crop=crop, num_workers=2, claim=True, verbosity=0)
+            assert crop.reap() == combo_runner(foo_add, combos,
+                                               constants={'c': True})
+
+    def test_grow_claim_mpi(self, monkeypatch):
+        calls = []
+
+        def fn(a, b):
+            calls.append((a, b))
+            return a + b
+
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=fn, parent_dir=tdir, num_batches=2)
+            crop.sow_combos([('a', [1, 2]), ('b', [3, 4])])
+            crop.storage.claim(1, owner='rank-0')
+
+            # the other ranks help, whoever holds the claim ...
+            monkeypatch.setenv('OMPI_COMM_WORLD_RANK', '1')
+            assert not grow(1, crop=crop, claim=True, verbosity=0)
+            assert calls == [(1, 3), (1, 4)]
+            assert not crop.storage.has_result(1)
+            assert crop.storage.claimed_ids() == (1,)
+
+            # ... which only rank 0 takes
+            monkeypatch.setenv('OMPI_COMM_WORLD_RANK', '0')
+            assert not grow(1, crop=crop, claim=True, verbosity=0)
+            assert grow(2, crop=crop, claim=True, verbosity=0)
+            assert crop.storage.claimed_ids() == (1,)
+            assert len(calls) == 4
+
+            s = crop.gen_cluster_script(scheduler='slurm', mpi=True)
+            assert '--claim' not in s
+            s = crop.gen_cluster_script(scheduler='slurm',
+                                        launcher='mpiexec python')
+            assert '--claim' not in s
+            assert '--claim' in crop.gen_cluster_script(scheduler='slurm')
+
     def test_combo_reaper_to_ds(self):
         combos = (('a', [1, 2]),
                   ('b', [10, 20, 30]),
@@ -292,6 +521,325 @@ class TestSowerReaper:
                                         allow_incomplete=True)
             assert ds.identical(ds_exp)
 
+    @pytest.mark.parametrize("engine", ['zarr', 'h5netcdf'])
+    @pytest.mark.parametrize(
+        "fn,var_names,var_dims", [
+            (foo2_scalar, ['x'], None),
+            (foo2_array, ['x'], {'x': 't'}),
+            (foo2_array_bool, ['x', 'y'], {'x': 't'}),
+            (foo2_dataset, None, None),
+        ]
+    )
+    @pytest.mark.parametrize('shuffle', [False, True])
+    def test_reap_to_disk(self, fn, var_names, var_dims, engine, shuffle):
+        combos = (('a', [1, 2, 3]),
+                  ('b', [10, 20, 30]))
+
+        ds_exp = combo_runner_to_ds(fn, combos, var_names, var_dims=var_dims)
+
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=fn, parent_dir=tdir, batchsize=2)
+            crop.sow_combos(combos, shuffle=shuffle)
+            crop.grow((1, 3))
+
+            fl = os.path.join(tdir, 'partial')
+            ds = crop.reap_to_disk(fl, engine=engine, var_names=var_names,
+                                   var_dims=var_dims, allow_incomplete=True)
+            assert ds['x'].notnull().sum() == 4 * ds['x'][0, 0].size
+            assert crop.num_results == 2
+            ds.close()
+
+            crop.grow_missing()
+            fl = os.path.join(tdir, 'full')
+            ds = crop.reap_to_disk(fl, engine=engine, var_names=var_names,
+                                   var_dims=var_dims, delete_results=True)
+            assert not os.path.exists(crop.location)
+            ds = ds.load()
+            ds.close()
+
+        for k in ds_exp.data_vars:
+            np.testing.assert_array_equal(ds[k], ds_exp[k])
+            assert ds[k].dims == ds_exp[k].dims
+
+    def test_reap_to_disk_cases_runner(self):
+
+        @label(['out'], var_dims={'out': 'k'}, var_coords={'k': [0, 1]},
+               constants={'e': 1})
+        def fn(a, b, c, e):
+            return [a + b + c + e, a * b * c]
+
+        with TemporaryDirectory() as tmpdir:
+            crop = fn.Crop('test', parent_dir=tmpdir, num_batches=3)
+            crop.sow_combos(combos={'c': [5, 6]},
+                            cases=[{'a': 1, 'b': 3}, {'a': 2, 'b': 4}])
+            crop.grow_missing()
+            ds_exp = crop.reap(clean_up=False)
+            ds = crop.reap_to_disk(os.path.join(tmpdir, 'out.zarr')).load()
+
+        assert ds.identical(ds_exp.transpose(*ds.dims))
+
+    @pytest.mark.parametrize('codec', ['npy', ('npy', 'zlib')])
+    def test_reap_to_disk_npy_codec(self, codec):
+
+        def fn(a, b):
+            return np.arange(4.0) * a + b, np.array([a, b])
+
+        combos = (('a', [1, 2, 3]), ('b', [10, 20]))
+        var_dims = {'x': 't', 'y': 'k'}
+        ds_exp = combo_runner_to_ds(fn, combos, ['x', 'y'], var_dims=var_dims)
+
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=fn, parent_dir=tdir, batchsize=4, codec=codec)
+            crop.sow_combos(combos)
+            crop.grow_missing()
+            ds = crop.reap_to_disk(os.path.join(tdir, 'out'),
+                                   var_names=['x', 'y'],
+                                   var_dims=var_dims).load()
+            ds.close()
+
+        for k in ds_exp.data_vars:
+            np.testing.assert_array_equal(ds[k], ds_exp[k])
+
+    def test_region_chunks(self):
+        assert region_chunks((4, 6), 3) == (1, 3)
+        assert region_chunks((4, 6), 6) == (1, 6)
+        assert region_chunks((4, 6), 12) == (2, 6)
+        assert region_chunks((4, 6), 24) == (4, 6)
+        assert region_chunks((4, 6), 4) is None
+        assert region_chunks((4, 6), 18) is None
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_reap_region(self, storage):
+        combos = (('a', [1, 2, 3]),
+                  ('b', [10, 20, 30, 40]))
+        ds_exp = combo_runner_to_ds(foo2_array, combos, ['x'],
+                                    var_dims={'x': 't'})
+
+        with TemporaryDirectory() as tdir:
+            runner = Runner(foo2_array, var_names=['x'], var_dims={'x': 't'})
+            store = os.path.join(tdir, 'out.zarr')
+            crop = runner.Crop(parent_dir=tdir, batchsize=2, storage=storage,
+                               zarr_store=store)
+            crop.sow_combos(combos)
+            assert not os.path.exists(store)
+
+            crop.grow((1, 4))
+            assert crop.num_results == 2
+            assert crop.missing_results() == (2, 3, 5, 6)
+            assert crop.check_bad() == ()
+
+            ds = crop.reap(allow_incomplete=True)
+            assert ds['x'].notnull().sum() == 4 * 10
+            # batch 4 is the second half of the row a=2
+            assert_allclose(ds['x'].sel(a=2, b=[30, 40]),
+                            ds_exp['x'].sel(a=2, b=[30, 40]))
+            ds.close()
+
+            # a fresh crop finds the store from the settings
+            crop = Crop(name=crop.name, parent_dir=tdir, farmer=runner)
+            crop.grow_missing()
+            ds = crop.reap().load()
+            assert not os.path.exists(crop.location)
+            assert os.path.isdir(store)
+            ds.close()
+
+        assert ds['x'].dims == ds_exp['x'].dims
+        np.testing.assert_array_equal(ds['x'], ds_exp['x'])
+
+    def test_reap_region_harvester(self):
+        combos = (('a', [1, 2]),
+                  ('b', [10, 20, 30]))
+        ds_exp = combo_runner_to_ds(foo2_scalar, combos, ['x'])
+
+        with TemporaryDirectory() as tdir:
+            runner = Runner(foo2_scalar, var_names=['x'])
+            harvester = Harvester(runner, os.path.join(tdir, 'data.h5'))
+            crop = harvester.Crop(parent_dir=tdir, num_batches=2,
+                                  zarr_store=os.path.join(tdir, 'out'))
+            crop.sow_combos(combos)
+            assert crop._region_chunks == (1, 3)
+            crop.grow_missing(parallel=True)
+            crop.reap()
+
+            full_ds = Harvester(runner, os.path.join(tdir, 'data.h5')).full_ds
+            assert_allclose(full_ds['x'], ds_exp['x'])
+
+    def test_region_checks(self):
+        combos = (('a', [1, 2, 3]),
+                  ('b', [10, 20, 30, 40]))
+
+        with TemporaryDirectory() as tdir:
+            store = os.path.join(tdir, 'out.zarr')
+            crop = Crop(fn=foo2_scalar, parent_dir=tdir, zarr_store=store)
+            with pytest.raises(ValueError, match="Runner"):
+                crop.sow_combos(combos)
+
+            runner = Runner(foo2_scalar, var_names=['x'])
+            with pytest.raises(ValueError, match="one chunk"):
+                runner.Crop(parent_dir=tdir, batchsize=3,
+                            zarr_store=store).sow_combos(combos)
+            with pytest.raises(ValueError, match="combos alone"):
+                runner.Crop(parent_dir=tdir, zarr_store=store).sow_cases(
+                    ['a', 'b'], [(1, 10), (2, 20)])
+            with pytest.raises(ValueError, match="consecutive"):
+                runner.Crop(parent_dir=tdir, zarr_store=store).sow_combos(
+                    combos, shuffle=True)
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_grow_telemetry(self, storage):
+        combos = (('a', [1, 2]),
+                  ('b', [10, 20, 30]))
+
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo2_scalar, parent_dir=tdir, batchsize=3,
+                        storage=storage)
+            crop.sow_combos(combos)
+            crop.grow_missing()
+
+            entries = crop.storage.read_telemetry()
+            assert [e['id'] for e in entries] == [1, 2]
+            for entry in entries:
+                assert entry['num_cases'] == 3
+                assert len(entry['case_walltimes']) == 3
+                assert len(entry['case_cputimes']) == 3
+                assert entry['peak_memory'] > 0
+
+            # kept to inform the next sowing
+            crop.sow_combos(combos, batchsize=2, num_batches=3)
+            crop.grow(1)
+            entries = crop.storage.read_telemetry()
+            assert [e['id'] for e in entries] == [1, 2, 1]
+            assert entries[-1]['num_cases'] == 2
+
+    def test_suggest_batching(self):
+
+        def fn(a, b):
+            time.sleep(0.01)
+            return a + b
+
+        combos = (('a', [1, 2, 3, 4, 5, 6]),
+                  ('b', [10, 20]))
+
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=fn, parent_dir=tdir, batchsize=2)
+            with pytest.raises(XYZError, match="sown"):
+                crop.suggest_batching()
+
+            crop.sow_combos(combos)
+            # nothing grown yet -> piloted
+            suggestion = crop.suggest_batching(target_walltime=0.1 / 3600)
+            assert 3 <= suggestion['batchsize'] <= 7
+            assert suggestion['num_procs'] == 1
+            assert suggestion['gigabytes'] >= 1
+            assert (suggestion['hours'], suggestion['minutes']) == (0, 1)
+            assert crop.num_results == 0
+
+            crop.grow_missing()
+            with pytest.warns(UserWarning, match="max_mem"):
+                suggestion = crop.suggest_batching(max_mem=0.001, apply=True)
+            # capped at the number of cases
+            assert suggestion['batchsize'] == 12
+
+            crop.sow_combos(combos)
+            assert crop.num_batches == 1
+
+            crop = Crop(name=crop.name, parent_dir=tdir)
+            script = crop.gen_cluster_script('slurm')
+            assert f"--mem={suggestion['gigabytes']}gb" in script
+            assert "--time=00:01:00" in script
+            assert "--time=02:00:00" in crop.gen_cluster_script('slurm',
+                                                                hours=2)
+
+    @pytest.mark.parametrize('shuffle', [False, True])
+    def test_reap_new_harvester(self, shuffle):
+        combos = (('a', [1, 2, 3]),
+                  ('b', [10, 20, 30]))
+        ds_exp = combo_runner_to_ds(foo2_array, combos, ['x'],
+                                    var_dims={'x': 't'})
+
+        with TemporaryDirectory() as tdir:
+            runner = Runner(foo2_array, var_names=['x'], var_dims={'x': 't'})
+            harvester = Harvester(runner, os.path.join(tdir, 'data.h5'))
+            crop = harvester.Crop(parent_dir=tdir, batchsize=2)
+            crop.sow_combos(combos, shuffle=shuffle)
+
+            assert crop.reap_new() is None
+
+            crop.grow((1, 3))
+            ds = crop.reap_new()
+            assert ds['x'].notnull().sum() == 4 * 10
+            assert crop.reaped_ids() == (1, 3)
+            assert harvester.full_ds['x'].notnull().sum() == 4 * 10
+
+            # nothing new
+            assert crop.reap_new() is None
+
+            crop.grow((2, 4))
+            ds = crop.reap_new()
+            assert ds['x'].notnull().sum() == 4 * 10
+            assert crop.reaped_ids() == (1, 2, 3, 4)
+
+            crop.grow_missing()
+            crop.reap_new()
+            assert not os.path.exists(crop.location)
+
+            full_ds = Harvester(runner, os.path.join(tdir, 'data.h5')).full_ds
+            assert full_ds['x'].identical(ds_exp['x'])
+
+    def test_reap_new_regrown(self):
+        combos = (('a', [1, 2, 3]),
+                  ('b', [10, 20, 30]))
+        ds_exp = combo_runner_to_ds(foo2_array, combos, ['x'],
+                                    var_dims={'x': 't'})
+
+        with TemporaryDirectory() as tdir:
+            runner = Runner(foo2_array, var_names=['x'], var_dims={'x': 't'})
+            harvester = Harvester(runner, os.path.join(tdir, 'data.h5'))
+            crop = harvester.Crop(parent_dir=tdir, batchsize=2)
+            crop.sow_combos(combos)
+            crop.grow_missing()
+            crop.reap_new(clean_up=False)
+
+            # a result reaped already, then found to be bad ...
+            path = crop.storage.result_path(1)
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(path, 'wb') as f:
+                f.write(data[:-7])
+            assert crop.check_bad() == (1,)
+            assert crop.reaped_ids() == (2, 3, 4, 5)
+            assert crop.reap_new() is None
+            assert os.path.exists(crop.location)
+
+            # ... is reaped again once regrown
+            crop.grow_missing()
+            ds = crop.reap_new()
+            assert ds['x'].notnull().sum() == 2 * 10
+            assert not os.path.exists(crop.location)
+
+            full_ds = Harvester(runner, os.path.join(tdir, 'data.h5')).full_ds
+            assert full_ds['x'].identical(ds_exp['x'])
+
+    def test_reap_new_sampler(self):
+
+        def fn(a, b):
+            return a + b
+
+        with TemporaryDirectory() as tdir:
+            sampler = Sampler(Runner(fn, var_names='sum'),
+                              os.path.join(tdir, 'data.pkl'),
+                              default_combos={'a': [1, 2, 3], 'b': [4, 5]})
+            crop = sampler.Crop(parent_dir=tdir, batchsize=3)
+            crop.sow_samples(9)
+            crop.grow(1)
+            assert len(crop.reap_new()) == 3
+            crop.grow_missing()
+            assert len(crop.reap_new()) == 6
+
+            df = sampler.full_df
+            assert len(df) == 9
+            assert (df['sum'] == df['a'] + df['b']).all()
+
     def test_new_ds_crop_loads_info_incomplete(self):
         def fn(a, b):
             return xr.Dataset({'sum': a + b, 'diff': a - b})
@@ -382,6 +930,92 @@ class TestSowerReaper:
             assert s1 != s3
             assert s2 != s3
 
+            s4 = crop.gen_cluster_script(scheduler=scheduler, num_procs=8,
+                                         num_workers=True,
+                                         setup="import os\nx = '$HOME'")
+            assert "--num-workers 8" in s4
+            assert "export OMP_NUM_THREADS=1\n" in s4
+
+            # the command of each task is a single valid line
+            for script in (s1, s2, s3, s4):
+                args = cluster_task_args(script, 1)
+                assert args[:2] == ['grow', 'foo_add']
+            assert cluster_task_args(s4, 1)[-1] == "import os\nx = '$HOME'"
+
+            # run the remaining tasks, as the shell would
+            for task_id in range(1, 10):
+                main(cluster_task_args(s3, task_id))
+            assert crop.is_ready_to_reap()
+
+    @pytest.mark.parametrize("scheduler", ['sge', 'pbs', 'slurm'])
+    def test_gen_cluster_script_packed(self, scheduler):
+        combos = [
+            ('a', [10, 20, 30]),
+            ('b', [4, 5, 6, 7]),
+        ]
+
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=1)
+            crop.sow_combos(combos, constants={'c': True})
+
+            s1 = crop.gen_cluster_script(scheduler=scheduler,
+                                         batches_per_task=5)
+            assert "--batches 1-12 " in s1
+            assert "--batches-per-task 5 " in s1
+            assert "-3\n" in s1
+
+            # 10 minutes of walltime, 4 minutes per batch
+            s2 = crop.gen_cluster_script(scheduler=scheduler, minutes=10,
+                                         seconds_per_batch=240)
+            assert "--batches-per-task 2 " in s2
+            assert "-6\n" in s2
+
+            crop.grow(range(1, 11))
+            s3 = crop.gen_cluster_script(scheduler=scheduler,
+                                         batches_per_task=5)
+            assert "--batches 11-12 " in s3
+            if scheduler == 'pbs':
+                assert "#PBS -J" not in s3
+
+            with pytest.raises(ValueError):
+                crop.gen_cluster_script(scheduler=scheduler,
+                                        batches_per_task=2,
+                                        seconds_per_batch=60)
+
+            # run the single task, as the shell would
+            main(cluster_task_args(s3, 1))
+            assert crop.is_ready_to_reap()
+
+    def test_grow_cluster_local(self):
+
+        def fn(a, b):
+            return a + b
+
+        combos = [('a', [10, 20, 30]), ('b', [4, 5, 6, 7])]
+        repo_dir = os.path.dirname(os.path.dirname(xyzpy.__file__))
+
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=fn, parent_dir=tdir, batchsize=1)
+            crop.sow_combos(combos, verbosity=0)
+            crop.grow((2, 3))
+
+            log_dir = os.path.join(tdir, 'logs')
+            proc = crop.grow_local(
+                num_concurrent=4, num_procs=2, output_directory=log_dir,
+                batches_per_task=3, launcher=sys.executable,
+                shell_setup=f"export PYTHONPATH={repo_dir}")
+            assert proc.wait() == 0
+
+            logs = sorted(os.listdir(log_dir))
+            assert logs == [f"fn.{i}.log" for i in range(1, 5)]
+            with open(os.path.join(log_dir, logs[0])) as f:
+                assert "success" in f.read()
+
+            script = crop.gen_local_script(num_procs=4, num_workers=2)
+            assert "export OMP_NUM_THREADS=2\n" in script
+
+            assert crop.reap() == combo_runner(fn, combos)
+
     def test_sow_reap_cases(self):
 
         def dummy_function(a, b):
@@ -434,3 +1068,74 @@ class TestSowerReaper:
 
         assert ds['out'].ndim == 4
         assert ds['out'].notnull().sum().item() == 8
+
+
+class TestCommandLine:
+
+    def test_parse_format_batch_ids(self):
+        assert parse_batch_ids("1-3,5, 7-8,") == (1, 2, 3, 5, 7, 8)
+        assert format_batch_ids((8, 1, 2, 3, 5, 7)) == "1-3,5,7-8"
+        assert format_batch_ids(()) == ""
+        with pytest.raises(ValueError):
+            parse_batch_ids("1-x")
+
+    def test_grow_missing_status(self, capsys):
+        combos = [('a', [1, 2, 3]), ('b', [4, 5])]
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=1)
+            crop.sow_combos(combos, constants={'c': None}, verbosity=0)
+
+            # tasks must split a fixed list of batches
+            with pytest.raises(SystemExit):
+                main(['grow', 'foo_add', '-d', tdir, '--task-id', '1'])
+            assert crop.num_results == 0
+
+            main(['grow', 'foo_add', '-d', tdir, '-b', '1-2,5', '-v', '0'])
+            capsys.readouterr()
+            main(['missing', 'foo_add', '-d', tdir])
+            assert capsys.readouterr().out == "3-4,6\n"
+
+            main(['status', '-d', tdir])
+            assert "3 / 6 batches" in capsys.readouterr().out
+
+            # the function is only loaded when needed
+            c = Crop(name='foo_add', parent_dir=tdir)
+            assert c.missing_results() == (3, 4, 6)
+            assert c._fn is None
+            assert c.fn(1, 2, 3) == 3
+
+            main(['grow', 'foo_add', '-d', tdir, '--claim', '-v', '0'])
+            assert crop.reap() == ((5, 6), (6, 7), (7, 8))
+
+            with pytest.raises(SystemExit):
+                main(['grow', 'foo_add', '-d', tdir])
+
+    def test_reap(self):
+        combos = (('a', [1, 2, 3]), ('b', [10, 20, 30]))
+        ds_exp = combo_runner_to_ds(foo2_array, combos, ['x'],
+                                    var_dims={'x': 't'})
+
+        with TemporaryDirectory() as tdir:
+            runner = Runner(foo2_array, var_names=['x'], var_dims={'x': 't'})
+            crop = runner.Crop(parent_dir=tdir, batchsize=2)
+            crop.sow_combos(combos)
+            main(['grow', crop.name, '-d', tdir, '-v', '0'])
+
+            # nowhere to reap a plain runner to
+            with pytest.raises(SystemExit):
+                main(['reap', crop.name, '-d', tdir])
+
+            out = os.path.join(tdir, 'out.zarr')
+            main(['reap', crop.name, '-d', tdir, '-o', out])
+            assert not os.path.exists(crop.location)
+            ds = xr.open_zarr(out).load()
+
+            harvester = Harvester(runner, os.path.join(tdir, 'data.h5'))
+            crop = harvester.Crop(parent_dir=tdir, batchsize=2)
+            crop.sow_combos(combos)
+            crop.grow_missing()
+            main(['reap', crop.name, '-d', tdir, '--keep'])
+            assert os.path.exists(crop.location)
+            assert harvester.full_ds.identical(ds_exp)
+
+        np.testing.assert_array_equal(ds['x'], ds_exp['x'])
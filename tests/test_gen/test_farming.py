@@ -9,6 +9,7 @@ import xarray as xr
 
 from xyzpy.manage import load_ds, load_df
 from xyzpy.gen.farming import Runner, Harvester, Sampler, label
+from xyzpy.gen.prepare import XYZError
 from xyzpy.gen.cropping import grow
 
 
@@ -277,6 +278,155 @@ class TestHarvester:
         assert h.full_ds.identical(fn3_fba_ds)
         assert hds.identical(fn3_fba_ds)
 
+    def test_harvest_combos_append(self, fn3_fba_runner, fn3_fba_ds):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fl_pth = os.path.join(tmpdir, 'test.zarr')
+            h = Harvester(fn3_fba_runner, fl_pth, engine='zarr')
+            h.harvest_combos((('a', (1,)), ('b', (3, 4))), sync='append')
+            h.harvest_combos((('a', (2,)), ('b', (3, 4))), sync='append')
+            # nothing is held in memory
+            assert h._full_ds is None
+            hds = load_ds(fl_pth, engine='zarr')
+            assert hds.identical(fn3_fba_ds)
+            assert hds['sum'].dtype == fn3_fba_ds['sum'].dtype
+
+            # fill in existing values and extend along ``b``
+            h.harvest_cases([(1, 3), (1, 5), (2, 5)], sync='append')
+            with pytest.raises(xr.MergeError):
+                h.add_ds(h.last_ds + 1, sync='append')
+            h.add_ds(h.last_ds + 1, sync='append', overwrite=True)
+            h.add_ds(h.last_ds - 1, sync='append', overwrite=False)
+
+            hds = load_ds(fl_pth, engine='zarr')
+            assert h.full_ds.identical(hds)
+
+        assert list(hds['a'].values) == [1, 2]
+        assert list(hds['b'].values) == [3, 4, 5]
+        exp = fn3_fba_ds['array'].sel(a=1, b=3) + 1
+        assert hds['array'].sel(a=1, b=3).equals(exp)
+        assert hds['array'].sel(a=2, b=4).equals(
+            fn3_fba_ds['array'].sel(a=2, b=4))
+
+    def test_harvest_append_errors(self, fn3_fba_runner):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fl_pth = os.path.join(tmpdir, 'test.h5')
+            h = Harvester(fn3_fba_runner, fl_pth)
+            with pytest.raises(XYZError):
+                h.harvest_combos((('a', (1,)), ('b', (3,))), sync='append')
+
+            fl_pth = os.path.join(tmpdir, 'test.zarr')
+            h = Harvester(fn3_fba_runner, fl_pth, engine='zarr')
+            h.harvest_combos((('a', (1,)), ('b', (3, 4))), sync='append')
+            # integer data can't have missing values filled in
+            with pytest.raises(ValueError):
+                h.harvest_combos((('a', (2,)), ('b', (3,))), sync='append')
+            # nor can the variables change
+            with pytest.raises(ValueError):
+                h.add_ds(h.last_ds.drop_vars('sum'), sync='append')
+
+    def test_harvest_combos_shard(self, fn3_fba_runner, fn3_fba_ds):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fl_pth = os.path.join(tmpdir, 'test.h5')
+            h = Harvester(fn3_fba_runner, fl_pth)
+            h.harvest_combos((('a', (1,)), ('b', (3, 4))), sync='shard')
+            h.harvest_combos((('a', (2,)), ('b', (3, 4))), sync='shard')
+            assert not os.path.exists(fl_pth)
+            assert len(h.shard_files()) == 2
+            assert h.full_ds.identical(fn3_fba_ds)
+
+            # conflicts are resolved in the order harvested
+            h.harvest_cases([(1, 3)], sync='shard')
+            h.add_ds(h.last_ds + 1, sync='shard', overwrite=True)
+            h.add_ds(h.last_ds, sync='shard', overwrite=False)
+            exp = fn3_fba_ds['array'].sel(a=1, b=3) + 1
+            assert h.full_ds['array'].sel(a=1, b=3).equals(exp)
+
+            # another harvester sees the same data
+            h2 = Harvester(fn3_fba_runner, fl_pth)
+            assert h2.full_ds.identical(h.full_ds)
+
+            assert h.compact() == 5
+            assert not h.shard_files()
+            assert Harvester(fn3_fba_runner, fl_pth).full_ds.identical(
+                h2.full_ds)
+
+            # shards are folded in on top of the compacted dataset ...
+            h.harvest_cases([(3, 3), (3, 4)], sync='shard')
+            assert h.full_ds['array'].sel(a=1, b=3).equals(exp)
+            assert list(h.full_ds['a'].values) == [1, 2, 3]
+
+            # ... until compacted in the background, or with a full sync
+            h.compact(background=True).join()
+            assert not h.shard_files()
+            h.harvest_cases([(4, 3)], sync='shard')
+            h.harvest_cases([(4, 4)])
+            assert not h.shard_files()
+            hds = load_ds(fl_pth)
+            assert list(hds['a'].values) == [1, 2, 3, 4]
+
+            # conflicting shards raise before being written ...
+            h.harvest_cases([(4, 4)], sync='shard')
+            with pytest.raises(xr.MergeError):
+                h.add_ds(h.last_ds + 1, sync='shard')
+            assert len(h.shard_files()) == 1
+            h.harvest_cases([(5, 3)], sync='shard')
+            assert list(h.full_ds['a'].values) == [1, 2, 3, 4, 5]
+
+            # ... or, if written concurrently, once merged, naming the shard
+            h._write_shard(h.last_ds + 1, engine='h5netcdf')
+            bad = os.path.basename(h.shard_files()[-1])
+            with pytest.raises(xr.MergeError, match=bad):
+                h.load_full_ds()
+
+            h.delete_ds()
+            assert not os.listdir(tmpdir)
+
+        with pytest.raises(XYZError):
+            Harvester(fn3_fba_runner, 'test.zarr', engine='zarr').add_ds(
+                fn3_fba_ds, sync='shard')
+
+    def test_harvest_shard_after_compact(self, fn3_fba_runner, fn3_fba_ds):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fl_pth = os.path.join(tmpdir, 'test.h5')
+            h = Harvester(fn3_fba_runner, fl_pth)
+            # a slow writer names its shard before a faster one ...
+            h._write_shard(fn3_fba_ds.sel(a=[2]), engine='h5netcdf')
+            slow, = h.shard_files()
+            os.rename(slow, fl_pth + '.slow')
+            h.add_ds(fn3_fba_ds.sel(a=[1]), sync='shard')
+
+            # ... but only finishes writing it after a compaction
+            assert h.compact() == 1
+            os.rename(fl_pth + '.slow', slow)
+            assert h.shard_files() == [slow]
+            assert Harvester(fn3_fba_runner, fl_pth).full_ds.identical(
+                fn3_fba_ds)
+            assert h.compact() == 1
+            assert not h.shard_files()
+            assert Harvester(fn3_fba_runner, fl_pth).full_ds.identical(
+                fn3_fba_ds)
+
+            # a full sync also only removes the shards it merged
+            h.add_ds(fn3_fba_ds.sel(a=[1]) + 1, sync='shard', overwrite=True)
+            h.load_full_ds()
+            Harvester(fn3_fba_runner, fl_pth).add_ds(
+                fn3_fba_ds.sel(a=[2]) + 1, sync='shard', overwrite=True)
+            h.save_full_ds()
+            assert len(h.shard_files()) == 1
+            assert Harvester(fn3_fba_runner, fl_pth).full_ds.equals(
+                fn3_fba_ds + 1)
+
+    def test_harvest_shard_no_extension(self, fn3_fba_runner, fn3_fba_ds):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fl_pth = os.path.join(tmpdir, 'test')
+            h = Harvester(fn3_fba_runner, fl_pth,
+                          full_ds=fn3_fba_ds.sel(a=[1]))
+            h.add_ds(fn3_fba_ds.sel(a=[2]), sync='shard')
+            assert os.path.exists(fl_pth + '.h5')
+            assert len(h.shard_files()) == 1
+            h2 = Harvester(fn3_fba_runner, fl_pth)
+            assert h2.full_ds.identical(fn3_fba_ds)
+
     def test_harvest_combos_overwrite(self, fn3_fba_runner, fn3_fba_ds):
         with tempfile.TemporaryDirectory() as tmpdir:
             fl_pth = os.path.join(tmpdir, 'test.h5')
@@ -465,3 +615,31 @@ class TestSampler:
             assert len(hdf) == 10
             assert s.last_df.compare(hdf).empty
             assert s.full_df.compare(hdf).empty
+
+    @pytest.mark.parametrize('sync', ['append', 'shard'])
+    def test_add_df_unsupported_sync(self, sync):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fl_pth = os.path.join(tmpdir, 'test.pkl')
+            s = Sampler(lambda a: a, fl_pth)
+            with pytest.raises(XYZError, match=sync):
+                s.add_df({'a': [1, 2]}, sync=sync)
+            assert not os.path.exists(fl_pth)
+            s.add_df({'a': [1, 2]})
+            assert len(load_df(fl_pth)) == 2
+
+    def test_sample_combos_arrow(self):
+        pa = pytest.importorskip('pyarrow')
+
+        @label(var_names=['sum', 'diff'])
+        def sum_diff(a, b):
+            return a + b, a - b
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fl_pth = os.path.join(tmpdir, 'test.parquet')
+            s = Sampler(sum_diff, fl_pth, engine='parquet', arrow=True,
+                        default_combos={'a': [1, 2, 3], 'b': [4, 5, 6]})
+            s.sample_combos(10)
+            s.sample_combos(5)
+            assert isinstance(s.last_df, pa.Table)
+            assert s.full_df.num_rows == 15
+            assert load_df(fl_pth, engine='parquet').shape == (15, 4)
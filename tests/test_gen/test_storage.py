@@ -0,0 +1,690 @@
+import os
+import sys
+import time
+import pickle
+import threading
+from tempfile import TemporaryDirectory
+
+import pytest
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from xyzpy.gen.storage import (
+    Inotify,
+    CropStorage,
+    FileStorage,
+    SQLiteStorage,
+    NpyCodec,
+    parse_storage,
+    parse_codec,
+    storage_spec,
+)
+from xyzpy.gen.cropping import Crop, grow, worker
+from xyzpy.__main__ import main
+
+
+def foo_add(a, b, c):
+    return a + b
+
+
+@pytest.fixture(params=['files', 'sqlite'])
+def storage(request):
+    with TemporaryDirectory() as tdir:
+        store = parse_storage(request.param, os.path.join(tdir, '.xyz-foo'))
+        store.prepare()
+        yield store
+        store.close()
+
+
+class TestCropStorage:
+
+    def test_parse_storage(self):
+        assert isinstance(parse_storage(None, 'loc'), FileStorage)
+        assert isinstance(parse_storage('sqlite', 'loc'), SQLiteStorage)
+        assert isinstance(parse_storage(SQLiteStorage, 'loc'), SQLiteStorage)
+        store = SQLiteStorage('loc', journal_mode='delete')
+        assert parse_storage(store, 'other') is store
+        assert storage_spec(SQLiteStorage('loc')) == 'sqlite'
+        spec = storage_spec(store)
+        assert spec == ('sqlite', {'journal_mode': 'delete'})
+        assert parse_storage(spec, 'loc').journal_mode == 'delete'
+        with pytest.raises(ValueError):
+            parse_storage('zip', 'loc')
+
+    def test_incomplete_storage(self):
+
+        class HalfStorage(CropStorage):
+            name = 'half'
+
+            def write_batch(self, batch_id, batch, compress=False):
+                pass
+
+        # fails straight away rather than partway through growing
+        with pytest.raises(TypeError):
+            HalfStorage('loc')
+
+    def test_batches_and_results(self, storage):
+        assert isinstance(storage, CropStorage)
+        assert storage.batch_ids() == ()
+        assert storage.num_results() == 0
+
+        for i in (3, 1, 2):
+            storage.write_batch(i, [{'a': i}])
+        assert storage.batch_ids() == (1, 2, 3)
+        assert storage.num_batches() == 3
+        assert storage.read_batch(2) == [{'a': 2}]
+
+        storage.write_result(2, (4,))
+        storage.write_result(2, (5,))
+        assert storage.has_result(2)
+        assert not storage.has_result(1)
+        assert storage.read_result(2) == (5,)
+        assert storage.num_results() == 1
+        assert storage.missing_results(3) == (1, 3)
+
+        storage.delete_result(2)
+        assert storage.result_ids() == ()
+        assert storage.num_results() == 0
+        with pytest.raises(FileNotFoundError):
+            storage.read_result(2)
+
+    def test_mark_result(self, storage):
+        storage.write_batch(1, [{'a': 1}])
+        storage.mark_result(1)
+        storage.mark_result(1)
+        assert storage.has_result(1)
+        assert storage.result_ids() == (1,)
+        assert storage.num_results() == 1
+        # the result itself was stored elsewhere
+        with pytest.raises(FileNotFoundError):
+            storage.read_result(1)
+        with pytest.raises(FileNotFoundError):
+            storage.result_nbytes(1)
+        with pytest.raises(FileNotFoundError):
+            storage.result_checksum(1)
+
+        storage.delete_result(1)
+        assert not storage.has_result(1)
+        assert storage.num_results() == 0
+
+    def test_compressed_batch(self, storage):
+        batch = [{'a': i, 'b': 'x' * 100} for i in range(100)]
+        nbytes = storage.write_batch(1, batch)
+        assert storage.write_batch(2, batch, compress=True) < nbytes
+        assert storage.read_batch(1) == storage.read_batch(2) == batch
+
+    def test_claims(self, storage):
+        assert storage.claim(1)
+        assert not storage.claim(1, owner='someone-else')
+        assert storage.claim(2)
+        assert storage.claimed_ids() == (1, 2)
+        storage.release(1)
+        storage.release(1)
+        assert storage.claimed_ids() == (2,)
+        assert storage.claim(1)
+
+    def test_claim_lease(self, storage):
+        assert storage.claim(1, owner='dead')
+        assert storage.claim(2, owner='alive')
+        time.sleep(0.2)
+        storage.heartbeat(2, owner='alive')
+        storage.heartbeat(1, owner='impostor')
+        assert storage.claimed_ids(lease=0.1) == (2,)
+        assert storage.expired_ids(0.1) == (1,)
+
+        assert not storage.claim(2, owner='new', lease=0.1)
+        assert storage.claim(1, owner='new', lease=0.1)
+        # the original owner finishing late shouldn't release the new claim
+        storage.release(1, owner='dead')
+        assert storage.claimed_ids() == (1, 2)
+        storage.release(1, owner='new')
+        assert storage.claimed_ids() == (2,)
+
+    def test_pickle(self, storage):
+        storage.write_batch(1, [{'a': 1}])
+        new = pickle.loads(pickle.dumps(storage))
+        assert new.read_batch(1) == [{'a': 1}]
+
+
+def array_result(n=3):
+    return tuple(np.arange(4.0) + i for i in range(n))
+
+
+def arrays_result(n=3):
+    return tuple((np.full((2, 3), i, dtype=np.int32), np.arange(i, i + 5.0))
+                 for i in range(n))
+
+
+def mixed_result(n=3):
+    return tuple((np.arange(i + 1.0), 'foo', i) for i in range(n))
+
+
+def assert_results_equal(x, y):
+    assert len(x) == len(y)
+    for xi, yi in zip(x, y):
+        if isinstance(xi, tuple):
+            assert_results_equal(xi, yi)
+        else:
+            assert_array_equal(xi, yi)
+
+
+class TestResultCodecs:
+
+    @pytest.mark.parametrize('codec', [
+        None, ('pickle', True), 'npy', ('npy', 'zlib'),
+        ('npy', {'id': 'zlib', 'level': 1}), ('npy', 'zstd'), ('npy', 'lz4'),
+        ('npy', 'blosc'),
+    ])
+    @pytest.mark.parametrize('make_result', [
+        array_result, arrays_result, mixed_result,
+    ])
+    def test_round_trip(self, storage, codec, make_result):
+        if codec and codec[1] in ('zstd', 'lz4', 'blosc'):
+            pytest.importorskip('numcodecs')
+        result = make_result()
+        storage.write_result(1, result, codec=codec)
+        assert_results_equal(storage.read_result(1), result)
+        assert_results_equal(storage.read_result(1, mmap=True), result)
+
+    def test_parse_codec(self):
+        assert parse_codec(None).spec() == ('pickle', None)
+        codec = parse_codec(('npy', True))
+        assert isinstance(codec, NpyCodec)
+        assert codec.spec() == ('npy', {'id': 'zlib', 'level': -1})
+        assert parse_codec(codec.spec()).spec() == codec.spec()
+        with pytest.raises(ValueError):
+            parse_codec('hdf5')
+
+    def test_npy_smaller_and_memory_mapped(self):
+        result = tuple(np.zeros(1000) for _ in range(10))
+        with TemporaryDirectory() as tdir:
+            store = FileStorage(os.path.join(tdir, '.xyz-foo'))
+            store.prepare()
+            store.write_result(1, result, codec='npy')
+            store.write_result(2, result, codec=('npy', True))
+            sizes = [os.path.getsize(store.result_path(i)) for i in (1, 2)]
+            assert sizes[1] < sizes[0]
+
+            mapped = store.read_result(1, mmap=True)
+            assert isinstance(mapped[0], np.memmap)
+            assert not isinstance(store.read_result(2, mmap=True)[0],
+                                  np.memmap)
+            assert_results_equal(mapped, result)
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_crop_codec(self, storage):
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=array_add, parent_dir=tdir, batchsize=2,
+                        storage=storage, codec=('npy', True))
+            crop.sow_combos([('a', [1, 2, 3]), ('b', [4, 5])],
+                            constants={'c': None}, verbosity=0)
+            other = Crop(name='array_add', parent_dir=tdir)
+            assert other.codec.spec() == crop.codec.spec()
+            other.grow_missing()
+            assert_results_equal(
+                crop.reap(),
+                tuple(tuple(array_add(a, b, None) for b in (4, 5))
+                      for a in (1, 2, 3)))
+
+
+def array_add(a, b, c):
+    return np.arange(3.0) + a + b
+
+
+class TestGrowClaim:
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_claimed_batch_skipped(self, storage):
+        combos = [('a', [1, 2, 3]), ('b', [4, 5])]
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=2,
+                        storage=storage)
+            crop.sow_combos(combos, constants={'c': None})
+
+            assert crop.storage.claim(2, owner='another-worker')
+            assert grow(1, crop=crop, claim=True)
+            assert not grow(2, crop=crop, claim=True)
+            assert not grow(1, crop=crop, claim=True)
+            assert crop.storage.claimed_ids() == (2,)
+            assert crop.missing_results() == (2, 3)
+
+            crop.storage.release(2)
+            crop.grow_missing(claim=True)
+            assert crop.is_ready_to_reap()
+            assert crop.storage.claimed_ids() == ()
+            assert crop.reap() == ((5, 6), (6, 7), (7, 8))
+
+
+def corrupt_result(storage, batch_id, truncate=False):
+    if storage.name == 'files':
+        with open(storage.result_path(batch_id), 'rb') as f:
+            data = f.read()
+    else:
+        data, = storage.conn.execute(
+            "SELECT data FROM results WHERE id = ?", (batch_id,)).fetchone()
+
+    # either cut short or flip the last byte
+    data = data[:-7] if truncate else data[:-1] + bytes((data[-1] ^ 1,))
+
+    if storage.name == 'files':
+        with open(storage.result_path(batch_id), 'wb') as f:
+            f.write(data)
+    else:
+        storage.conn.execute(
+            "UPDATE results SET data = ? WHERE id = ?", (data, batch_id))
+
+
+class TestResultManifest:
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_check_bad_from_manifest(self, storage, monkeypatch):
+        combos = [('a', [1, 2, 3]), ('b', [4, 5])]
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=array_add, parent_dir=tdir, batchsize=2,
+                        storage=storage)
+            crop.sow_combos(combos, constants={'c': None})
+            crop.grow_missing()
+
+            manifest = crop.storage.result_manifest()
+            assert sorted(manifest) == [1, 2, 3]
+            assert manifest[1]['num_cases'] == 2
+            assert (manifest[1]['nbytes'] ==
+                    crop.storage.result_nbytes(1))
+
+            # good results are checked without being loaded
+            read_result = crop.storage.read_result
+            loaded = []
+
+            def counting_read_result(batch_id, mmap=False):
+                loaded.append(batch_id)
+                return read_result(batch_id, mmap=mmap)
+
+            monkeypatch.setattr(crop.storage, 'read_result',
+                                counting_read_result)
+            assert crop.check_bad(checksum=True) == ()
+            assert loaded == []
+
+            corrupt_result(crop.storage, 2)
+            assert crop.check_bad(delete_bad=False) == ()
+            assert crop.check_bad(delete_bad=False, checksum=True) == (2,)
+            assert loaded == []
+
+            corrupt_result(crop.storage, 3, truncate=True)
+            assert crop.check_bad() == (3,)
+            assert loaded == [3]
+            assert crop.missing_results() == (3,)
+
+    def test_check_bad_without_manifest(self):
+        combos = [('a', [1, 2, 3]), ('b', [4, 5])]
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=2)
+            crop.sow_combos(combos, constants={'c': None})
+            crop.grow_missing()
+
+            # e.g. a crop grown by an older version
+            os.remove(crop.storage.manifest_path)
+            assert crop.storage.result_manifest() == {}
+            assert crop.check_bad() == ()
+
+            with open(crop.storage.manifest_path, 'a') as f:
+                f.write('{"id": 2, "num_cas\n')
+            crop.grow([3])
+            assert sorted(crop.storage.result_manifest()) == [3]
+
+
+FLAKY_CALLS = []
+
+
+def flaky_add(a, b, c):
+    FLAKY_CALLS.append(a)
+    if a == c:
+        raise RuntimeError("Interrupted!")
+    return a + b
+
+
+class TestCheckpoints:
+
+    def test_checkpoint_round_trip(self, storage):
+        assert storage.read_checkpoint(1) is None
+        storage.write_checkpoint(1, (1, 2))
+        storage.write_checkpoint(3, (4,))
+        storage.write_checkpoint(1, (1, 2, 3))
+        assert storage.read_checkpoint(1) == (1, 2, 3)
+        assert storage.checkpoint_ids() == (1, 3)
+        storage.delete_checkpoint(1)
+        storage.delete_checkpoint(2)
+        assert storage.read_checkpoint(1) is None
+        assert storage.checkpoint_ids() == (3,)
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_grow_resumes_from_checkpoint(self, storage):
+        combos = [('a', [1, 2, 3, 4, 5, 6]), ('b', [10])]
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=flaky_add, parent_dir=tdir, batchsize=6,
+                        storage=storage)
+            crop.sow_combos(combos, constants={'c': 5})
+
+            FLAKY_CALLS.clear()
+            with pytest.raises(RuntimeError):
+                grow(1, crop=crop, checkpoint_every=2)
+            assert crop.storage.read_checkpoint(1) == (11, 12, 13, 14)
+            assert crop.missing_results() == (1,)
+
+            # resume, computing only the remaining cases
+            FLAKY_CALLS.clear()
+            assert grow(1, crop=crop, fn=foo_add)
+            assert FLAKY_CALLS == []
+            assert crop.storage.checkpoint_ids() == ()
+            assert crop.reap() == ((11,), (12,), (13,), (14,), (15,), (16,))
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_sowing_clears_checkpoints(self, storage):
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=2,
+                        storage=storage)
+            crop.sow_combos([('a', [1, 2]), ('b', [3])],
+                            constants={'c': None})
+            crop.storage.write_checkpoint(1, (4,))
+            crop.sow_combos([('a', [1, 2]), ('b', [3])],
+                            constants={'c': None})
+            assert crop.storage.checkpoint_ids() == ()
+
+
+def slow_add(a, b, c):
+    time.sleep(c)
+    return a + b
+
+
+class TestWorker:
+
+    def test_worker_grows_all_crops(self):
+        with TemporaryDirectory() as tdir:
+            crops = []
+            for name, bs in (('foo', 1), ('bar', 2)):
+                crop = Crop(fn=foo_add, name=name, parent_dir=tdir,
+                            batchsize=bs)
+                crop.sow_combos([('a', [1, 2, 3]), ('b', [4, 5])],
+                                constants={'c': None}, verbosity=0)
+                crops.append(crop)
+            foo, bar = crops
+
+            assert foo.storage.claim(2, owner='another-worker')
+            assert worker(parent_dir=tdir, max_batches=2, verbosity=0) == 2
+            assert worker(parent_dir=tdir, verbosity=0) == 6
+            assert foo.missing_results() == (2,)
+            assert bar.is_ready_to_reap()
+
+            foo.storage.release(2)
+            main(['worker', 'foo', '--parent-dir', tdir, '-j', '2', '-v', '0'])
+            assert foo.reap() == bar.reap() == ((5, 6), (6, 7), (7, 8))
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_workers_balance(self, storage):
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=1,
+                        storage=storage)
+            crop.sow_combos([('a', range(10)), ('b', [4, 5])],
+                            constants={'c': None}, verbosity=0)
+
+            num_grown = []
+
+            def target():
+                num_grown.append(worker('foo_add', tdir, verbosity=0))
+
+            threads = [threading.Thread(target=target) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert sum(num_grown) == 20
+            assert crop.storage.claimed_ids() == ()
+            assert crop.reap() == tuple((a + 4, a + 5) for a in range(10))
+
+    @pytest.mark.parametrize('storage', ['files', 'sqlite'])
+    def test_dead_claims_taken_over(self, storage):
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=slow_add, parent_dir=tdir, batchsize=1,
+                        storage=storage)
+            crop.sow_combos([('a', [1, 2]), ('b', [4])],
+                            constants={'c': 0.4}, verbosity=0)
+
+            # e.g. a job that was killed while growing batch 2
+            assert crop.storage.claim(2, owner='dead-worker')
+            time.sleep(0.2)
+
+            thread = threading.Thread(
+                target=grow, args=(1,),
+                kwargs=dict(crop=crop, claim=True, lease=0.1, verbosity=0))
+            thread.start()
+            try:
+                time.sleep(0.25)
+                # batch 1 is kept alive by its heartbeat
+                assert crop.storage.claimed_ids(lease=0.1) == (1,)
+                assert crop.missing_results(skip_claimed=True,
+                                            lease=0.1) == (2,)
+            finally:
+                thread.join()
+
+            assert worker(crop, lease=0.1, verbosity=0) == 1
+            assert crop.storage.claimed_ids() == ()
+            assert crop.reap() == ((5,), (6,))
+
+
+class TestFileStorageProgress:
+
+    def test_manifest_tracks_progress(self):
+        with TemporaryDirectory() as tdir:
+            store = FileStorage(os.path.join(tdir, '.xyz-foo'))
+            store.prepare()
+            for i in range(1, 5):
+                store.write_batch(i, [{'a': i}])
+            store.write_result(3, (3,))
+            store.write_result(1, (1,))
+
+            assert list(store.progress()) == [0, 3, 1, 3, 1]
+            assert store.num_batches() == 4
+            assert store.result_ids() == (1, 3)
+            assert store.missing_results(5) == (2, 4, 5)
+
+            store.delete_result(3)
+            assert not store.has_result(3)
+            assert store.missing_results(4) == (2, 3, 4)
+
+    def test_rebuild_progress(self):
+        with TemporaryDirectory() as tdir:
+            store = FileStorage(os.path.join(tdir, '.xyz-foo'))
+            store.prepare()
+            for i in range(1, 4):
+                store.write_batch(i, [{'a': i}])
+            store.write_result(2, (2,))
+            expected = bytes(store.progress())
+
+            # e.g. a crop sown before the manifest existed
+            os.remove(store.progress_path)
+            assert store.has_result(2)
+            assert bytes(store.progress()) == expected
+            assert os.path.isfile(store.progress_path)
+
+    def test_rebuild_progress_marked(self):
+        with TemporaryDirectory() as tdir:
+            store = FileStorage(os.path.join(tdir, '.xyz-foo'))
+            store.prepare()
+            store.write_batch(1, [{'a': 1}])
+            store.mark_result(1)
+
+            os.remove(store.progress_path)
+            assert store.has_result(1)
+            store.delete_result(1)
+            os.remove(store.progress_path)
+            assert not store.has_result(1)
+
+    def test_crop_settings_synced_only_when_changed(self, monkeypatch):
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=2)
+            crop.sow_combos([('a', [1, 2, 3]), ('b', [4, 5])],
+                            constants={'c': None})
+            crop.calc_progress()
+
+            loads = []
+            load_info = Crop.load_info
+
+            def counting_load_info(self):
+                loads.append(None)
+                return load_info(self)
+
+            monkeypatch.setattr(Crop, 'load_info', counting_load_info)
+            for _ in range(3):
+                crop.calc_progress()
+            assert not loads
+
+            # settings changed by another process
+            other = Crop(name='foo_add', parent_dir=tdir)
+            other.batchsize = 5
+            other.save_info(**{k: v for k, v in other.load_info().items()
+                               if k in ('combos', 'cases', 'fn_args')})
+            loads.clear()
+            crop.calc_progress()
+            assert len(loads) == 1
+            assert crop.batchsize == 5
+
+
+def write_results_later(storage, batch_ids, delay=0.05):
+    def target():
+        for i in batch_ids:
+            time.sleep(delay)
+            storage.write_result(i, (i,))
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+class TestConsolidate:
+
+    def test_consolidate_file_storage(self):
+        with TemporaryDirectory() as tdir:
+            store = FileStorage(os.path.join(tdir, '.xyz-foo'))
+            store.prepare()
+            for i in range(1, 5):
+                store.write_batch(i, [{'a': i}])
+            store.write_result(1, (1,))
+            store.write_result(2, (np.arange(3.0),), codec='npy')
+            nbytes = store.result_nbytes(2)
+            checksum = store.result_checksum(2)
+
+            assert store.consolidate() == 2
+            assert store.consolidate() == 0
+            assert not os.path.exists(store.result_path(1))
+            assert not os.path.exists(store.batch_path(1))
+            assert os.path.exists(store.batch_path(3))
+
+            assert store.read_result(1) == (1,)
+            assert_array_equal(store.read_result(2, mmap=True)[0],
+                               np.arange(3.0))
+            assert store.read_batch(2) == [{'a': 2}]
+            assert store.result_nbytes(2) == nbytes
+            assert store.result_checksum(2) == checksum
+            assert store.result_ids() == (1, 2)
+
+            # grown after consolidating -> a second archive
+            store.write_result(3, (3,))
+            store = pickle.loads(pickle.dumps(store))
+            assert store.consolidate() == 1
+            assert store.read_result(3) == (3,)
+            assert store.read_batch(3) == [{'a': 3}]
+
+            # regrown results take precedence
+            store.write_result(1, (10,))
+            assert store.read_result(1) == (10,)
+
+            expected = bytes(store.progress())
+            os.remove(store.progress_path)
+            assert bytes(store.progress()) == expected
+
+            store.delete_result(2)
+            assert store.missing_results(4) == (2, 4)
+            with pytest.raises(FileNotFoundError):
+                store.delete_result(4)
+            store.close()
+
+    def test_consolidate_sqlite(self):
+        with TemporaryDirectory() as tdir:
+            store = SQLiteStorage(os.path.join(tdir, '.xyz-foo'))
+            store.prepare()
+            store.write_batch(1, [{'a': 1}])
+            store.write_result(1, (1,))
+            assert store.consolidate() == 0
+            assert store.read_result(1) == (1,)
+            store.close()
+
+    def test_crop_consolidate(self):
+        combos = [('a', [1, 2, 3]), ('b', [4, 5])]
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=array_add, parent_dir=tdir, batchsize=2)
+            crop.sow_combos(combos, constants={'c': None})
+            crop.grow((1, 2))
+            assert crop.consolidate() == 2
+
+            assert crop.missing_results() == (3,)
+            crop.grow_missing()
+            main(['consolidate', crop.name, '--parent-dir', tdir, '-v', '0'])
+            assert not os.listdir(os.path.join(crop.location, 'results'))
+
+            assert crop.check_bad(checksum=True) == ()
+            results = crop.reap()
+
+        assert_array_equal(results[2][1], np.arange(3.0) + 8)
+
+
+class TestWaitingForResults:
+
+    @pytest.mark.skipif(not sys.platform.startswith('linux'),
+                        reason="inotify is linux only.")
+    def test_inotify(self):
+        with TemporaryDirectory() as tdir:
+            with Inotify(tdir) as watcher:
+                assert watcher.wait(0.01) == []
+                with open(os.path.join(tdir, 'foo.txt'), 'w') as f:
+                    f.write('bar')
+                assert 'foo.txt' in watcher.wait(1.0)
+
+    @pytest.mark.parametrize('watch', [True, False])
+    def test_iter_results_arrival_order(self, storage, watch, monkeypatch):
+        if not watch:
+            monkeypatch.setattr(type(storage), 'watch', lambda self: None)
+
+        storage.write_result(2, (2,))
+        thread = write_results_later(storage, [4, 1, 3])
+        try:
+            arrived = list(storage.iter_results([1, 2, 3, 4], max_delay=0.05))
+        finally:
+            thread.join()
+        assert arrived == [2, 4, 1, 3]
+
+    def test_iter_results_timeout(self, storage):
+        storage.write_result(1, (1,))
+        with pytest.raises(TimeoutError):
+            list(storage.iter_results([1, 2], timeout=0.1))
+
+    @pytest.mark.parametrize('storage_name', ['files', 'sqlite'])
+    def test_reap_wait(self, storage_name):
+        combos = [('a', [1, 2, 3]), ('b', [4, 5])]
+        with TemporaryDirectory() as tdir:
+            crop = Crop(fn=foo_add, parent_dir=tdir, batchsize=2,
+                        storage=storage_name)
+            crop.sow_combos(combos, constants={'c': None})
+
+            def grow_reversed():
+                for i in (3, 2, 1):
+                    time.sleep(0.05)
+                    grow(i, crop=crop, verbosity=0)
+
+            thread = threading.Thread(target=grow_reversed)
+            thread.start()
+            try:
+                results = crop.reap(wait=True)
+            finally:
+                thread.join()
+
+        assert results == ((5, 6), (6, 7), (7, 8))
@@ -9,6 +9,7 @@ from xyzpy.manage import (
     load_ds,
     save_ds,
     save_merge_ds,
+    append_merge_zarr,
 )
 
 
@@ -121,3 +122,20 @@ class TestSaveAndLoad:
             save_merge_ds(ds3, fname, overwrite=True)
             exp = ds3.combine_first(xr.merge([ds1, ds2]))
             assert load_ds(fname).identical(exp)
+
+    def test_append_merge_zarr(self, ds1, ds2, ds3):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "test.zarr")
+            append_merge_zarr(ds1, fname)
+            append_merge_zarr(ds2, fname)
+            with raises(xr.MergeError):
+                append_merge_zarr(ds3, fname)
+            append_merge_zarr(ds3, fname, overwrite=True)
+            exp = ds3.combine_first(xr.merge([ds1, ds2]))
+            ds = load_ds(fname, engine='zarr')
+            # new values are appended rather than sorted
+            assert list(ds['b'].values) == ['l1', 'l2', 'l4', 'l3', 'l5']
+            assert ds.sortby(['a', 'b']).equals(exp)
+            # the variables must match
+            with raises(ValueError):
+                append_merge_zarr(ds1.drop_vars('isodd'), fname)
@@ -1,6 +1,7 @@
 """
 """
 import functools
+import importlib
 import xarray as xr
 
 from .utils import (
@@ -30,6 +31,10 @@ from .gen.cropping import (
     Crop,
     grow,
     load_crops,
+    worker,
+)
+from .gen.coordinator import (
+    CropServer,
 )
 from .gen.farming import (
     Runner,
@@ -42,6 +47,7 @@ from .manage import (
     save_ds,
     load_ds,
     save_merge_ds,
+    append_merge_zarr,
     save_df,
     load_df,
     trimna,
@@ -51,40 +57,59 @@ from .manage import (
     merge_sync_conflict_datasets,
     post_fix,
 )
-from .plot.color import (
-    convert_colors,
-    cimple,
-    cimple_bright,
-)
-# Making static plots with matplotlib
-from .plot.plotter_matplotlib import (
-    LinePlot,
-    lineplot,
-    AutoLinePlot,
-    auto_lineplot,
-    Scatter,
-    scatter,
-    AutoScatter,
-    auto_scatter,
-    Histogram,
-    histogram,
-    AutoHistogram,
-    auto_histogram,
-    HeatMap,
-    heatmap,
-    AutoHeatMap,
-    auto_heatmap,
-    visualize_matrix
-)
-# Making interactive plots with bokeh
-from .plot.plotter_bokeh import (
-    ilineplot,
-    auto_ilineplot,
-    iscatter,
-    auto_iscatter,
-    iheatmap,
-    auto_iheatmap,
-)
+
+# The plotting functions are only imported, along with matplotlib or bokeh,
+#     when first accessed, which keeps e.g. ``python -m xyzpy grow`` quick
+_LAZY_PLOT_MODULES = {
+    'color': (
+        'convert_colors',
+        'cimple',
+        'cimple_bright',
+    ),
+    # Making static plots with matplotlib
+    'plotter_matplotlib': (
+        'LinePlot',
+        'lineplot',
+        'AutoLinePlot',
+        'auto_lineplot',
+        'Scatter',
+        'scatter',
+        'AutoScatter',
+        'auto_scatter',
+        'Histogram',
+        'histogram',
+        'AutoHistogram',
+        'auto_histogram',
+        'HeatMap',
+        'heatmap',
+        'AutoHeatMap',
+        'auto_heatmap',
+        'visualize_matrix',
+    ),
+    # Making interactive plots with bokeh
+    'plotter_bokeh': (
+        'ilineplot',
+        'auto_ilineplot',
+        'iscatter',
+        'auto_iscatter',
+        'iheatmap',
+        'auto_iheatmap',
+    ),
+}
+_LAZY_PLOT_NAMES = {name: module
+                    for module, names in _LAZY_PLOT_MODULES.items()
+                    for name in names}
+
+
+def __getattr__(name):
+    try:
+        module = _LAZY_PLOT_NAMES[name]
+    except KeyError:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+    obj = getattr(importlib.import_module(f".plot.{module}", __name__), name)
+    globals()[name] = obj
+    return obj
 
 
 # versioneer
@@ -108,10 +133,13 @@ __all__ = [
     "Crop",
     "grow",
     "load_crops",
+    "worker",
+    "CropServer",
     "cache_to_disk",
     "save_ds",
     "load_ds",
     "save_merge_ds",
+    "append_merge_zarr",
     "save_df",
     "load_df",
     "trimna",
@@ -164,49 +192,52 @@ class XYZPY(object):
 
     # ------------------------------- Plotting ------------------------------ #
 
-    @functools.wraps(LinePlot)
+    def _plot(self, name, *args, **kwargs):
+        return __getattr__(name)(self._obj, *args, **kwargs)
+
     def LinePlot(self, *args, **kwargs):
-        return LinePlot(self._obj, *args, **kwargs)
+        """See :class:`xyzpy.LinePlot`."""
+        return self._plot('LinePlot', *args, **kwargs)
 
-    @functools.wraps(lineplot)
     def lineplot(self, *args, **kwargs):
-        return lineplot(self._obj, *args, **kwargs)
+        """See :func:`xyzpy.lineplot`."""
+        return self._plot('lineplot', *args, **kwargs)
 
-    @functools.wraps(Scatter)
     def Scatter(self, *args, **kwargs):
-        return Scatter(self._obj, *args, **kwargs)
+        """See :class:`xyzpy.Scatter`."""
+        return self._plot('Scatter', *args, **kwargs)
 
-    @functools.wraps(scatter)
     def scatter(self, *args, **kwargs):
-        return scatter(self._obj, *args, **kwargs)
+        """See :func:`xyzpy.scatter`."""
+        return self._plot('scatter', *args, **kwargs)
 
-    @functools.wraps(Histogram)
     def Histogram(self, *args, **kwargs):
-        return Histogram(self._obj, *args, **kwargs)
+        """See :class:`xyzpy.Histogram`."""
+        return self._plot('Histogram', *args, **kwargs)
 
-    @functools.wraps(histogram)
     def histogram(self, *args, **kwargs):
-        return histogram(self._obj, *args, **kwargs)
+        """See :func:`xyzpy.histogram`."""
+        return self._plot('histogram', *args, **kwargs)
 
-    @functools.wraps(HeatMap)
     def HeatMap(self, *args, **kwargs):
-        return HeatMap(self._obj, *args, **kwargs)
+        """See :class:`xyzpy.HeatMap`."""
+        return self._plot('HeatMap', *args, **kwargs)
 
-    @functools.wraps(heatmap)
     def heatmap(self, *args, **kwargs):
-        return heatmap(self._obj, *args, **kwargs)
+        """See :func:`xyzpy.heatmap`."""
+        return self._plot('heatmap', *args, **kwargs)
 
-    @functools.wraps(ilineplot)
     def ilineplot(self, *args, **kwargs):
-        return ilineplot(self._obj, *args, **kwargs)
+        """See :func:`xyzpy.ilineplot`."""
+        return self._plot('ilineplot', *args, **kwargs)
 
-    @functools.wraps(iscatter)
     def iscatter(self, *args, **kwargs):
-        return iscatter(self._obj, *args, **kwargs)
+        """See :func:`xyzpy.iscatter`."""
+        return self._plot('iscatter', *args, **kwargs)
 
-    @functools.wraps(iheatmap)
     def iheatmap(self, *args, **kwargs):
-        return iheatmap(self._obj, *args, **kwargs)
+        """See :func:`xyzpy.iheatmap`."""
+        return self._plot('iheatmap', *args, **kwargs)
 
     # ----------------------------- Processing ------------------------------ #
 
@@ -0,0 +1,301 @@
+"""Command line interface to ``xyzpy``, e.g.::
+
+    python -m xyzpy worker --parent-dir path/to/crops
+    python -m xyzpy grow my_crop --parent-dir path/to/crops --batches 1-100
+
+Or, without a shared filesystem, with the secret ``XYZPY_AUTHKEY`` set::
+
+    python -m xyzpy serve my_crop --parent-dir path/to/crops --address :5000
+    python -m xyzpy worker --connect server-host:5000
+
+"""
+import argparse
+
+from .gen.cropping import (
+    Crop,
+    grow,
+    worker,
+    parse_batch_ids,
+    format_batch_ids,
+    _parse_worker_crops,
+)
+from .gen.farming import Harvester, Sampler
+from .gen.storage import DEFAULT_LEASE
+
+
+def _load_crop(args):
+    crop = Crop(name=args.crop, parent_dir=args.parent_dir)
+    if not crop.is_prepared():
+        raise SystemExit(f"xyzpy: no sown crop found at {crop.location}.")
+    return crop
+
+
+def _worker(args):
+    if args.connect and ((args.checkpoint_interval is not None) or
+                         (args.lease != DEFAULT_LEASE)):
+        raise SystemExit("xyzpy: --checkpoint-interval and --lease can't be "
+                         "used with --connect, the server sets the lease.")
+
+    worker(
+        crops=args.crops or None,
+        parent_dir=args.parent_dir,
+        max_batches=args.max_batches,
+        wait=args.wait,
+        poll_interval=args.poll_interval,
+        max_idle=args.max_idle,
+        lease=args.lease,
+        num_workers=args.num_workers,
+        checkpoint_interval=args.checkpoint_interval,
+        connect=args.connect,
+        verbosity=args.verbosity,
+    )
+
+
+def _serve(args):
+    from .gen.coordinator import CropServer
+
+    server = CropServer(args.crops or None, args.parent_dir,
+                        address=args.address, lease=args.lease)
+    if args.verbosity >= 1:
+        print(f"xyzpy: serving on {server.address}", flush=True)
+    server.serve_forever(until_finished=not args.keep_serving)
+
+
+def _grow(args):
+    if args.setup:
+        exec(args.setup, {'__name__': '__xyzpy_setup__'})
+
+    if (args.task_id is not None) and (args.batches is None):
+        # each task would see a different set of missing batches
+        raise SystemExit("xyzpy: --task-id requires --batches, so that every "
+                         "task splits the same list of batches.")
+
+    crop = _load_crop(args)
+
+    if args.batches is None:
+        batch_ids = crop.missing_results()
+    else:
+        batch_ids = parse_batch_ids(args.batches)
+
+    if args.task_id is not None:
+        start = (args.task_id - 1) * args.batches_per_task
+        batch_ids = batch_ids[start:start + args.batches_per_task]
+
+    for batch_id in batch_ids:
+        grow(batch_id, crop=crop, claim=args.claim, lease=args.lease,
+             num_workers=args.num_workers,
+             checkpoint_interval=args.checkpoint_interval,
+             debugging=args.debugging, verbosity=args.verbosity)
+
+
+def _reap(args):
+    crop = _load_crop(args)
+    opts = {'wait': args.wait, 'allow_incomplete': args.allow_incomplete}
+    if args.keep:
+        opts['clean_up'] = False
+
+    if args.output is not None:
+        crop.reap_to_disk(args.output, engine=args.engine,
+                          verbosity=args.verbosity, **opts)
+    elif (crop.zarr_store is not None) or \
+            isinstance(crop.farmer, (Harvester, Sampler)):
+        crop.reap(**opts)
+    else:
+        raise SystemExit(f"xyzpy: crop '{crop.name}' has no harvester or "
+                         "sampler to reap into, specify --output.")
+
+
+def _status(args):
+    for crop in _parse_worker_crops(args.crops or None, args.parent_dir):
+        print(crop)
+        num_claimed = len(crop.storage.claimed_ids(lease=args.lease))
+        if num_claimed:
+            print(f"{num_claimed} batches being grown")
+
+
+def _missing(args):
+    crop = _load_crop(args)
+    print(format_batch_ids(crop.missing_results(
+        skip_claimed=args.skip_claimed, lease=args.lease)))
+
+
+def _consolidate(args):
+    crop = _load_crop(args)
+    num_consolidated = crop.consolidate()
+    if args.verbosity >= 1:
+        print(f"Consolidated {num_consolidated} results of {crop.name}.")
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='xyzpy', description="Grow and manage xyzpy crops.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    wrk = commands.add_parser(
+        'worker',
+        help="Repeatedly claim and grow unclaimed batches of crops.",
+        description="Repeatedly claim and grow the next unclaimed batch of "
+                    "one or more crops, until there are none left. Any "
+                    "number of workers sharing a filesystem can be run.")
+    wrk.add_argument('crops', nargs='*',
+                     help="Names of the crops to grow, defaults to all crops "
+                          "found in the parent directory.")
+    wrk.add_argument('-d', '--parent-dir', default=None,
+                     help="Directory containing the crops.")
+    wrk.add_argument('-n', '--max-batches', type=int, default=None,
+                     help="Stop after growing this many batches.")
+    wrk.add_argument('-w', '--wait', action='store_true',
+                     help="Keep polling for new work once there is none.")
+    wrk.add_argument('--poll-interval', type=float, default=5.0,
+                     help="Seconds to sleep between polls with --wait.")
+    wrk.add_argument('--max-idle', type=float, default=None,
+                     help="With --wait, stop after this many seconds "
+                          "without growing a batch.")
+    wrk.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                     help="Take over claims of other workers not refreshed "
+                          "for this many seconds.")
+    wrk.add_argument('-j', '--num-workers', type=int, default=None,
+                     help="Grow the cases of each batch with a local pool "
+                          "of this many processes.")
+    wrk.add_argument('--checkpoint-interval', type=float, default=None,
+                     help="Checkpoint each batch at most every this many "
+                          "seconds, so that growing it can be resumed.")
+    wrk.add_argument('-c', '--connect', default=None, metavar='HOST:PORT',
+                     help="Get batches from the 'xyzpy serve' process at "
+                          "this address instead of the filesystem, "
+                          "authenticating with XYZPY_AUTHKEY.")
+    wrk.add_argument('-v', '--verbosity', type=int, default=1)
+    wrk.set_defaults(run=_worker)
+
+    srv = commands.add_parser(
+        'serve',
+        help="Serve batches of crops to workers over the network.",
+        description="Serve the batches of one or more crops to workers "
+                    "started with 'xyzpy worker --connect', which need no "
+                    "access to the crops' directory. The secret the "
+                    "workers need is read from XYZPY_AUTHKEY.")
+    srv.add_argument('crops', nargs='*',
+                     help="Names of the crops to serve, defaults to all "
+                          "crops found in the parent directory.")
+    srv.add_argument('-d', '--parent-dir', default=None,
+                     help="Directory containing the crops.")
+    srv.add_argument('-a', '--address', default=':0', metavar='HOST:PORT',
+                     help="Where to listen, defaults to every interface and "
+                          "a free port.")
+    srv.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                     help="Take over claims of workers without a heartbeat "
+                          "for this many seconds.")
+    srv.add_argument('--keep-serving', action='store_true',
+                     help="Keep serving once every batch has been grown.")
+    srv.add_argument('-v', '--verbosity', type=int, default=1)
+    srv.set_defaults(run=_serve)
+
+    grw = commands.add_parser(
+        'grow',
+        help="Grow specific batches of a crop.",
+        description="Grow specific batches of a crop, e.g. from a task of a "
+                    "cluster job array.")
+    grw.add_argument('crop', help="Name of the crop to grow.")
+    grw.add_argument('-d', '--parent-dir', default=None,
+                     help="Directory containing the crop.")
+    grw.add_argument('-b', '--batches', default=None,
+                     help="Which batches to grow, e.g. '1-3,5,7-8', defaults "
+                          "to all missing batches.")
+    grw.add_argument('--task-id', type=int, default=None,
+                     help="Only grow the batches of this task (counting "
+                          "from 1), when the --batches given are split into "
+                          "tasks of --batches-per-task each.")
+    grw.add_argument('--batches-per-task', type=int, default=1,
+                     help="How many batches each task grows.")
+    grw.add_argument('--claim', action='store_true',
+                     help="Claim each batch first, skipping it if already "
+                          "claimed by another live process.")
+    grw.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                     help="Take over claims not refreshed for this many "
+                          "seconds.")
+    grw.add_argument('-j', '--num-workers', type=int, default=None,
+                     help="Grow the cases of each batch with a local pool "
+                          "of this many processes.")
+    grw.add_argument('--checkpoint-interval', type=float, default=None,
+                     help="Checkpoint each batch at most every this many "
+                          "seconds, so that growing it can be resumed.")
+    grw.add_argument('--setup', default=None,
+                     help="Python code to run before growing, e.g. imports "
+                          "with side-effects.")
+    grw.add_argument('--debugging', action='store_true',
+                     help="Set the python log level to debugging.")
+    grw.add_argument('-v', '--verbosity', type=int, default=2)
+    grw.set_defaults(run=_grow)
+
+    rp = commands.add_parser(
+        'reap',
+        help="Reap the results of a crop.",
+        description="Reap the results of a crop, either into its harvester "
+                    "or sampler, or straight into a dataset on disk.")
+    rp.add_argument('crop', help="Name of the crop to reap.")
+    rp.add_argument('-d', '--parent-dir', default=None,
+                    help="Directory containing the crop.")
+    rp.add_argument('-o', '--output', default=None,
+                    help="Reap into a dataset written to this file.")
+    rp.add_argument('--engine', default='zarr',
+                    help="Format of the --output dataset.")
+    rp.add_argument('-w', '--wait', action='store_true',
+                    help="Wait for any missing results.")
+    rp.add_argument('--allow-incomplete', action='store_true',
+                    help="Reap even if results are missing.")
+    rp.add_argument('--keep', action='store_true',
+                    help="Don't delete the crop once it has been reaped.")
+    rp.add_argument('-v', '--verbosity', type=int, default=1)
+    rp.set_defaults(run=_reap)
+
+    st = commands.add_parser(
+        'status',
+        help="Show the progress of crops.",
+        description="Show the progress of one or more crops.")
+    st.add_argument('crops', nargs='*',
+                    help="Names of the crops, defaults to all crops found in "
+                         "the parent directory.")
+    st.add_argument('-d', '--parent-dir', default=None,
+                    help="Directory containing the crops.")
+    st.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                    help="Only count claims refreshed within this many "
+                         "seconds as being grown.")
+    st.set_defaults(run=_status)
+
+    ms = commands.add_parser(
+        'missing',
+        help="Print the ids of the missing batches of a crop.",
+        description="Print the ids of the missing batches of a crop, in the "
+                    "form accepted by 'xyzpy grow --batches'.")
+    ms.add_argument('crop', help="Name of the crop.")
+    ms.add_argument('-d', '--parent-dir', default=None,
+                    help="Directory containing the crop.")
+    ms.add_argument('--skip-claimed', action='store_true',
+                    help="Leave out batches being grown by live processes.")
+    ms.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                    help="Take claims not refreshed for this many seconds "
+                         "to be dead.")
+    ms.set_defaults(run=_missing)
+
+    cns = commands.add_parser(
+        'consolidate',
+        help="Fold the finished results of a crop into a single archive.",
+        description="Fold the separate files of the finished results of a "
+                    "crop, and their batches, into a single archive, e.g. to "
+                    "save inodes. This can be run while the crop grows.")
+    cns.add_argument('crop', help="Name of the crop.")
+    cns.add_argument('-d', '--parent-dir', default=None,
+                     help="Directory containing the crop.")
+    cns.add_argument('-v', '--verbosity', type=int, default=1)
+    cns.set_defaults(run=_consolidate)
+
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
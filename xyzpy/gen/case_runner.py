@@ -111,6 +111,7 @@ def case_runner_to_ds(
     attrs=None,
     shuffle=False,
     to_df=False,
+    arrow=False,
     parse=True,
     parallel=False,
     num_workers=None,
@@ -151,6 +152,12 @@ def case_runner_to_ds(
         If given, compute the results in a random order (using ``random.seed``
         and ``random.shuffle``), which can be helpful for distributing
         resources when not all cases are computationally equal.
+    to_df : bool, optional
+        Whether to output a table with a row for each case rather than a
+        dataset.
+    arrow : bool, optional
+        If ``to_df=True``, output a ``pyarrow.Table`` rather than a
+        ``pandas.DataFrame``.
     parse : bool, optional
         Whether to perform parsing of the inputs arguments.
     parallel : bool, optional
@@ -198,6 +205,7 @@ def case_runner_to_ds(
         attrs=attrs,
         shuffle=shuffle,
         to_df=to_df,
+        arrow=arrow,
         parallel=parallel,
         num_workers=num_workers,
         executor=executor,
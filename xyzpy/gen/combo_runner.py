@@ -8,7 +8,7 @@ import numpy as np
 import xarray as xr
 from joblib.externals import loky
 
-from ..utils import progbar
+from ..utils import progbar, flatten, prod
 from .prepare import (
     parse_var_names,
     parse_var_dims,
@@ -119,6 +119,7 @@ def _run_linear_executor(
     fn,
     settings,
     verbosity=1,
+    callback=None,
 ):
     with progbar(total=len(settings), disable=verbosity <= 0) as pbar:
         if verbosity >= 2:
@@ -129,21 +130,45 @@ def _run_linear_executor(
             if verbosity >= 2:
                 pbar.set_description(str(kws))
             results_linear.append(_get_result(future))
+            if callback is not None:
+                callback(results_linear)
             pbar.update()
         return results_linear
 
 
-def _run_linear_sequential(fn, settings, verbosity=1):
+def _run_linear_sequential(fn, settings, verbosity=1, callback=None):
     results_linear = []
     with progbar(total=len(settings), disable=verbosity <= 0) as pbar:
         for kws in settings:
             if verbosity >= 2:
                 pbar.set_description(str(kws))
             results_linear.append(fn(**kws))
+            if callback is not None:
+                callback(results_linear)
             pbar.update()
         return results_linear
 
 
+def _run_linear(fn, settings, verbosity=1, parallel=False, num_workers=None,
+                executor=None, callback=None):
+    """Evaluate ``fn(**kws)`` for each ``kws`` in ``settings``, in order,
+    optionally in parallel. If given, ``callback`` is called with the list of
+    results so far each time the next result, in order, is gathered.
+    """
+    run_linear_opts = {'fn': fn, 'settings': settings, 'verbosity': verbosity,
+                       'callback': callback}
+
+    if executor is not None:
+        # custom pool supplied
+        return _run_linear_executor(executor, **run_linear_opts)
+    elif parallel or num_workers:
+        # else for parallel, by default use a process pool-exceutor
+        executor = loky.get_reusable_executor(num_workers)
+        return _run_linear_executor(executor, **run_linear_opts)
+    else:
+        return _run_linear_sequential(**run_linear_opts)
+
+
 def _unflatten(store, all_combo_values, all_nan=None):
     # non-recursive nested accumulation of results into tuple array
     while all_combo_values:
@@ -218,17 +243,9 @@ def combo_runner_core(
         random.shuffle(enum_settings)
         enum, settings = zip(*enum_settings)
 
-    run_linear_opts = {'fn': fn, 'settings': settings, 'verbosity': verbosity}
-
-    if executor is not None:
-        # custom pool supplied
-        results_linear = _run_linear_executor(executor, **run_linear_opts)
-    elif parallel or num_workers:
-        # else for parallel, by default use a process pool-exceutor
-        executor = loky.get_reusable_executor(num_workers)
-        results_linear = _run_linear_executor(executor, **run_linear_opts)
-    else:
-        results_linear = _run_linear_sequential(**run_linear_opts)
+    results_linear = _run_linear(fn, settings, verbosity=verbosity,
+                                 parallel=parallel, num_workers=num_workers,
+                                 executor=executor)
 
     if shuffle:
         enum_results = sorted(zip(enum, results_linear), key=lambda x: x[0])
@@ -435,6 +452,116 @@ def multi_concat(results, dims):
         )
 
 
+def _stacked_dtype(dtypes):
+    """Find the single dtype that a collection of array dtypes can be stacked
+    into without changing values, or ``None`` if that would require the more
+    involved type promotion that ``xarray.concat`` performs.
+    """
+    dtypes = set(dtypes)
+    if len(dtypes) == 1:
+        return dtypes.pop()
+    if all(dtype.kind in 'iufc' for dtype in dtypes):
+        # e.g. int results mixed with float nan placeholders
+        return np.result_type(*dtypes)
+    return None
+
+
+def infer_shape_xobjs(results, ndim):
+    """Find the shape of the first ``ndim`` levels of the nested sequence
+    ``results``, treating any xarray objects as scalars.
+    """
+    shape = ()
+    for _ in range(ndim):
+        shape += (len(results),)
+        results = results[0]
+    return shape
+
+
+def _same_coord(v1, v2):
+    """Quick check that two coordinate variables are identical, cheaper than
+    ``xarray.Variable.identical`` for the many small coordinates here.
+    """
+    return (
+        (v1.dims == v2.dims) and
+        (v1.attrs == v2.attrs) and
+        np.array_equal(v1.values, v2.values)
+    )
+
+
+def multi_stack(results, dims):
+    """Stack a nested list of identically structured xarray objects along
+    several new outer dimensions at once, by copying each underlying array
+    into a single preallocated buffer per variable. This avoids the repeated
+    alignment and copying of calling ``xarray.concat`` at every nesting level.
+
+    Parameters
+    ----------
+    results : nested sequence of xarray.Dataset or xarray.DataArray
+        The objects to stack, nested ``len(dims)`` deep.
+    dims : tuple[str]
+        The names of the new dimensions, outermost first.
+
+    Returns
+    -------
+    xarray.Dataset, xarray.DataArray or None
+        The stacked object, or ``None`` if the objects don't all share the same
+        type, variables, dimensions and coordinates, in which case
+        :func:`multi_concat` should be used instead.
+    """
+    shape = infer_shape_xobjs(results, len(dims))
+    flat = tuple(flatten(results, len(dims)))
+    first = flat[0]
+
+    if isinstance(first, xr.DataArray):
+        if not all(isinstance(x, xr.DataArray) for x in flat):
+            return None
+        variables = {None: [x.variable for x in flat]}
+    elif isinstance(first, xr.Dataset):
+        if not all(isinstance(x, xr.Dataset) and
+                   (x.data_vars.keys() == first.data_vars.keys())
+                   for x in flat):
+            return None
+        variables = {name: [x.variables[name] for x in flat]
+                     for name in first.data_vars}
+    else:
+        return None
+
+    # check the coordinates of every result match the first
+    coords0 = first.coords.variables
+    for x in flat[1:]:
+        coords = x.coords.variables
+        if coords.keys() != coords0.keys():
+            return None
+        if not all(_same_coord(coords[k], v) for k, v in coords0.items()):
+            return None
+
+    stacked = {}
+    for name, vs in variables.items():
+        v0 = vs[0]
+        if any((v.dims != v0.dims) or (v.shape != v0.shape) for v in vs):
+            return None
+
+        dtype = _stacked_dtype(v.dtype for v in vs)
+        if dtype is None:
+            return None
+
+        # preallocate the full output then fill it in flat order
+        data = np.empty((len(vs),) + v0.shape, dtype=dtype)
+        for i, v in enumerate(vs):
+            data[i] = v.values
+
+        stacked[name] = xr.Variable(dims + v0.dims,
+                                    data.reshape(shape + v0.shape),
+                                    attrs=v0.attrs)
+
+    if isinstance(first, xr.DataArray):
+        return xr.DataArray(stacked[None], coords=first.coords,
+                            name=first.name, attrs=first.attrs)
+
+    return xr.Dataset(data_vars=stacked, coords=first.coords,
+                      attrs=first.attrs)
+
+
 def get_ndim_first(x, ndim):
     """Return the first element from the ndim-nested list x.
     """
@@ -466,8 +593,11 @@ def results_to_ds(
     )
 
     if xobj_results:
-        # concat them all together, no var_names needed
-        ds = multi_concat(results[0], fn_args)
+        # stack them all together, no var_names needed, only falling back
+        #     to the slower concat if the objects are heterogeneous
+        ds = multi_stack(results[0], fn_args)
+        if ds is None:
+            ds = multi_concat(results[0], fn_args)
         # Set dataset coordinates
         for fn_arg, vals in combos:
             ds[fn_arg] = vals
@@ -497,39 +627,169 @@ def results_to_ds(
     return ds
 
 
+def _factorize(values):
+    """Find the unique values in ``values`` (in order of appearance) and the
+    integer code of each value into these, falling back to treating every
+    value as unique if they are not hashable.
+    """
+    values = list(values)
+    lookup = {}
+    try:
+        # include the type so that e.g. ``True`` and ``1`` aren't merged
+        codes = [lookup.setdefault((type(v), v), len(lookup)) for v in values]
+    except TypeError:
+        return values, np.arange(len(values))
+    return [v for _, v in lookup], np.asarray(codes, dtype=np.intp)
+
+
+def _column_from_codes(values, codes, arrow=False, categorical=True):
+    """Build a single table column by indexing the unique ``values`` with the
+    integer array ``codes``. Repeated strings are stored as a categorical
+    (or dictionary array), unless ``categorical=False``, everything else as a
+    numpy array.
+    """
+    values = list(values)
+
+    if (categorical and (len(values) < len(codes)) and
+            all(isinstance(v, str) for v in values)):
+        if arrow:
+            import pyarrow as pa
+            return pa.DictionaryArray.from_arrays(
+                pa.array(codes.astype(np.int32)), pa.array(values))
+
+        import pandas as pd
+        return pd.Categorical.from_codes(codes, categories=values)
+
+    # let pandas infer a sensible dtype from the few unique values only
+    import pandas as pd
+    column = pd.Series(values, dtype=object).infer_objects().to_numpy()
+    column = column.take(codes)
+
+    if arrow:
+        import pyarrow as pa
+        try:
+            # zero-copy for numeric data
+            return pa.array(column)
+        except (pa.ArrowInvalid, pa.ArrowTypeError,
+                pa.ArrowNotImplementedError):
+            return pa.array(column.tolist())
+
+    return column
+
+
+def _output_columns(results_linear, var_names):
+    """Split the flat sequence of function outputs into a list per variable.
+    """
+    columns = [[] for _ in var_names]
+
+    for result in results_linear:
+        if isinstance(result, (str, bytes)):
+            result = (result,)
+        try:
+            values = tuple(zip(var_names, result))
+        except TypeError:
+            values = ((var_names[0], result),)
+
+        for i, column in enumerate(columns):
+            column.append(values[i][1] if i < len(values) else np.nan)
+
+    return dict(zip(var_names, columns))
+
+
 def results_to_df(
     results_linear,
-    settings,
+    combos,
+    cases,
+    constants,
     attrs,
     resources,
     var_names,
+    arrow=False,
 ):
-    """Convert the output of combo_runner into a :class:`pandas.DataFrame`.
+    """Convert the output of combo_runner into a :class:`pandas.DataFrame`,
+    or optionally a :class:`pyarrow.Table`. The table is built column-wise
+    directly from the ``combos`` and ``cases`` rather than row by row.
+
+    Parameters
+    ----------
+    results_linear : sequence
+        The flat results, in the same order as ``combo_runner_core`` generates
+        the cases, i.e. for each case, every combination of the combos.
+    combos : tuple[tuple[str, sequence]]
+        The parsed combos.
+    cases : tuple[dict]
+        The parsed cases.
+    constants : mapping
+        Constant arguments, recorded as a column each.
+    attrs : mapping
+        Extra attributes, also recorded as a column each.
+    resources : mapping
+        Constant arguments that should not be recorded.
+    var_names : tuple[str]
+        The names of the output variables.
+    arrow : bool, optional
+        Whether to return a ``pyarrow.Table`` rather than a dataframe.
+
+    Returns
+    -------
+    pandas.DataFrame or pyarrow.Table
     """
-    import pandas as pd
+    combos = combos or ()
+    combo_args = tuple(arg for arg, _ in combos)
+    combo_values = tuple(values for _, values in combos)
+
+    if cases:
+        case_args = tuple(cases[0].keys())
+    else:
+        # single empty case and everything is in the combos
+        case_args, cases = (), ({},)
 
-    # construct as list of single dict entries
-    data = []
-    for row, result in zip(settings, results_linear):
-        # don't record resources
-        for k in resources:
-            row.pop(k, None)
+    # the results form a C-ordered grid of shape (cases, *combos)
+    shape = (len(cases),) + tuple(len(v) for v in combo_values)
+    n = prod(shape)
 
-        # add in the attrs, note this isn't quite equivalent to dataset case,
-        # as we add the attributes for every entry -> limitation of dataframe
-        if attrs:
-            row.update(attrs)
+    def grid_codes(codes, axis):
+        # broadcast the codes along ``axis`` of the full grid then flatten
+        new_shape = [1] * len(shape)
+        new_shape[axis] = -1
+        return np.broadcast_to(codes.reshape(new_shape), shape).ravel()
 
-        # add in the output variables
-        try:
-            row.update(dict(zip(var_names, result)))
-        except TypeError:
-            row.update(dict(zip(var_names, [result])))
+    # note columns are built in the same order as keys in each settings dict
+    columns = {}
 
-        data.append(row)
+    for arg in case_args:
+        values, codes = _factorize(case[arg] for case in cases)
+        columns[arg] = _column_from_codes(
+            values, grid_codes(codes, 0), arrow=arrow)
+
+    for i, (arg, values) in enumerate(zip(combo_args, combo_values)):
+        codes = grid_codes(np.arange(len(values)), i + 1)
+        columns[arg] = _column_from_codes(values, codes, arrow=arrow)
+
+    # don't record resources
+    resources = dict(resources or {})
+    constants = {**resources, **dict(constants or {})}
+    constants = {k: v for k, v in constants.items() if k not in resources}
+
+    # add in the attrs, note this isn't quite equivalent to dataset case,
+    # as we add the attributes for every entry -> limitation of dataframe,
+    # these single values are kept as plain (object) columns
+    for k, v in {**constants, **dict(attrs or {})}.items():
+        columns[k] = _column_from_codes(
+            (v,), np.zeros(n, dtype=np.intp), arrow=arrow, categorical=False)
+
+    # add in the output variables
+    columns.update(_output_columns(results_linear, var_names))
+
+    if arrow:
+        import pyarrow as pa
+        return pa.table({
+            k: v if isinstance(v, (pa.Array, pa.ChunkedArray)) else pa.array(v)
+            for k, v in columns.items()
+        })
 
-    # convert to dataframe
-    return pd.DataFrame(data)
+    import pandas as pd
+    return pd.DataFrame(columns)
 
 
 def combo_runner_to_ds(
@@ -546,6 +806,7 @@ def combo_runner_to_ds(
     shuffle=False,
     parse=True,
     to_df=False,
+    arrow=False,
     parallel=False,
     num_workers=None,
     executor=None,
@@ -579,6 +840,13 @@ def combo_runner_to_ds(
         Like `constants` but they will not be recorded.
     attrs : mapping, optional
         Any extra attributes to store.
+    to_df : bool, optional
+        Whether to output a table with a row for each result rather than a
+        dataset.
+    arrow : bool, optional
+        If ``to_df=True``, output a ``pyarrow.Table`` rather than a
+        ``pandas.DataFrame``. Numeric columns are then handed to arrow
+        without copying.
     parallel : bool, optional
         Process combos in parallel, default number of workers picked.
     executor : executor-like pool, optional
@@ -597,10 +865,10 @@ def combo_runner_to_ds(
 
     Returns
     -------
-    ds : xarray.Dataset or pandas.DataFrame
+    ds : xarray.Dataset, pandas.DataFrame or pyarrow.Table
         Multidimensional labelled dataset contatining all the results if
-        ``to_df=False`` (the default), else a pandas dataframe with results
-        as labelled rows.
+        ``to_df=False`` (the default), else a pandas dataframe (or arrow
+        table) with results as labelled rows.
     """
     if to_df:
         if var_names is None:
@@ -619,7 +887,7 @@ def combo_runner_to_ds(
         var_dims = parse_var_dims(var_dims, var_names=var_names)
         var_coords = parse_var_coords(var_coords)
 
-    if cases or to_df:
+    if cases and not to_df:
         info = {}
     else:
         info = None
@@ -644,10 +912,13 @@ def combo_runner_to_ds(
         # convert flat tuple of results to dataframe
         return results_to_df(
             results,
-            settings=info['settings'],
+            combos=combos,
+            cases=cases,
+            constants=constants,
             attrs=attrs,
             resources=resources,
-            var_names=var_names
+            var_names=var_names,
+            arrow=arrow,
         )
 
     if cases:
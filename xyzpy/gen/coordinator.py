@@ -0,0 +1,365 @@
+"""Serve the batches of crops to workers over the network, such that they can
+be grown without a shared filesystem, see :class:`CropServer` and
+:func:`remote_worker`.
+"""
+import os
+import time
+import socket
+import threading
+from multiprocessing.managers import BaseManager
+
+from .combo_runner import _run_linear
+from .farming import XYZError
+from .storage import DEFAULT_LEASE, Heartbeat, default_owner
+from .cropping import (
+    _Measured,
+    _parse_worker_crops,
+    batch_telemetry,
+    from_pickle,
+    to_pickle,
+)
+
+
+def parse_address(address):
+    """Parse a ``'host:port'`` string, or ``(host, port)`` tuple, into a
+    ``(host, port)`` tuple.
+    """
+    if isinstance(address, str):
+        host, sep, port = address.rpartition(':')
+        if not sep:
+            raise ValueError(f"Address '{address}' should be 'host:port'.")
+        return host, int(port)
+    host, port = address
+    return host, int(port)
+
+
+def parse_authkey(authkey=None):
+    """Get the key that the coordinator and workers authenticate each other
+    with, by default from the ``XYZPY_AUTHKEY`` environment variable. A key
+    is always required since, like any use of pickle, anyone who can connect
+    can run arbitrary code.
+    """
+    if authkey is None:
+        authkey = os.environ.get('XYZPY_AUTHKEY')
+    if not authkey:
+        raise XYZError("Serving crops over the network requires a shared "
+                       "secret ``authkey``, e.g. set the XYZPY_AUTHKEY "
+                       "environment variable.")
+    if isinstance(authkey, str):
+        authkey = authkey.encode()
+    return authkey
+
+
+class Coordinator:
+    """The object living in the serving process that hands out the batches
+    of one or more crops and writes back their results. Workers call its
+    methods through a proxy, each connection in its own thread.
+
+    Parameters
+    ----------
+    crops : sequence of Crop
+        The crops to serve.
+    lease : float or None, optional
+        Take over the claims of workers that have not sent a heartbeat for
+        this many seconds.
+    """
+
+    def __init__(self, crops, lease=DEFAULT_LEASE):
+        self.crops = {crop.name: crop for crop in crops}
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._fns = {}
+
+    def function(self, name):
+        """The pickled function of crop ``name``.
+        """
+        if name not in self._fns:
+            self._fns[name] = to_pickle(self.crops[name].fn)
+        return self._fns[name]
+
+    def claim_batch(self, owner):
+        """Claim the next missing and unclaimed batch of any crop for
+        ``owner``, returning the crop name, batch id, how often to send
+        heartbeats and the function arguments of each case, or ``None`` if
+        there is no such batch right now.
+        """
+        with self._lock:
+            for name, crop in self.crops.items():
+                storage = crop.storage
+                claimed = set(storage.claimed_ids(lease=self.lease))
+                for batch_id in crop.missing_results():
+                    if batch_id in claimed:
+                        continue
+                    if storage.claim(batch_id, owner=owner, lease=self.lease):
+                        interval = (self.lease or DEFAULT_LEASE) / 4
+                        return (name, batch_id, interval,
+                                crop._batch_cases(batch_id))
+        return None
+
+    def heartbeat(self, name, batch_id, owner):
+        self.crops[name].storage.heartbeat(batch_id, owner)
+
+    def release(self, name, batch_id, owner):
+        self.crops[name].storage.release(batch_id, owner=owner)
+
+    def submit(self, name, batch_id, owner, results, telemetry=None):
+        """Write the ``results`` of batch ``batch_id`` of crop ``name`` and
+        release the claim ``owner`` holds on it.
+        """
+        crop = self.crops[name]
+        try:
+            crop._write_results(batch_id, results)
+            if telemetry is not None:
+                crop.storage.write_telemetry(batch_id, telemetry)
+        finally:
+            crop.storage.release(batch_id, owner=owner)
+
+    def is_finished(self):
+        """Whether every batch of every crop has been grown.
+        """
+        return not any(crop.missing_results() for crop in self.crops.values())
+
+
+class _ClientManager(BaseManager):
+    pass
+
+
+_ClientManager.register('get_coordinator')
+
+
+# the coordinator of the server process, which only ever serves one
+_COORDINATOR = None
+
+
+def _init_coordinator(data):
+    global _COORDINATOR
+    crops, lease = from_pickle(data)
+    _COORDINATOR = Coordinator(crops, lease=lease)
+
+
+def _get_coordinator():
+    return _COORDINATOR
+
+
+class _ServerManager(BaseManager):
+    pass
+
+
+_ServerManager.register('get_coordinator', callable=_get_coordinator)
+
+
+class _RemoteClaims:
+    """Adapter to refresh a claim through the coordinator with a
+    :class:`~xyzpy.gen.storage.Heartbeat`.
+    """
+
+    def __init__(self, coordinator, name):
+        self.coordinator = coordinator
+        self.name = name
+
+    def heartbeat(self, batch_id, owner):
+        self.coordinator.heartbeat(self.name, batch_id, owner)
+
+
+class CropServer:
+    """Serve the batches of one or more crops over TCP to any number of
+    workers started with :func:`remote_worker`, or
+    ``python -m xyzpy worker --connect host:port``, which then need no access
+    to the crops' directory. Only the server, a child process of this one,
+    reads batches and writes results, so there is no load on the metadata
+    servers of a network filesystem. Batches are claimed in the crops'
+    storage as usual, so local workers can grow the same crops at the same
+    time.
+
+    Parameters
+    ----------
+    crops : Crop, str, or sequence of, optional
+        The crops, or names of crops, to serve, by default every crop found
+        in ``parent_dir``.
+    parent_dir : str, optional
+        Where to find the crops, defaults to the current directory.
+    address : str or tuple, optional
+        The ``'host:port'`` to listen on, by default every interface and a
+        free port, see :attr:`address`.
+    authkey : bytes or str, optional
+        The secret that workers need to connect, by default taken from the
+        ``XYZPY_AUTHKEY`` environment variable.
+    lease : float or None, optional
+        Take over the claims of workers that have not sent a heartbeat for
+        this many seconds, e.g. because their job was killed.
+
+    Examples
+    --------
+    Serve from a background process, while remote workers grow::
+
+        with CropServer(crop, address=':5000', authkey='secret') as server:
+            server.serve_forever(until_finished=True)
+        crop.reap()
+
+    """
+
+    def __init__(self, crops=None, parent_dir=None, *, address=('', 0),
+                 authkey=None, lease=DEFAULT_LEASE):
+        self.crops = _parse_worker_crops(crops, parent_dir)
+        self.lease = lease
+        self._manager = _ServerManager(address=parse_address(address),
+                                       authkey=parse_authkey(authkey))
+        self._lock = threading.Lock()
+        self._started = False
+        self._stop_event = threading.Event()
+
+    @property
+    def address(self):
+        """The ``'host:port'`` that workers should connect to. Since a free
+        port is only chosen once serving, this starts the server if needed.
+        """
+        self.start()
+        host, port = self._manager.address
+        if host in ('', '0.0.0.0'):
+            host = socket.gethostname()
+        return f"{host}:{port}"
+
+    def start(self):
+        """Start serving from a background process, which claims batches
+        and writes results on behalf of the workers.
+        """
+        with self._lock:
+            if not (self._started or self._stop_event.is_set()):
+                # cloudpickled, so that any start method can send the crops
+                self._manager.start(_init_coordinator,
+                                    (to_pickle((self.crops, self.lease)),))
+                self._started = True
+        return self
+
+    def is_finished(self):
+        """Whether every batch of every crop has been grown.
+        """
+        return not any(crop.missing_results() for crop in self.crops)
+
+    def serve_forever(self, until_finished=False, poll_interval=1.0):
+        """Serve until interrupted, or if ``until_finished=True``, until
+        every batch has been grown.
+        """
+        self.start()
+        try:
+            while not self._stop_event.wait(poll_interval):
+                if until_finished and self.is_finished():
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stop serving, workers still connected then stop too.
+        """
+        with self._lock:
+            if self._started and not self._stop_event.is_set():
+                self._manager.shutdown()
+            self._stop_event.set()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_):
+        self.shutdown()
+
+
+def remote_worker(address, authkey=None, *, max_batches=None, wait=False,
+                  poll_interval=5.0, max_idle=None, num_workers=None,
+                  verbosity=1):
+    """Repeatedly claim the next batch from a :class:`CropServer` at
+    ``address``, grow it in this process and send back the results, until
+    there are none left. This is the same as :func:`~xyzpy.worker`, but
+    without needing access to the crops' directory.
+
+    Parameters
+    ----------
+    address : str or tuple
+        The ``'host:port'`` of the server.
+    authkey : bytes or str, optional
+        The secret shared with the server, by default taken from the
+        ``XYZPY_AUTHKEY`` environment variable.
+    max_batches : int, optional
+        Stop after growing this many batches.
+    wait : bool, optional
+        If ``True``, once there is nothing left to claim, keep polling every
+        ``poll_interval`` seconds for batches released by failed workers,
+        until every batch has been grown or the server stops.
+    poll_interval : float, optional
+        How long to sleep between polls if ``wait=True``.
+    max_idle : float, optional
+        If ``wait=True``, stop after this many seconds without growing any
+        batch.
+    num_workers : int, optional
+        Grow the cases of each batch in parallel with a local process pool
+        of this many workers.
+    verbosity : {0, 1, 2}, optional
+        How much information to show, ``1`` prints a line per batch grown,
+        ``2`` also shows progress within each batch.
+
+    Returns
+    -------
+    num_grown : int
+        How many batches this worker grew.
+    """
+    manager = _ClientManager(address=parse_address(address),
+                             authkey=parse_authkey(authkey))
+    try:
+        manager.connect()
+    except (ConnectionError, EOFError):
+        if verbosity >= 1:
+            print(f"xyzpy worker: no server at {address}.")
+        return 0
+
+    coordinator = manager.get_coordinator()
+    owner = default_owner()
+    fns = {}
+    num_grown = 0
+    last_grown = time.time()
+
+    try:
+        while (max_batches is None) or (num_grown < max_batches):
+            job = coordinator.claim_batch(owner)
+
+            if job is None:
+                if (not wait) or coordinator.is_finished():
+                    break
+                if (max_idle is not None) and \
+                        (time.time() - last_grown > max_idle):
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            name, batch_id, interval, cases = job
+            if name not in fns:
+                fns[name] = from_pickle(coordinator.function(name))
+
+            t0 = time.time()
+            try:
+                with Heartbeat(_RemoteClaims(coordinator, name), batch_id,
+                               owner, interval):
+                    measured = _run_linear(
+                        _Measured(fns[name]), cases,
+                        verbosity=max(verbosity - 1, 0),
+                        num_workers=num_workers)
+            except BaseException:
+                coordinator.release(name, batch_id, owner)
+                raise
+
+            coordinator.submit(
+                name, batch_id, owner, [r for r, _ in measured],
+                batch_telemetry(len(cases), measured, time.time() - t0))
+
+            num_grown += 1
+            last_grown = time.time()
+            if verbosity >= 1:
+                print(f"xyzpy worker: grew batch {batch_id} of {name} "
+                      f"({num_grown} grown).")
+
+    except (ConnectionError, EOFError):
+        # the server has stopped
+        if verbosity >= 1:
+            print(f"xyzpy worker: lost connection to {address}.")
+
+    return num_grown
@@ -1,50 +1,60 @@
 import os
-import re
 import copy
 import math
+import heapq
 import time
-import glob
+import shlex
+import sys
 import shutil
-import pickle
 import pathlib
 import warnings
 import functools
 import importlib
 import itertools
+import collections
+
+import numpy as np
+import xarray as xr
 
 from ..utils import _get_fn_name, prod, progbar
+from ..manage import auto_add_extension, save_ds, load_ds
 from .combo_runner import (
     nan_like_result,
     combo_runner_core,
+    _run_linear,
     combo_runner_to_ds,
 )
-from .case_runner import (
-    case_runner,
-)
 from .prepare import (
     parse_combos,
     parse_constants,
     parse_attrs,
     parse_fn_args,
     parse_cases,
+    parse_var_names,
+    parse_var_dims,
+    parse_var_coords,
 )
 from .farming import Runner, Harvester, Sampler, XYZError
+from .storage import (
+    BTCH_NM,
+    RSLT_NM,
+    DEFAULT_LEASE,
+    CropStorage,
+    ResultCodec,
+    Heartbeat,
+    default_owner,
+    write_to_disk,
+    atomic_write_to_disk,
+    read_from_disk,
+    parse_storage,
+    parse_codec,
+    storage_spec,
+)
 
 
-BTCH_NM = "xyz-batch-{}.jbdmp"
-RSLT_NM = "xyz-result-{}.jbdmp"
 FNCT_NM = "xyz-function.clpkl"
 INFO_NM = "xyz-settings.jbdmp"
-
-
-def write_to_disk(obj, fname):
-    with open(fname, 'wb') as file:
-        pickle.dump(obj, file)
-
-
-def read_from_disk(fname):
-    with open(fname, 'rb') as file:
-        return pickle.load(file)
+RPED_NM = "xyz-reaped.jbdmp"
 
 
 @functools.lru_cache(8)
@@ -66,6 +76,24 @@ def from_pickle(s, picklelib='joblib.externals.cloudpickle'):
 
 # --------------------------------- parsing --------------------------------- #
 
+# functions already loaded from disk, keyed by their file's path and stamp
+_LOADED_FUNCTIONS = {}
+
+
+def load_function_from_disk(fname):
+    """Load a cloudpickled function from ``fname``, reusing it if the same
+    file has already been loaded by this process.
+    """
+    stat = os.stat(fname)
+    key = (os.path.abspath(fname), stat.st_ino, stat.st_mtime_ns,
+           stat.st_size)
+    try:
+        return _LOADED_FUNCTIONS[key]
+    except KeyError:
+        fn = _LOADED_FUNCTIONS[key] = from_pickle(read_from_disk(fname))
+        return fn
+
+
 def parse_crop_details(fn, crop_name, crop_parent):
     """Work out how to structure the sowed data.
 
@@ -133,6 +161,118 @@ def check_ready_to_reap(crop, allow_incomplete, wait):
                        " might effect data-types.")
 
 
+def calc_num_cases(combos=None, cases=None):
+    """Get the total number of function calls, for each case every combination
+    is run.
+    """
+    n_combos = prod(len(x) for _, x in combos) if combos else 1
+    n_cases = len(cases) if cases else 1
+    return n_cases * n_combos
+
+
+def index_to_kwargs(indices, combos=None, cases=None, constants=None):
+    """Rebuild the function arguments for each of the flat ``indices`` into
+    the settings that :func:`~xyzpy.gen.combo_runner.combo_runner_core` would
+    iterate over for ``combos`` and ``cases``.
+
+    Parameters
+    ----------
+    indices : sequence of int
+        The flat indices, i.e. position in the unshuffled order of settings.
+    combos : tuple[tuple[str, sequence]], optional
+        The parsed combos.
+    cases : tuple[dict], optional
+        The parsed cases.
+    constants : dict, optional
+        Constant arguments, added to every set of kwargs.
+
+    Returns
+    -------
+    list[dict]
+    """
+    combos = combos or ()
+    constants = constants or {}
+    shape = tuple(len(values) for _, values in combos)
+
+    case_ids, combo_ids = np.divmod(np.asarray(indices, dtype=np.int64),
+                                    prod(shape) if shape else 1)
+    combo_locs = np.unravel_index(combo_ids, shape) if shape else ()
+    combo_locs = tuple(map(np.ndarray.tolist, combo_locs))
+
+    batch = []
+    for k, case_id in enumerate(case_ids.tolist()):
+        kws = dict(cases[case_id]) if cases else {}
+        for (arg, values), locs in zip(combos, combo_locs):
+            kws[arg] = values[locs[k]]
+        kws.update(constants)
+        batch.append(kws)
+
+    return batch
+
+
+def pack_by_cost(costs, num_batches):
+    """Greedily pack cases into batches of roughly equal total cost, by
+    assigning each case, most costly first, to the currently cheapest batch.
+
+    Parameters
+    ----------
+    costs : sequence of float
+        The estimated cost of each case, in flat order.
+    num_batches : int
+        How many batches to pack the cases into.
+
+    Returns
+    -------
+    order : numpy.ndarray
+        The flat indices of the cases, batch by batch, and in ascending order
+        within each batch.
+    bounds : numpy.ndarray
+        The position in ``order`` at which each batch starts, followed by the
+        total number of cases.
+    """
+    costs = np.asarray(costs, dtype=float)
+    if not np.all(np.isfinite(costs) & (costs >= 0)):
+        raise ValueError("Case costs must all be finite and non-negative.")
+    num_batches = min(num_batches, len(costs))
+
+    totals = [(0.0, b) for b in range(num_batches)]
+    batch_of = np.empty(len(costs), dtype=np.int64)
+    for k in np.argsort(-costs, kind='stable').tolist():
+        total, b = heapq.heappop(totals)
+        batch_of[k] = b
+        heapq.heappush(totals, (total + costs[k], b))
+
+    order = np.argsort(batch_of, kind='stable')
+    bounds = np.searchsorted(batch_of[order], np.arange(num_batches + 1))
+    return order, bounds
+
+
+def region_chunks(shape, batchsize):
+    """Find the chunks of a grid of combos with ``shape`` such that each
+    batch of ``batchsize`` consecutive cases is exactly one chunk. This is
+    possible if ``batchsize`` is the size of the trailing dimensions times a
+    divisor of the size of the next dimension.
+
+    Parameters
+    ----------
+    shape : tuple[int]
+        The size of each combo dimension, in order.
+    batchsize : int
+        The number of cases in each batch.
+
+    Returns
+    -------
+    tuple[int] or None
+        The chunk size along each dimension, or ``None`` if the batches can't
+        be aligned with chunks.
+    """
+    for i in reversed(range(len(shape))):
+        num, rem = divmod(batchsize, prod(shape[i + 1:]))
+        if (rem == 0) and (1 <= num <= shape[i]) and (shape[i] % num == 0):
+            return (1,) * i + (num,) + tuple(shape[i + 1:])
+    return None
+
+
 class Crop(object):
     """Encapsulates all the details describing a single 'crop', that is,
     its location, name, and batch size/number. Also allows tracking of
@@ -145,7 +285,7 @@ class Crop(object):
     ----------
     fn : callable, optional
         Target function - Crop `name` will be inferred from this if
-        not given explicitly. If given, `Sower` will also default
+        not given explicitly. If given, the crop will also default
         to saving a version of `fn` to disk for `cropping.grow` to use.
     name : str, optional
         Custom name for this set of runs - must be given if `fn`
@@ -170,6 +310,32 @@ class Crop(object):
     autoload : bool, optional
         If True, check for the existence of a Crop written to disk
         with the same location, and if found, load it.
+    storage : {'files', 'sqlite'}, CropStorage type or instance, optional
+        How to store the batches and results. ``'files'`` (the default) writes
+        a pickle file per batch and result, ``'sqlite'`` keeps everything in
+        a single database file, which is much kinder to the metadata servers
+        of network filesystems. Options can be given as e.g.
+        ``('sqlite', {'timeout': 60})``. If not given, and the crop has
+        already been sown, the storage it was sown with, and its options, are
+        used. See :class:`~xyzpy.gen.storage.CropStorage`.
+    codec : {'pickle', 'npy'}, tuple or ResultCodec, optional
+        How to serialize the results of each batch. ``'pickle'`` (the
+        default) works for anything, while ``'npy'`` stores results that are
+        numpy arrays as raw arrays, which can be memory-mapped when reaped.
+        Either can be paired with a compressor, e.g. ``('npy', 'zstd')``,
+        where anything other than ``'zlib'`` requires ``numcodecs``. If not
+        given, and the crop has already been sown, the codec it was sown with
+        is used. See :class:`~xyzpy.gen.storage.ResultCodec`.
+    zarr_store : str, optional
+        If given, the path of a zarr store laid out over the full grid of
+        sown combos, into which each grown batch writes its results directly,
+        rather than storing them as a result in the crop. Each batch is
+        exactly one chunk of the store, so batches can be grown concurrently,
+        and reaping just opens the store. The store is created by the first
+        batch grown, since the output types are only then known, and requires
+        a :class:`~xyzpy.Runner` or :class:`~xyzpy.Harvester` to describe the
+        outputs, which must be numeric or boolean. If not given, and the crop
+        has already been sown, the store it was sown with is used.
 
     See Also
     --------
@@ -186,9 +352,13 @@ class Crop(object):
         num_batches=None,
         shuffle=False,
         farmer=None,
-        autoload=True
+        autoload=True,
+        storage=None,
+        codec=None,
+        zarr_store=None,
     ):
         self._fn, self.farmer = parse_fn_farmer(fn, farmer)
+        self._fn_on_disk = False
 
         self.name = name
         self.parent_dir = parent_dir
@@ -197,7 +367,20 @@ class Crop(object):
         self.num_batches = num_batches
         self.shuffle = shuffle
         self._batch_remainder = None
+        self._case_order = None
+        self._batch_bounds = None
         self._all_nan_result = None
+        self._storage = storage
+        self._codec = codec
+        if zarr_store is not None:
+            # grow might be run from anywhere
+            zarr_store = os.path.abspath(
+                auto_add_extension(zarr_store, 'zarr'))
+        self.zarr_store = zarr_store
+        self._region_chunks = None
+        self.cluster_settings = None
+        self._info_stamp = None
+        self._settings = None
 
         # Work out the full directory for the crop
         self.location, self.name, self.parent_dir = \
@@ -221,24 +404,31 @@ class Crop(object):
         else:
             return None
 
+    @property
+    def storage(self):
+        """The :class:`~xyzpy.gen.storage.CropStorage` backend holding this
+        crop's batches and results.
+        """
+        if not isinstance(self._storage, CropStorage):
+            self._storage = parse_storage(self._storage, self.location)
+        return self._storage
+
+    @property
+    def codec(self):
+        """The :class:`~xyzpy.gen.storage.ResultCodec` used to write this
+        crop's results.
+        """
+        if not isinstance(self._codec, ResultCodec):
+            self._codec = parse_codec(self._codec)
+        return self._codec
+
     # ------------------------------- methods ------------------------------- #
 
     def choose_batch_settings(self, *, combos=None, cases=None):
         """Work out how to divide all cases into batches, i.e. ensure
         that ``batchsize * num_batches >= num_cases``.
         """
-        if combos:
-            n_combos = prod(len(x) for _, x in combos)
-        else:
-            n_combos = 1
-
-        if cases:
-            n_cases = len(cases)
-        else:
-            n_cases = 1
-
-        # for each case every combination is run
-        n = n_cases * n_combos
+        n = calc_num_cases(combos, cases)
 
         if (self.batchsize is not None) and (self.num_batches is not None):
             # Check that they are set correctly
@@ -275,13 +465,193 @@ class Crop(object):
 
             self.batchsize, self._batch_remainder = divmod(n, self.num_batches)
 
+    def choose_case_order(self, cost=None, *, combos=None, cases=None,
+                          constants=None):
+        """Work out which cases go in which batch. By default, consecutive
+        cases, but if ``cost`` is given the cases are packed into batches of
+        roughly equal total cost, see :func:`pack_by_cost`.
+        """
+        if cost is None:
+            self._case_order = self._batch_bounds = None
+            return
+
+        if self.shuffle:
+            raise ValueError("Can't both shuffle and pack cases by `cost`.")
+
+        n = calc_num_cases(combos, cases)
+
+        if callable(cost):
+            chunksize = 2**16
+            costs = np.fromiter((
+                cost(**kws)
+                for start in range(0, n, chunksize)
+                for kws in index_to_kwargs(
+                    range(start, min(n, start + chunksize)),
+                    combos, cases, constants)
+            ), dtype=float, count=n)
+        else:
+            costs = np.asarray(cost, dtype=float)
+            if costs.shape != (n,):
+                raise ValueError(f"`cost` should be a callable or have an "
+                                 f"entry for each of the {n} cases, but has "
+                                 f"shape {costs.shape}.")
+
+        self._case_order, self._batch_bounds = pack_by_cost(
+            costs, self.num_batches)
+
+    def choose_region_chunks(self, *, combos=None, cases=None, cost=None):
+        """If writing results into a zarr store, check the batches can be
+        aligned with its chunks and record the chunks, see
+        :func:`region_chunks`.
+        """
+        if self.zarr_store is None:
+            self._region_chunks = None
+            return
+
+        if self.runner is None:
+            raise ValueError("Writing results into a zarr store requires a "
+                             "``Runner`` or ``Harvester`` to describe them.")
+        if cases or not combos:
+            raise ValueError("Results can only be written into a zarr store "
+                             "for a crop sown with combos alone.")
+        if self.shuffle or (cost is not None):
+            raise ValueError("Results written into a zarr store need "
+                             "consecutive batches, so can't be shuffled or "
+                             "packed by `cost`.")
+        if os.path.exists(self.zarr_store):
+            raise XYZError(f"The zarr store {self.zarr_store} already "
+                           "exists, delete it first or choose another.")
+
+        shape = tuple(len(values) for _, values in combos)
+        chunks = region_chunks(shape, self.batchsize)
+        if self._batch_remainder or (chunks is None):
+            raise ValueError(
+                "To write results into a zarr store each batch must be "
+                "exactly one chunk of it, i.e. `batchsize` needs to be the "
+                "size of the trailing combo dimensions times a divisor of the "
+                f"next, but the combos have shape {shape} and the batches "
+                f"{self.batchsize} (+{self._batch_remainder}) cases.")
+        self._region_chunks = chunks
+
+    def suggest_batching(self, target_walltime=1.0, max_mem=None,
+                         pilot=None, safety=1.5, apply=False):
+        """Suggest how to batch the cases when next sowing this crop, and
+        what resources to request for each batch with
+        :meth:`~xyzpy.Crop.gen_cluster_script`, from the wall time, cpu time
+        and peak memory of each case recorded by :func:`~xyzpy.grow`. If no
+        batches have been grown yet, a small pilot of the sown cases is timed
+        instead.
+
+        Parameters
+        ----------
+        target_walltime : float, optional
+            How many hours each batch should take to grow.
+        max_mem : float, optional
+            The most memory, in gigabytes, that can be requested for each
+            batch, a warning is given if the cases need more.
+        pilot : int, optional
+            Time this many of the sown cases in this process, rather than
+            using the telemetry of grown batches, their results are
+            discarded. By default 3 cases, only if there is no telemetry.
+        safety : float, optional
+            Factor by which to overestimate the time and memory needed.
+        apply : bool, optional
+            Set the suggested ``batchsize`` for the next sowing, and the
+            suggested resources as the defaults for
+            :meth:`~xyzpy.Crop.gen_cluster_script` and
+            :meth:`~xyzpy.Crop.grow_cluster`.
+
+        Returns
+        -------
+        dict
+            The suggested ``'batchsize'``, and ``'num_procs'``,
+            ``'gigabytes'``, ``'hours'`` and ``'minutes'`` to request.
+        """
+        stats = []
+        if pilot is None:
+            for entry in self.storage.read_telemetry():
+                stats.extend(zip(entry['case_walltimes'],
+                                 entry['case_cputimes'],
+                                 entry['case_memories']))
+        if not stats:
+            stats = self._pilot(3 if pilot is None else pilot)
+
+        walltimes, cputimes, memories = map(np.array, zip(*stats))
+
+        # the cases of each batch are grown one after another
+        case_time = safety * walltimes.mean()
+        batchsize = max(1, int(3600 * target_walltime / max(case_time, 1e-9)))
+        if self.is_prepared():
+            self._sync_info_from_disk()
+            batchsize = min(batchsize, calc_num_cases(
+                self._settings['combos'], self._settings['cases']))
+        hours, minutes = divmod(
+            max(1, math.ceil(batchsize * case_time / 60)), 60)
+
+        # cpu time in excess of wall time means cases use several threads
+        timed = walltimes > 0
+        num_procs = 1
+        if timed.any():
+            ratio = np.median(cputimes[timed] / walltimes[timed])
+            num_procs = max(1, round(float(ratio)))
+
+        memories = [m for m in memories if m is not None]
+        if memories:
+            gigabytes = max(1, math.ceil(safety * max(memories) / 2**30))
+        else:
+            gigabytes = 2
+        if (max_mem is not None) and (gigabytes > max_mem):
+            warnings.warn(f"The cases of {self.name} have needed up to "
+                          f"{max(memories) / 2**30:.2f}GB, so {gigabytes}GB "
+                          f"are suggested, more than ``max_mem={max_mem}``.")
+
+        suggestion = {'batchsize': batchsize, 'num_procs': num_procs,
+                      'gigabytes': gigabytes, 'hours': hours,
+                      'minutes': minutes}
+
+        if apply:
+            self.batchsize = batchsize
+            self.num_batches = None
+            self._batch_remainder = None
+            self.cluster_settings = {k: v for k, v in suggestion.items()
+                                     if k != 'batchsize'}
+
+        return suggestion
+
+    def _pilot(self, num_cases):
+        """Grow the first ``num_cases`` sown cases in this process, returning
+        the wall time, cpu time and peak memory of each.
+        """
+        if not self.is_prepared():
+            raise XYZError("Suggesting how to batch needs either telemetry "
+                           "of grown batches or sown cases to pilot, but "
+                           f"{self.name} hasn't been sown.")
+        self._sync_info_from_disk()
+
+        cases = []
+        for batch_id in range(1, self.num_batches + 1):
+            if len(cases) >= num_cases:
+                break
+            cases.extend(self._batch_cases(batch_id)[:num_cases - len(cases)])
+
+        measured = _run_linear(_Measured(self.fn), cases, verbosity=0)
+        return [m for _, m in measured]
+
+    def _batch_size(self, batch_id):
+        """The number of cases in batch ``batch_id``.
+        """
+        if self._batch_bounds is not None:
+            return int(self._batch_bounds[batch_id] -
+                       self._batch_bounds[batch_id - 1])
+        return self.batchsize + int(batch_id <= self._batch_remainder)
+
     def ensure_dirs_exists(self):
         """Make sure the directory structure for this crop exists.
         """
-        os.makedirs(os.path.join(self.location, "batches"), exist_ok=True)
-        os.makedirs(os.path.join(self.location, "results"), exist_ok=True)
+        self.storage.prepare()
 
-    def save_info(self, combos=None, cases=None, fn_args=None):
+    def save_info(self, combos=None, cases=None, fn_args=None,
+                  constants=None):
         """Save information about the sowed cases.
         """
         # If saving Harvester or Runner, strip out function information so
@@ -297,12 +667,21 @@ class Crop(object):
             'combos': combos,
             'cases': cases,
             'fn_args': fn_args,
+            'constants': constants,
             'batchsize': self.batchsize,
             'num_batches': self.num_batches,
             '_batch_remainder': self._batch_remainder,
             'shuffle': self.shuffle,
+            'case_order': self._case_order,
+            'batch_bounds': self._batch_bounds,
             'farmer': farmer_pkl,
+            'storage': storage_spec(self.storage),
+            'codec': self.codec.spec(),
+            'zarr_store': self.zarr_store,
+            'region_chunks': self._region_chunks,
+            'cluster_settings': self.cluster_settings,
         }, os.path.join(self.location, INFO_NM))
+        self._info_stamp = None
 
     def load_info(self):
         """Load the full settings from disk.
@@ -315,12 +694,36 @@ class Crop(object):
             return read_from_disk(sfile)
 
     def _sync_info_from_disk(self, only_missing=True):
-        """Load information about the saved cases.
+        """Load information about the saved cases. This is skipped if the
+        settings file hasn't changed since the last sync.
         """
+        try:
+            stat = os.stat(os.path.join(self.location, INFO_NM))
+            stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+
+        if only_missing and (stamp is not None) and \
+                (stamp == self._info_stamp):
+            return
+
         settings = self.load_info()
+        self._settings = settings
         self.batchsize = settings['batchsize']
         self.num_batches = settings['num_batches']
         self._batch_remainder = settings['_batch_remainder']
+        self._case_order = settings.get('case_order')
+        self._batch_bounds = settings.get('batch_bounds')
+        if self._storage is None:
+            # crops sown before storage was configurable all used files
+            self._storage = settings.get('storage', 'files')
+        if self._codec is None:
+            self._codec = settings.get('codec')
+        if self.zarr_store is None:
+            self.zarr_store = settings.get('zarr_store')
+        self._region_chunks = settings.get('region_chunks')
+        if self.cluster_settings is None:
+            self.cluster_settings = settings.get('cluster_settings')
 
         farmer_pkl = settings['farmer']
         farmer = (
@@ -335,21 +738,30 @@ class Crop(object):
         if (self.farmer) is None or (not only_missing):
             self.farmer = farmer
 
-        if self.fn is None:
-            self.load_function()
+        if self._fn is None:
+            if self.farmer is not None:
+                # re-insert the function into the farmer straight away
+                self.load_function()
+            else:
+                # only load (and import the dependencies of) the function
+                #     once it is needed, e.g. not just to check progress
+                self._fn_on_disk = True
+
+        self._info_stamp = stamp
 
     def save_function_to_disk(self):
         """Save the base function to disk using cloudpickle
         """
-        write_to_disk(to_pickle(self._fn),
+        write_to_disk(to_pickle(self.fn),
                       os.path.join(self.location, FNCT_NM))
 
     def load_function(self):
         """Load the saved function from disk, and try to re-insert it back into
         Harvester or Runner if present.
         """
-        self._fn = from_pickle(read_from_disk(
-            os.path.join(self.location, FNCT_NM)))
+        self._fn_on_disk = False
+        self._fn = load_function_from_disk(
+            os.path.join(self.location, FNCT_NM))
 
         if self.farmer is not None:
             if self.farmer.fn is None:
@@ -360,14 +772,25 @@ class Crop(object):
                                "disk but its farmer already has a function "
                                "set: {}.".format(self._fn, self.farmer.fn))
 
-    def prepare(self, combos=None, cases=None, fn_args=None):
+    def prepare(self, combos=None, cases=None, fn_args=None, constants=None):
         """Write information about this crop and the supplied combos to disk.
         Typically done at start of sow, not when Crop instantiated.
         """
         self.ensure_dirs_exists()
         if self.save_fn:
             self.save_function_to_disk()
-        self.save_info(combos=combos, cases=cases, fn_args=fn_args)
+        self.save_info(combos=combos, cases=cases, fn_args=fn_args,
+                       constants=constants)
+
+        # any checkpoints refer to the batches of the previous sowing
+        for batch_id in self.storage.checkpoint_ids():
+            self.storage.delete_checkpoint(batch_id)
+
+        # any record of reaped batches refers to the previous sowing
+        try:
+            os.remove(os.path.join(self.location, RPED_NM))
+        except FileNotFoundError:
+            pass
 
     def is_prepared(self):
         """Check whether this crop has been written to disk.
@@ -379,10 +802,8 @@ class Crop(object):
         """
         if self.is_prepared():
             self._sync_info_from_disk()
-            self._num_sown_batches = len(glob.glob(
-                os.path.join(self.location, "batches", BTCH_NM.format("*"))))
-            self._num_results = len(glob.glob(
-                os.path.join(self.location, "results", RSLT_NM.format("*"))))
+            self._num_sown_batches = self.storage.num_batches()
+            self._num_results = self.storage.num_results()
         else:
             self._num_sown_batches = -1
             self._num_results = -1
@@ -396,35 +817,58 @@ class Crop(object):
             (self._num_results == self.num_sown_batches)
         )
 
-    def missing_results(self):
+    def missing_results(self, skip_claimed=False, lease=DEFAULT_LEASE):
         """Return tuple of batches which haven't been grown yet.
+
+        Parameters
+        ----------
+        skip_claimed : bool, optional
+            Also leave out batches that are currently being grown, i.e. whose
+            claim has been refreshed within the last ``lease`` seconds.
+            Batches claimed by processes that have since died are kept.
+        lease : float, optional
+            How many seconds since its last refresh a claim counts as live.
         """
         self.calc_progress()
-
-        def no_result_exists(x):
-            return not os.path.isfile(
-                os.path.join(self.location, "results", RSLT_NM.format(x)))
-
-        return tuple(filter(no_result_exists, range(1, self.num_batches + 1)))
+        missing = self.storage.missing_results(self.num_batches)
+        if skip_claimed:
+            live = set(self.storage.claimed_ids(lease=lease))
+            missing = tuple(i for i in missing if i not in live)
+        return missing
 
     def delete_all(self):
         """Delete the crop directory and all its contents.
         """
+        self.storage.close()
         # delete everything
         shutil.rmtree(self.location)
 
+    def consolidate(self):
+        """Fold the separately stored results of all finished batches, and
+        the batches themselves, into a single archive, so that a crop with
+        very many batches doesn't exhaust inode quotas, and reaping is a
+        sequential read rather than opening a file per batch. Results are
+        still read transparently, and this can be called repeatedly as more
+        batches are grown. See
+        :meth:`~xyzpy.gen.storage.FileStorage.consolidate`.
+
+        Returns
+        -------
+        int
+            How many results were consolidated.
+        """
+        return self.storage.consolidate()
+
     @property
     def all_nan_result(self):
         """Get a stand-in result for cases which are missing still.
         """
         if self._all_nan_result is None:
-            result_files = glob.glob(
-                os.path.join(self.location, "results", RSLT_NM.format("*"))
-            )
-            if not result_files:
+            result_ids = self.storage.result_ids()
+            if not result_ids:
                 raise XYZError("To infer an all-nan result requires at least "
                                "one finished result.")
-            reference_result = read_from_disk(result_files[0])[0]
+            reference_result = self.storage.read_result(result_ids[0])[0]
             self._all_nan_result = nan_like_result(reference_result)
 
         return self._all_nan_result
@@ -489,6 +933,10 @@ class Crop(object):
         verbosity=1,
         batchsize=None,
         num_batches=None,
+        index_batches=True,
+        num_threads=None,
+        compress=False,
+        cost=None,
     ):
         """Sow combos to disk to be later grown, potentially in batches.
 
@@ -511,6 +959,25 @@ class Crop(object):
             If specified, set a new batchsize for the crop.
         num_batches : int, optional
             If specified, set a new num_batches for the crop.
+        index_batches : bool, optional
+            If ``True`` (the default), store the combos, cases and constants
+            once in the crop settings, with each batch being just the indices
+            of its cases, from which :func:`~xyzpy.grow` rebuilds the
+            function arguments. If ``False``, store the full function
+            arguments of every case in each batch.
+        num_threads : int, optional
+            How many threads to write the batches with, by default a few more
+            than the number of cpus. ``1`` writes them all in this thread.
+        compress : bool or int, optional
+            Whether to compress each batch with ``zlib``, or the compression
+            level if an integer. Mostly useful with ``index_batches=False``.
+        cost : callable or sequence of float, optional
+            An estimate of how expensive each case is, either a function
+            called with the same arguments as the crop function, or the cost
+            of every case in order. If given, rather than consecutive cases,
+            each batch gets cases of roughly equal total cost, so that every
+            batch takes a similar time to grow. The mapping is recorded, such
+            that results are still reaped in the right order.
         """
         if batchsize is not None:
             self.batchsize = batchsize
@@ -528,17 +995,16 @@ class Crop(object):
         combos = sorted(combos, key=lambda x: x[0])
 
         self.choose_batch_settings(combos=combos, cases=cases)
-        self.prepare(combos=combos, cases=cases)
+        self.choose_case_order(cost, combos=combos, cases=cases,
+                               constants=constants)
+        self.choose_region_chunks(combos=combos, cases=cases, cost=cost)
+        self.prepare(combos=combos, cases=cases,
+                     constants=constants if index_batches else None)
 
-        with Sower(self) as sow_fn:
-            combo_runner_core(
-                fn=sow_fn,
-                combos=combos,
-                cases=cases,
-                constants=constants,
-                shuffle=shuffle,
-                verbosity=verbosity,
-            )
+        self._sow_batches(combos=combos, cases=cases, constants=constants,
+                          index_batches=index_batches,
+                          num_threads=num_threads, compress=compress,
+                          verbosity=verbosity)
 
     def sow_cases(
         self,
@@ -549,6 +1015,10 @@ class Crop(object):
         verbosity=1,
         batchsize=None,
         num_batches=None,
+        index_batches=True,
+        num_threads=None,
+        compress=False,
+        cost=None,
     ):
         """Sow cases to disk to be later grown, potentially in batches.
 
@@ -570,29 +1040,194 @@ class Crop(object):
             If specified, set a new batchsize for the crop.
         num_batches : int, optional
             If specified, set a new num_batches for the crop.
+        index_batches : bool, optional
+            If ``True`` (the default), store the cases, combos and constants
+            once in the crop settings, with each batch being just the indices
+            of its cases. If ``False``, store the full function arguments of
+            every case in each batch, which might be preferable if there are
+            very many cases, since every grow process then needs to load
+            only its own batch.
+        num_threads : int, optional
+            How many threads to write the batches with, by default a few more
+            than the number of cpus. ``1`` writes them all in this thread.
+        compress : bool or int, optional
+            Whether to compress each batch with ``zlib``, or the compression
+            level if an integer. Mostly useful with ``index_batches=False``.
+        cost : callable or sequence of float, optional
+            An estimate of how expensive each case is, either a function
+            called with the same arguments as the crop function, or the cost
+            of every case in order. If given, rather than consecutive cases,
+            each batch gets cases of roughly equal total cost, so that every
+            batch takes a similar time to grow. The mapping is recorded, such
+            that results are still reaped in the right order.
         """
         if batchsize is not None:
             self.batchsize = batchsize
         if num_batches is not None:
             self.num_batches = num_batches
 
-        fn_args = parse_fn_args(self._fn, fn_args)
+        fn_args = parse_fn_args(self.fn, fn_args)
         cases = parse_cases(cases, fn_args)
         constants = self.parse_constants(constants)
 
         self.choose_batch_settings(combos=combos, cases=cases)
-        self.prepare(fn_args=fn_args, combos=combos, cases=cases)
+        self.choose_case_order(cost, combos=combos, cases=cases,
+                               constants=constants)
+        self.choose_region_chunks(combos=combos, cases=cases, cost=cost)
+        self.prepare(fn_args=fn_args, combos=combos, cases=cases,
+                     constants=constants if index_batches else None)
+
+        self._sow_batches(combos=combos, cases=cases, constants=constants,
+                          index_batches=index_batches,
+                          num_threads=num_threads, compress=compress,
+                          verbosity=verbosity)
+
+    def _gen_batch_indices(self, n):
+        """Lazily generate the batch id and flat case indices of each batch,
+        in the (possibly shuffled) order that the results will be reaped in.
+        """
+        if self._case_order is not None:
+            # packed by cost
+            order, bounds = self._case_order, self._batch_bounds
+            for i in range(len(bounds) - 1):
+                yield i + 1, order[bounds[i]:bounds[i + 1]]
+            return
+
+        if self.shuffle:
+            # the same permutation that combo_runner_core uses to reap
+            import random
+            random.seed(int(self.shuffle))
+            order = list(range(n))
+            random.shuffle(order)
+
+        start = 0
+        for i in range(self.num_batches):
+            if start >= n:
+                break
+            stop = min(n, start + self.batchsize +
+                       int(i < self._batch_remainder))
+            if self.shuffle:
+                yield i + 1, np.array(order[start:stop], dtype=np.int64)
+            else:
+                yield i + 1, range(start, stop)
+            start = stop
+
+    def _sow_batches(self, combos=None, cases=None, constants=None,
+                     index_batches=True, num_threads=None, compress=False,
+                     verbosity=1):
+        """Sow every batch, either as just the flat indices of its cases, or
+        with the function arguments of each case generated lazily, batch by
+        batch. The batches are written from a pool of ``num_threads`` threads,
+        with at most a few batches held in memory at once.
+        """
+        n = calc_num_cases(combos, cases)
 
-        with Sower(self) as sow_fn:
-            case_runner(
-                fn=sow_fn,
-                fn_args=fn_args,
-                cases=cases,
-                combos=combos,
-                constants=constants,
-                verbosity=verbosity,
-                parse=False,
-            )
+        def sow_batch(batch_id, indices):
+            if index_batches:
+                batch = indices
+            else:
+                batch = index_to_kwargs(indices, combos, cases, constants)
+            return self.storage.write_batch(batch_id, batch,
+                                            compress=compress)
+
+        if num_threads is None:
+            num_threads = min(32, (os.cpu_count() or 1) + 4)
+
+        pbar = progbar(total=min(n, self.num_batches), unit='batch',
+                       disable=verbosity <= 0)
+        nbytes = 0
+        t0 = time.time()
+
+        def update(size):
+            nonlocal nbytes
+            nbytes += size
+            rate = nbytes / max(time.time() - t0, 1e-9) / 2**20
+            pbar.set_postfix_str("{:.1f}MB/s".format(rate), refresh=False)
+            pbar.update()
+
+        try:
+            if num_threads <= 1:
+                for batch_id, indices in self._gen_batch_indices(n):
+                    update(sow_batch(batch_id, indices))
+                return
+
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(num_threads) as executor:
+                pending = collections.deque()
+                for batch_id, indices in self._gen_batch_indices(n):
+                    # bound the number of batches generated but not written
+                    if len(pending) >= 2 * num_threads:
+                        update(pending.popleft().result())
+                    pending.append(
+                        executor.submit(sow_batch, batch_id, indices))
+                while pending:
+                    update(pending.popleft().result())
+        finally:
+            pbar.close()
+
+    def _batch_cases(self, batch_id):
+        """Load the function arguments of every case in batch ``batch_id``.
+        """
+        batch = self.storage.read_batch(batch_id)
+
+        if isinstance(batch, (list, tuple)):
+            # sown with the full arguments of each case
+            return batch
+
+        self._sync_info_from_disk()
+        return index_to_kwargs(
+            batch,
+            combos=self._settings['combos'],
+            cases=self._settings['cases'],
+            constants=self._settings.get('constants'),
+        )
+
+    def _write_results(self, batch_id, results):
+        """Store the results of batch ``batch_id``, either in the storage or
+        straight into the zarr store.
+        """
+        if self.zarr_store is not None:
+            self._write_region(batch_id, results)
+            self.storage.mark_result(batch_id)
+        else:
+            self.storage.write_result(batch_id, tuple(results),
+                                      codec=self.codec)
+
+    def _write_region(self, batch_id, results):
+        """Write the results of batch ``batch_id`` into its chunk of the zarr
+        store, creating the store first if it doesn't exist yet.
+        """
+        import zarr
+
+        self._sync_info_from_disk()
+        runner = self.runner
+        coords = _crop_coords(self._settings)
+        chunks = tuple(self._region_chunks)
+
+        if not os.path.isdir(self.zarr_store):
+            template = _stream_template(
+                results[0], coords, runner._var_names, runner._var_dims,
+                runner._var_coords, runner._constants, runner._attrs,
+                chunks=dict(enumerate(chunks)), may_be_missing=True)
+            # create the store to one side and move it into place, so that if
+            #     several batches finish at once exactly one of them wins
+            tmp = f"{self.zarr_store}.{os.getpid()}-{time.time_ns()}.zarr"
+            save_ds(template, tmp, engine='zarr', compute=False)
+            try:
+                os.rename(tmp, self.zarr_store)
+            except OSError:
+                shutil.rmtree(tmp)
+
+        shape = tuple(map(len, coords.values()))
+        start = np.unravel_index((batch_id - 1) * self.batchsize, shape)
+        region = tuple(slice(i, i + n) for i, n in zip(start, chunks))
+
+        group = zarr.open_group(self.zarr_store, mode='r+')
+        outputs = [_stream_outputs(r, runner._var_names) for r in results]
+        for name in outputs[0]:
+            values = np.stack([o[name] for o in outputs])
+            group[name][region] = values.reshape(chunks + values.shape[1:])
 
     def sow_samples(self, n, combos=None, constants=None, verbosity=1):
         """Sow ``n`` samples to disk.
@@ -601,20 +1236,61 @@ class Crop(object):
         self.sow_cases(fn_args, cases,
                        constants=constants, verbosity=verbosity)
 
-    def grow(self, batch_ids, **combo_runner_opts):
+    def grow(self, batch_ids, claim=False, lease=DEFAULT_LEASE,
+             within_batch=False, checkpoint_every=None,
+             checkpoint_interval=None, **combo_runner_opts):
         """Grow specific batch numbers using this process.
+
+        Parameters
+        ----------
+        batch_ids : int or sequence of int
+            The batches to grow.
+        claim : bool, optional
+            Claim each batch before growing it, skipping any batch that
+            another process has claimed or already grown - see
+            :func:`~xyzpy.grow`.
+        lease : float or None, optional
+            If claiming, take over claims not refreshed for this many seconds.
+        within_batch : bool, optional
+            If ``True``, grow the batches one after another, but each with
+            its cases computed in parallel according to ``parallel``,
+            ``num_workers`` or ``executor``. Useful for a few large batches.
+        checkpoint_every : int, optional
+            Checkpoint each batch every this many cases, see
+            :func:`~xyzpy.grow`.
+        checkpoint_interval : float, optional
+            Checkpoint each batch at most every this many seconds, see
+            :func:`~xyzpy.grow`.
+        combo_runner_opts
+            Supplied to :func:`~xyzpy.combo_runner`, e.g. ``parallel=True``.
         """
         if isinstance(batch_ids, int):
             batch_ids = (batch_ids,)
 
+        constants = {'verbosity': 0, 'crop': self,
+                     'claim': claim, 'lease': lease,
+                     'checkpoint_every': checkpoint_every,
+                     'checkpoint_interval': checkpoint_interval}
+
+        if within_batch:
+            # the parallel options apply to the cases of each batch instead
+            for opt in ('parallel', 'num_workers', 'executor'):
+                if opt in combo_runner_opts:
+                    constants[opt] = combo_runner_opts.pop(opt)
+
         combo_runner_core(grow, combos=(('batch_number', batch_ids),),
-                          constants={'verbosity': 0, 'crop': self},
-                          **combo_runner_opts)
+                          constants=constants, **combo_runner_opts)
 
-    def grow_missing(self, **combo_runner_opts):
+    def grow_missing(self, claim=False, lease=DEFAULT_LEASE,
+                     within_batch=False, checkpoint_every=None,
+                     checkpoint_interval=None, **combo_runner_opts):
         """Grow any missing results using this process.
         """
-        self.grow(batch_ids=self.missing_results(), **combo_runner_opts)
+        self.grow(batch_ids=self.missing_results(), claim=claim, lease=lease,
+                  within_batch=within_batch,
+                  checkpoint_every=checkpoint_every,
+                  checkpoint_interval=checkpoint_interval,
+                  **combo_runner_opts)
 
     def reap_combos(self, wait=False, clean_up=None, allow_incomplete=False):
         """Reap already sown and grown results from this crop.
@@ -674,6 +1350,7 @@ class Crop(object):
         clean_up=None,
         allow_incomplete=False,
         to_df=False,
+        arrow=False,
     ):
         """Reap a function over sowed combinations and output to a Dataset.
 
@@ -708,6 +1385,8 @@ class Crop(object):
             incomplete results will all be filled-in as nan.
         to_df : bool, optional
             Whether to reap to a ``xarray.Dataset`` or a ``pandas.DataFrame``.
+        arrow : bool, optional
+            If ``to_df=True``, reap to a ``pyarrow.Table`` instead.
 
         Returns
         -------
@@ -745,6 +1424,7 @@ class Crop(object):
                 shuffle=settings.get('shuffle', False),
                 parse=parse,
                 to_df=to_df,
+                arrow=arrow,
             )
 
         if clean_up:
@@ -753,7 +1433,7 @@ class Crop(object):
         return data
 
     def reap_runner(self, runner, wait=False, clean_up=None,
-                    allow_incomplete=False, to_df=False):
+                    allow_incomplete=False, to_df=False, arrow=False):
         """Reap a Crop over sowed combos and save to a dataset defined by a
         :class:`~xyzpy.Runner`.
         """
@@ -769,7 +1449,8 @@ class Crop(object):
             wait=wait,
             clean_up=clean_up,
             allow_incomplete=allow_incomplete,
-            to_df=to_df)
+            to_df=to_df,
+            arrow=arrow)
 
         if to_df:
             runner._last_df = data
@@ -815,7 +1496,8 @@ class Crop(object):
             raise ValueError("Cannot reap samples without a 'Sampler'.")
 
         df = self.reap_runner(sampler.runner, wait=wait, clean_up=clean_up,
-                              allow_incomplete=allow_incomplete, to_df=True)
+                              allow_incomplete=allow_incomplete, to_df=True,
+                              arrow=sampler.arrow)
 
         if sync:
             sampler._last_df = df
@@ -823,6 +1505,41 @@ class Crop(object):
 
         return df
 
+    def reap_region(self, wait=False, sync=True, overwrite=None,
+                    clean_up=None, allow_incomplete=False):
+        """Reap a Crop whose results were written straight into its zarr
+        store, which is just opened lazily, and merged with the dataset of
+        a :class:`~xyzpy.Harvester`, or set as the last dataset of a
+        :class:`~xyzpy.Runner`. Missing results are left as nan.
+        """
+        check_ready_to_reap(self, allow_incomplete, wait)
+        self._sync_info_from_disk()
+
+        if wait:
+            for _ in self.storage.iter_results(
+                    range(1, self.num_batches + 1)):
+                pass
+
+        if not os.path.isdir(self.zarr_store):
+            raise XYZError(f"The zarr store {self.zarr_store} doesn't exist "
+                           "yet, it is created by the first batch grown.")
+
+        ds = load_ds(self.zarr_store, engine='zarr', load_to_mem=False)
+
+        if isinstance(self.farmer, Harvester):
+            if sync:
+                self.farmer.add_ds(ds, sync=sync, overwrite=overwrite)
+        else:
+            self.runner._last_ds = ds
+
+        if clean_up is None:
+            clean_up = not allow_incomplete
+        if clean_up:
+            # the store itself is kept
+            self.delete_all()
+
+        return ds
+
     def reap(
         self,
         wait=False,
@@ -839,9 +1556,10 @@ class Crop(object):
         wait : bool, optional
             Whether to wait for results to appear. If false (default) all
             results need to be in place before the reap.
-        sync : bool, optional
+        sync : {True, False, 'append'}, optional
             Immediately sync the new dataset with the on-disk full dataset or
-            dataframe if a harvester or sampler is used.
+            dataframe if a harvester or sampler is used, see
+            :meth:`~xyzpy.Harvester.add_ds`.
         overwrite : bool, optional
             How to compare data when syncing to on-disk dataset.
             If ``None``, (default) merge as long as no conflicts.
@@ -862,6 +1580,9 @@ class Crop(object):
         opts = dict(clean_up=clean_up, wait=wait,
                     allow_incomplete=allow_incomplete)
 
+        if self.zarr_store is not None:
+            return self.reap_region(sync=sync, overwrite=overwrite, **opts)
+
         if isinstance(self.farmer, Runner):
             return self.reap_runner(self.farmer, **opts)
 
@@ -874,14 +1595,281 @@ class Crop(object):
 
         return self.reap_combos(**opts)
 
-    def check_bad(self, delete_bad=True):
+    def reaped_ids(self):
+        """Get the ids of the batches already merged into this crop's farmer
+        by :meth:`~xyzpy.Crop.reap_new`.
+        """
+        try:
+            return read_from_disk(os.path.join(self.location, RPED_NM))
+        except FileNotFoundError:
+            return ()
+
+    def _forget_reaped(self, batch_ids):
+        """Remove ``batch_ids`` from the record of batches already reaped by
+        :meth:`~xyzpy.Crop.reap_new`, once their results have been deleted,
+        so that they are reaped again if regrown.
+        """
+        reaped = self.reaped_ids()
+        kept = tuple(i for i in reaped if i not in set(batch_ids))
+        if len(kept) < len(reaped):
+            atomic_write_to_disk(kept, os.path.join(self.location, RPED_NM))
+
+    def reap_new(self, sync=True, overwrite=None, clean_up=True):
+        """Reap only the results grown since the last call to this method and
+        merge them into this crop's :class:`~xyzpy.Harvester` or
+        :class:`~xyzpy.Sampler`, or, for a plain :class:`~xyzpy.Runner`, set
+        them as its last dataset. This only ever loads each result once, so
+        is cheap to call repeatedly while monitoring a crop that is still
+        growing.
+
+        Parameters
+        ----------
+        sync : {True, False, 'append'}, optional
+            Immediately sync the new dataset with the on-disk full dataset or
+            dataframe if a harvester or sampler is used, see
+            :meth:`~xyzpy.Harvester.add_ds`.
+        overwrite : bool, optional
+            How to compare data when syncing to on-disk dataset.
+            If ``None``, (default) merge as long as no conflicts.
+            ``True``: overwrite with the new data. ``False``, discard any
+            new conflicting data.
+        clean_up : bool, optional
+            Whether to delete the crop once every batch has been reaped.
+
+        Returns
+        -------
+        xarray.Dataset, pandas.DataFrame or None
+            The newly reaped data only, or ``None`` if there was none.
+        """
+        if self.zarr_store is not None:
+            raise XYZError("The results of this crop are written into the "
+                           f"zarr store {self.zarr_store}, reap it with "
+                           "``Crop.reap``.")
+
+        runner = self.runner
+        if runner is None:
+            raise XYZError("Reaping new results requires a ``Runner``, "
+                           "``Harvester`` or ``Sampler`` to describe them.")
+
+        settings = self.load_info()
+        fn_args = tuple(_crop_coords(settings))
+        reaped = set(self.reaped_ids())
+        new_ids = [i for i in self.storage.result_ids()
+                   if (i not in reaped) and (i <= settings['num_batches'])]
+
+        data = None
+        if new_ids:
+            # gather the new results and their locations ...
+            cases, results = [], []
+            for i in new_ids:
+                for kws in self._batch_cases(i):
+                    cases.append({arg: kws[arg] for arg in fn_args})
+                results.extend(self.storage.read_result(i))
+
+            # ... and label them by running over the locations as cases
+            results = iter(results)
+
+            def fn(**_):
+                return next(results)
+
+            to_df = isinstance(self.farmer, Sampler)
+            data = combo_runner_to_ds(
+                fn=fn,
+                combos=(),
+                cases=cases,
+                var_names=runner._var_names,
+                var_dims=runner._var_dims,
+                var_coords=runner._var_coords,
+                constants=runner._constants,
+                resources={},
+                attrs=runner._attrs,
+                parse=False,
+                to_df=to_df,
+                arrow=to_df and self.farmer.arrow,
+                verbosity=0,
+            )
+
+            if isinstance(self.farmer, Harvester):
+                self.farmer.add_ds(data, sync=sync, overwrite=overwrite)
+            elif isinstance(self.farmer, Sampler):
+                self.farmer._last_df = data
+                self.farmer.add_df(data, sync=sync)
+            else:
+                runner._last_ds = data
+
+            reaped.update(new_ids)
+            atomic_write_to_disk(tuple(sorted(reaped)),
+                                 os.path.join(self.location, RPED_NM))
+
+        if clean_up and (len(reaped) == settings['num_batches']):
+            self.delete_all()
+
+        return data
+
+    def reap_to_disk(
+        self,
+        file_name,
+        engine='zarr',
+        *,
+        var_names=None,
+        var_dims=None,
+        var_coords=None,
+        constants=None,
+        attrs=None,
+        wait=False,
+        clean_up=None,
+        allow_incomplete=False,
+        delete_results=False,
+        chunks='auto',
+        verbosity=0,
+    ):
+        """Reap results batch by batch straight into a dataset on disk, such
+        that only a single batch of results is ever held in memory. The
+        dataset is first created with every variable preallocated, and each
+        batch of results then written to its locations. If this crop has a
+        :class:`~xyzpy.Runner`, :class:`~xyzpy.Harvester` or
+        :class:`~xyzpy.Sampler`, the variable description is taken from it.
+        The outputs of the function must be numeric or boolean.
+
+        Parameters
+        ----------
+        file_name : str
+            Where to write the dataset.
+        engine : {'zarr', 'h5netcdf', 'netcdf4'}, optional
+            What format to write the dataset in.
+        var_names : str, sequence of strings, or None
+            Variable name(s) of the output(s) of `fn`, set to None if
+            fn outputs data already labelled in a Dataset or DataArray.
+        var_dims : sequence of either strings or string sequences, optional
+            'Internal' names of dimensions for each variable.
+        var_coords : mapping, optional
+            Mapping of extra coords the output variables may depend on.
+        constants : mapping, optional
+            Constant arguments to record either as attributes or coordinates.
+        attrs : mapping, optional
+            Any extra attributes to store.
+        wait : bool, optional
+            Whether to wait for results to appear. If false (default) all
+            results need to be in place before the reap.
+        clean_up : bool, optional
+            Whether to delete all the batch files once the results have been
+            gathered. If left as ``None`` this will be automatically set to
+            ``not allow_incomplete``.
+        allow_incomplete : bool, optional
+            Allow only partially completed crop results to be reaped,
+            incomplete results will all be left as nan.
+        delete_results : bool, optional
+            Delete each result from the crop as soon as it has been written,
+            e.g. if disk space is limited.
+        chunks : int, tuple, dict or 'auto', optional
+            The chunks of the zarr arrays, see ``dask.array.full``.
+        verbosity : {0, 1}, optional
+            Whether to show a progress bar.
+
+        Returns
+        -------
+        xarray.Dataset
+            The dataset on disk, opened lazily.
+        """
+        check_ready_to_reap(self, allow_incomplete, wait)
+
+        if self.zarr_store is not None:
+            raise XYZError("The results of this crop are already written "
+                           f"into the zarr store {self.zarr_store}.")
+
+        if clean_up is None:
+            clean_up = not allow_incomplete
+
+        if self.runner is not None:
+            var_names = self.runner._var_names
+            var_dims = self.runner._var_dims
+            var_coords = self.runner._var_coords
+            constants = self.runner._constants
+            attrs = self.runner._attrs
+        else:
+            var_names = parse_var_names(var_names)
+            var_dims = parse_var_dims(var_dims, var_names=var_names)
+            var_coords = parse_var_coords(var_coords)
+            constants = parse_constants(constants)
+            attrs = parse_attrs(attrs)
+
+        settings = self.load_info()
+        coords = _crop_coords(settings)
+        locations = {arg: {v: i for i, v in enumerate(values)}
+                     for arg, values in coords.items()}
+        may_be_missing = allow_incomplete or bool(settings['cases'])
+
+        file_name = auto_add_extension(file_name, engine)
+        storage = self.storage
+        writer = None
+        deleted = []
+
+        if wait:
+            # write each batch as soon as it arrives
+            batch_ids = storage.iter_results(
+                range(1, settings['num_batches'] + 1))
+            total = settings['num_batches']
+        else:
+            # incomplete -> leave the missing results as nan
+            batch_ids = [i for i in storage.result_ids()
+                         if i <= settings['num_batches']]
+            total = len(batch_ids)
+
+        try:
+            for i in progbar(batch_ids, total=total, disable=verbosity <= 0):
+                batch = self._batch_cases(i)
+                results = storage.read_result(i, mmap=True)
+
+                if writer is None:
+                    template = _stream_template(
+                        results[0], coords, var_names, var_dims,
+                        var_coords, constants, attrs, chunks,
+                        may_be_missing)
+                    save_ds(template, file_name, engine=engine,
+                            compute=False)
+                    writer = _StreamWriter(file_name, engine)
+
+                index = tuple(
+                    np.array([locations[arg][kws[arg]] for kws in batch])
+                    for arg in coords
+                )
+                outputs = [_stream_outputs(r, var_names) for r in results]
+                for name in outputs[0]:
+                    writer.write(name, index,
+                                 np.stack([o[name] for o in outputs]))
+
+                if delete_results:
+                    storage.delete_result(i)
+                    deleted.append(i)
+        finally:
+            if writer is not None:
+                writer.close()
+            if deleted:
+                self._forget_reaped(deleted)
+
+        if writer is None:
+            raise XYZError("Reaping to disk requires at least one finished "
+                           "result.")
+
+        if clean_up:
+            self.delete_all()
+
+        return load_ds(file_name, engine=engine, load_to_mem=False)
+
+    def check_bad(self, delete_bad=True, checksum=False):
         """Check that the result dumps are not bad -> sometimes length does not
         match the batch. Optionally delete these so that they can be re-grown.
+        Each result is first checked against the number of cases and size
+        recorded in the manifest when it was written, and only loaded in
+        full if these don't match, or weren't recorded.
 
         Parameters
         ----------
         delete_bad : bool
             Delete bad results as they are come across.
+        checksum : bool, optional
+            Also compare the checksum of each stored result to that recorded,
+            which requires reading, but not deserializing, every result.
 
         Returns
         -------
@@ -889,52 +1877,75 @@ class Crop(object):
             The bad batch numbers.
         """
         # XXX: work out why this is needed sometimes on network filesystems.
-        result_files = glob.glob(
-            os.path.join(self.location, "results", RSLT_NM.format("*")))
-
         bad_ids = []
-
-        for result_file in result_files:
-            # load corresponding batch file to check length.
-            result_num = os.path.split(
-                result_file)[-1].strip("xyz-result-").strip(".jbdmp")
-            batch_file = os.path.join(
-                self.location, "batches", BTCH_NM.format(result_num))
-
-            batch = read_from_disk(batch_file)
-
+        self._sync_info_from_disk()
+        if self.zarr_store is not None:
+            # results are in the zarr store, not the storage
+            return ()
+        manifest = self.storage.result_manifest()
+
+        for result_num in self.storage.result_ids():
+            entry = manifest.get(result_num)
             try:
-                result = read_from_disk(result_file)
-                unloadable = False
-            except Exception as e:
+                as_recorded = (entry is not None) and (
+                    entry['num_cases'] == self._batch_size(result_num) and
+                    entry['nbytes'] == self.storage.result_nbytes(result_num)
+                )
+                corrupt = as_recorded and checksum and (
+                    entry['crc32'] != self.storage.result_checksum(result_num)
+                )
+            except FileNotFoundError:
+                as_recorded = corrupt = False
+
+            if as_recorded and not corrupt:
+                continue
+
+            if corrupt:
                 unloadable = True
-                err = e
+                err = "checksum does not match that recorded."
+            else:
+                # load corresponding batch to check length.
+                batch = self.storage.read_batch(result_num)
+
+                try:
+                    result = self.storage.read_result(result_num)
+                    unloadable = False
+                except Exception as e:
+                    unloadable = True
+                    err = e
 
             if unloadable or (len(result) != len(batch)):
-                msg = "result {} is bad".format(result_file)
+                msg = "result {} is bad".format(RSLT_NM.format(result_num))
                 msg += "." if not delete_bad else " - deleting it."
                 msg += " Error was: {}".format(err) if unloadable else ""
                 print(msg)
 
                 if delete_bad:
-                    os.remove(result_file)
+                    self.storage.delete_result(result_num)
 
                 bad_ids.append(result_num)
 
+        if delete_bad and bad_ids:
+            self._forget_reaped(bad_ids)
+
         return tuple(bad_ids)
 
     #  ----------------------------- properties ----------------------------- #
 
     def _get_fn(self):
+        if self._fn_on_disk:
+            self.load_function()
         return self._fn
 
     def _set_fn(self, fn):
         if self.save_fn is None and fn is not None:
             self.save_fn = True
         self._fn = fn
+        self._fn_on_disk = False
 
     def _del_fn(self):
         self._fn = None
+        self._fn_on_disk = False
         self.save_fn = False
 
     fn = property(_get_fn, _set_fn, _del_fn,
@@ -980,61 +1991,69 @@ def load_crops(directory='.'):
         if match:
             names.append(match.groups(1)[0])
 
-    return {name: Crop(name=name) for name in names}
+    return {name: Crop(name=name, parent_dir=directory) for name in names}
 
 
-class Sower(object):
-    """Class for sowing a 'crop' of batched combos to then 'grow' (on any
-    number of workers sharing the filesystem) and then reap.
+def peak_memory():
+    """The peak resident memory of this process so far in bytes, or ``None``
+    if this can't be found, e.g. on windows.
+    """
+    try:
+        import resource
+    except ImportError:  # pragma: no cover
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in bytes on macos but kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else 1024 * peak
+
+
+class _Measured:
+    """Wrap ``fn`` such that each call also returns the wall time, cpu time
+    and peak memory of the process that made it.
     """
 
-    def __init__(self, crop):
-        """
-        Parameters
-        ----------
-        crop : xyzpy.Crop
-            Description of where and how to store the cases and results.
-        """
-        self.crop = crop
-        # Internal:
-        self._batch_cases = []  # collects cases to be written in single batch
-        self._counter = 0  # counts how many cases are in batch so far
-        self._batch_counter = 0  # counts how many batches have been written
-
-    def save_batch(self):
-        """Save the current batch of cases to disk and start the next batch.
-        """
-        self._batch_counter += 1
-        write_to_disk(self._batch_cases, os.path.join(
-            self.crop.location, "batches", BTCH_NM.format(self._batch_counter))
-        )
-        self._batch_cases = []
-        self._counter = 0
-
-    # Context manager #
-
-    def __enter__(self):
-        return self
+    def __init__(self, fn):
+        self.fn = fn
 
     def __call__(self, **kwargs):
-        self._batch_cases.append(kwargs)
-        self._counter += 1
+        t0, c0 = time.perf_counter(), time.process_time()
+        result = self.fn(**kwargs)
+        walltime = time.perf_counter() - t0
+        cputime = time.process_time() - c0
+        return result, (walltime, cputime, peak_memory())
 
-        # when the number of cases doesn't divide the number of batches we
-        #     distribute the remainder among the first crops.
-        extra_batch = self._batch_counter < self.crop._batch_remainder
 
-        if self._counter == self.crop.batchsize + int(extra_batch):
-            self.save_batch()
+def batch_telemetry(num_cases, measured, walltime, num_resumed=0):
+    """The telemetry entry of a batch, given the ``measured`` results, see
+    :class:`_Measured`, of each case grown.
+    """
+    stats = [m for _, m in measured]
+    return {
+        'num_cases': num_cases,
+        'num_resumed': num_resumed,
+        'walltime': walltime,
+        'peak_memory': max(filter(None, [peak_memory()] +
+                                  [m for _, _, m in stats]), default=None),
+        'case_walltimes': [w for w, _, _ in stats],
+        'case_cputimes': [c for _, c, _ in stats],
+        'case_memories': [m for _, _, m in stats],
+    }
 
-    def __exit__(self, exception_type, exception_value, traceback):
-        # Make sure any overfill also saved
-        if self._batch_cases:
-            self.save_batch()
+
+def mpi_rank():
+    """The MPI rank of this process, or ``0`` if it wasn't launched by e.g.
+    ``mpiexec``.
+    """
+    for var in ('OMPI_COMM_WORLD_RANK', 'PMI_RANK'):
+        if var in os.environ:
+            return int(os.environ[var])
+    return 0
 
 
 def grow(batch_number, crop=None, fn=None, check_mpi=True,
-         verbosity=2, debugging=False):
+         verbosity=2, debugging=False, claim=False, lease=DEFAULT_LEASE,
+         parallel=False, num_workers=None, executor=None,
+         checkpoint_every=None, checkpoint_interval=None):
     """Automatically process a batch of cases into results. Should be run in an
     ".xyz-{fn_name}" folder.
 
@@ -1056,12 +2075,56 @@ def grow(batch_number, crop=None, fn=None, check_mpi=True,
         How much information to show.
     debugging : bool, optional
         Set logging level to DEBUG.
+    claim : bool, optional
+        Atomically claim the batch in the crop's storage before growing it,
+        and release it afterwards. If another process holds the claim, or the
+        result already exists, return without doing anything. This makes it
+        safe for several processes to grow overlapping sets of batches.
+        While growing, the claim is refreshed every ``lease / 4`` seconds.
+        Under MPI only rank 0 claims the batch, so all ranks should agree
+        on which batch they grow.
+    lease : float or None, optional
+        If claiming, how many seconds since its last refresh after which
+        another process's claim on the batch is assumed to be dead - e.g. the
+        job was killed - and is taken over. ``None`` never takes over claims.
+    parallel : bool, optional
+        Compute the cases of the batch in parallel, using a local process
+        pool with the default number of workers. The results are still
+        stored in order.
+    num_workers : int, optional
+        Compute the cases of the batch in parallel using a local process pool
+        with this many workers.
+    executor : executor-like pool, optional
+        Submit the cases of the batch to this pool executor, e.g. a
+        ``concurrent.futures.ThreadPoolExecutor``, see
+        :func:`~xyzpy.combo_runner`.
+    checkpoint_every : int, optional
+        Save the results computed so far to a checkpoint every this many
+        cases. Growing the batch again, e.g. after the job hit its walltime,
+        resumes from the last checkpoint, which is always done if one exists.
+    checkpoint_interval : float, optional
+        Save the results computed so far to a checkpoint at most every this
+        many seconds.
+
+    Returns
+    -------
+    grown : bool
+        Whether this process grew the batch.
+
+    Notes
+    -----
+    The wall time, cpu time and peak memory of each case, and of the batch
+    as a whole, are recorded with the crop's telemetry, from which
+    :meth:`~xyzpy.Crop.suggest_batching` can suggest how to batch and
+    request resources for the next sowing.
     """
     if debugging:
         import logging
         logger = logging.getLogger()
         logger.setLevel(logging.DEBUG)
 
+    t0 = time.time()
+
     if crop is None:
         current_folder = os.path.relpath('.', '..')
         if current_folder[:5] != ".xyz-":
@@ -1069,67 +2132,267 @@ def grow(batch_number, crop=None, fn=None, check_mpi=True,
                            "\"{crop_parent}/.xyz-{crop_name}\" folder, else "
                            "`crop_parent` and `crop_name` (or `fn`) should be "
                            "specified.")
-        crop_name = current_folder[5:]
-        crop_location = os.getcwd()
-    else:
-        crop_name = crop.name
-        crop_location = crop.location
+        crop = Crop(name=current_folder[5:],
+                    parent_dir=os.path.dirname(os.getcwd()))
 
-    fn_file = os.path.join(crop_location, FNCT_NM)
-    cases_file = os.path.join(crop_location, "batches",
-                              BTCH_NM.format(batch_number))
-    results_file = os.path.join(crop_location, "results",
-                                RSLT_NM.format(batch_number))
+    storage = crop.storage
+
+    # maybe want to run grow as mpiexec (i.e. `fn` itself in parallel),
+    # so only claim, save and delete on rank 0
+    rank = mpi_rank() if check_mpi else 0
+
+    if claim:
+        if storage.has_result(batch_number):
+            return False
+
+    # the other ranks just help grow whichever batch rank 0 claims
+    if claim and (rank == 0):
+        owner = default_owner()
+        if not storage.claim(batch_number, owner=owner, lease=lease):
+            if verbosity >= 1:
+                print(f"xyzpy: batch {batch_number} of {crop.name} is "
+                      "claimed by another process, skipping.")
+            return False
+        try:
+            # the batch might have finished since we checked
+            if storage.has_result(batch_number):
+                return False
+            interval = (lease or DEFAULT_LEASE) / 4
+            with Heartbeat(storage, batch_number, owner, interval):
+                return grow(batch_number, crop=crop, fn=fn,
+                            check_mpi=check_mpi, verbosity=verbosity,
+                            debugging=False, claim=False, parallel=parallel,
+                            num_workers=num_workers, executor=executor,
+                            checkpoint_every=checkpoint_every,
+                            checkpoint_interval=checkpoint_interval)
+        finally:
+            # the claim might have been taken over if we stalled for too long
+            storage.release(batch_number, owner=owner)
 
     # load function
     if fn is None:
-        fn = from_pickle(read_from_disk(fn_file))
+        fn = crop.fn
+    if fn is None:
+        fn = load_function_from_disk(os.path.join(crop.location, FNCT_NM))
 
     # load cases to evaluate
-    cases = read_from_disk(cases_file)
+    cases = crop._batch_cases(batch_number)
 
     if len(cases) == 0:
         raise ValueError("Something has gone wrong with the loading of "
                          "batch {} ".format(BTCH_NM.format(batch_number)) +
                          "for the crop at {}.".format(crop.location))
 
-    # maybe want to run grow as mpiexec (i.e. `fn` itself in parallel),
-    # so only save and delete on rank 0
-    if check_mpi and 'OMPI_COMM_WORLD_RANK' in os.environ:  # pragma: no cover
-        rank = int(os.environ['OMPI_COMM_WORLD_RANK'])
-    elif check_mpi and 'PMI_RANK' in os.environ:  # pragma: no cover
-        rank = int(os.environ['PMI_RANK'])
+    # resume from the checkpoint of any previous, interrupted, grow
+    done = list(storage.read_checkpoint(batch_number) or ())
+    if len(done) > len(cases):
+        done = []
+
+    if rank == 0 and verbosity >= 1:
+        print(f"xyzpy: loaded batch {batch_number} of {crop.name}.")
+        if done:
+            print(f"xyzpy: resuming from checkpoint with {len(done)} of "
+                  f"{len(cases)} cases done.")
+
+    if (rank == 0) and (checkpoint_every or checkpoint_interval):
+        last_checkpoint = {'num_results': 0, 'time': time.time()}
+
+        def callback(new_results):
+            num_new = len(new_results) - last_checkpoint['num_results']
+            elapsed = time.time() - last_checkpoint['time']
+            if (
+                (checkpoint_every and num_new >= checkpoint_every) or
+                (checkpoint_interval and elapsed >= checkpoint_interval)
+            ):
+                storage.write_checkpoint(batch_number, tuple(
+                    done + [r for r, _ in new_results]))
+                last_checkpoint['num_results'] = len(new_results)
+                last_checkpoint['time'] = time.time()
     else:
-        rank = 0
+        callback = None
+
+    # compute the results! - the other ranks just help
+    measured = _run_linear(
+        _Measured(fn), cases[len(done):],
+        verbosity=verbosity if rank == 0 else 0,
+        parallel=parallel,
+        num_workers=num_workers,
+        executor=executor,
+        callback=callback,
+    )
+    results = done + [r for r, _ in measured]
 
-    if rank == 0:
-        if verbosity >= 1:
-            print(f"xyzpy: loaded batch {batch_number} of {crop_name}.")
-        pbar = progbar(range(len(cases)), disable=verbosity <= 0)
+    if rank != 0:
+        return False
 
-        results = []
-        for i in pbar:
-            if verbosity >= 2:
-                pbar.set_description(f"{cases[i]}")
+    if len(results) != len(cases):
+        raise ValueError("Something has gone wrong with processing "
+                         "batch {} ".format(BTCH_NM.format(batch_number)) +
+                         "for the crop at {}.".format(crop.location))
 
-            # compute and store result!
-            results.append(fn(**cases[i]))
+    # save to results
+    crop._write_results(batch_number, results)
+    if done or callback is not None:
+        storage.delete_checkpoint(batch_number)
 
-        if len(results) != len(cases):
-            raise ValueError("Something has gone wrong with processing "
-                             "batch {} ".format(BTCH_NM.format(batch_number)) +
-                             "for the crop at {}.".format(crop.location))
+    storage.write_telemetry(batch_number, batch_telemetry(
+        len(cases), measured, time.time() - t0, num_resumed=len(done)))
 
-        # save to results
-        write_to_disk(tuple(results), results_file)
+    if verbosity >= 1:
+        print(f"xyzpy: success - batch {batch_number} completed.")
 
-        if verbosity >= 1:
-            print(f"xyzpy: success - batch {batch_number} completed.")
+    return True
 
-    else:
-        for case in cases:
-            # worker: just help compute the result!
-            fn(**case)
+
+def _parse_worker_crops(crops, parent_dir):
+    """Get the current crops a worker should grow, as a list.
+    """
+    if crops is None:
+        crops = load_crops(parent_dir or '.')
+        return [crops[name] for name in sorted(crops)]
+
+    if isinstance(crops, (str, Crop)):
+        crops = (crops,)
+
+    return [
+        crop if isinstance(crop, Crop) else
+        Crop(name=crop, parent_dir=parent_dir)
+        for crop in crops
+    ]
+
+
+def worker(crops=None, parent_dir=None, *, max_batches=None, wait=False,
+           poll_interval=5.0, max_idle=None, lease=DEFAULT_LEASE,
+           num_workers=None, checkpoint_interval=None, connect=None,
+           authkey=None, verbosity=1):
+    """Repeatedly claim and grow the next unclaimed missing batch of one or
+    more crops, until there are none left. Any number of workers, on any
+    number of nodes sharing the crops' filesystem, can be run at once, and
+    since each only ever claims a single batch at a time, they automatically
+    balance the load between them. This is also available from the command
+    line as ``python -m xyzpy worker``.
+
+    Parameters
+    ----------
+    crops : Crop, str, or sequence of, optional
+        The crops, or names of crops, to grow. If not given, grow every crop
+        found in ``parent_dir``, looking again for new crops each time the
+        worker runs out of batches.
+    parent_dir : str, optional
+        Where to find the crops, defaults to the current directory.
+    max_batches : int, optional
+        Stop after growing this many batches.
+    wait : bool, optional
+        If ``True``, once there is nothing left to claim, keep polling every
+        ``poll_interval`` seconds for new work - for example batches whose
+        claim was released by a failed worker, or newly sown crops - rather
+        than stopping. Explicitly given crops are no longer polled once they
+        are complete.
+    poll_interval : float, optional
+        How long to sleep between looking for new work if ``wait=True``.
+    max_idle : float, optional
+        If ``wait=True``, stop after this many seconds without growing any
+        batch.
+    lease : float or None, optional
+        Take over the claims of other workers that have not been refreshed
+        for this many seconds, e.g. because their job was killed, see
+        :func:`~xyzpy.grow`.
+    num_workers : int, optional
+        Grow the cases of each batch in parallel with a local process pool
+        of this many workers.
+    checkpoint_interval : float, optional
+        Checkpoint the results of each batch at most every this many seconds,
+        so that if the worker is killed, the next worker to grow the batch
+        resumes from the checkpoint.
+    connect : str, optional
+        Rather than from the filesystem, get batches from, and send results
+        to, the :class:`~xyzpy.gen.coordinator.CropServer` at this
+        ``'host:port'``, see :func:`~xyzpy.gen.coordinator.remote_worker`.
+        The crops, and their ``lease``, are then chosen by the server, and
+        ``checkpoint_interval`` is not supported.
+    authkey : bytes or str, optional
+        The secret shared with the server if connecting, by default taken
+        from the ``XYZPY_AUTHKEY`` environment variable.
+    verbosity : {0, 1, 2, 3}, optional
+        How much information to show, ``1`` prints a line per batch grown,
+        higher levels are passed on to :func:`~xyzpy.grow`.
+
+    Returns
+    -------
+    num_grown : int
+        How many batches this worker grew.
+    """
+    if connect is not None:
+        from .coordinator import remote_worker
+
+        if (checkpoint_interval is not None) or (lease != DEFAULT_LEASE):
+            raise XYZError("A worker connecting to a server can't set "
+                           "``checkpoint_interval`` or ``lease``, the "
+                           "server sets the lease of its crops.")
+
+        return remote_worker(connect, authkey, max_batches=max_batches,
+                             wait=wait, poll_interval=poll_interval,
+                             max_idle=max_idle, num_workers=num_workers,
+                             verbosity=verbosity)
+
+    if crops is not None:
+        # fixed set of crops, only load their details and functions once
+        fixed_crops = _parse_worker_crops(crops, parent_dir)
+
+    num_grown = 0
+    last_grown = time.time()
+
+    while True:
+        grown_this_round = False
+        unfinished = False
+
+        if crops is None:
+            current_crops = _parse_worker_crops(None, parent_dir)
+        else:
+            current_crops = fixed_crops
+
+        for crop in current_crops:
+            if not crop.is_prepared():
+                continue
+
+            missing = crop.missing_results()
+            if missing:
+                unfinished = True
+
+            # claims that have expired will be taken over by grow
+            claimed = set(crop.storage.claimed_ids(lease=lease))
+            for batch_id in missing:
+                if batch_id in claimed:
+                    continue
+
+                if grow(batch_id, crop=crop, claim=True, lease=lease,
+                        num_workers=num_workers,
+                        checkpoint_interval=checkpoint_interval,
+                        verbosity=max(verbosity - 1, 0)):
+                    num_grown += 1
+                    grown_this_round = True
+                    last_grown = time.time()
+                    if verbosity >= 1:
+                        print(f"xyzpy worker: grew batch {batch_id} of "
+                              f"{crop.name} ({num_grown} grown).")
+
+                if (max_batches is not None) and (num_grown >= max_batches):
+                    return num_grown
+
+        if grown_this_round:
+            # other workers may have released claims meanwhile
+            continue
+
+        if not wait:
+            return num_grown
+
+        if (crops is not None) and (not unfinished):
+            return num_grown
+
+        if (max_idle is not None) and (time.time() - last_grown > max_idle):
+            return num_grown
+
+        time.sleep(poll_interval)
 
 
 # --------------------------------------------------------------------------- #
@@ -1150,44 +2413,50 @@ class Reaper(object):
             Description of where and how to store the cases and results.
         """
         self.crop = crop
+        crop._sync_info_from_disk()
+        storage = crop.storage
 
-        files = (
-            os.path.join(self.crop.location, "results", RSLT_NM.format(i + 1))
-            for i in range(num_batches)
-        )
-
-        def _load(x):
+        def _load(i):
 
             use_default = (
                 (default_result is not None) and
                 (not wait) and
-                (not os.path.isfile(x))
+                (not storage.has_result(i))
             )
 
             # actual result doesn't exist yet - use the default if specified
             if use_default:
-                i = int(re.findall(RSLT_NM.format(r'(\d+)'), x)[0])
-                size = crop.batchsize + int(i < crop._batch_remainder)
-                res = (default_result,) * size
+                res = (default_result,) * crop._batch_size(i)
             else:
-                res = read_from_disk(x)
+                res = storage.read_result(i)
 
             if (res is None) or len(res) == 0:
                 raise ValueError("Something not right: result {} contains "
-                                 "no data upon read from disk.".format(x))
+                                 "no data upon read from disk."
+                                 .format(RSLT_NM.format(i)))
             return res
 
-        def wait_to_load(x):
-            while not os.path.exists(x):
-                time.sleep(0.2)
+        if wait:
+            # load results in whatever order they arrive, but hand them back
+            #     in batch order, so no time is spent idle on a slow batch
+            arrivals = storage.iter_results(range(1, num_batches + 1))
+            loaded = {}
 
-            if os.path.isfile(x):
-                return _load(x)
-            else:
-                raise ValueError("{} is not a file.".format(x))
+            def wait_to_load(i):
+                while i not in loaded:
+                    j = next(arrivals)
+                    loaded[j] = _load(j)
+                return loaded.pop(i)
 
-        self.results = itertools.chain.from_iterable(map(
-            wait_to_load if wait else _load, files))
+        load = wait_to_load if wait else _load
+
+        if crop._case_order is None:
+            self.results = itertools.chain.from_iterable(
+                map(load, range(1, num_batches + 1)))
+        else:
+            # batches were packed by cost -> put the results back in order
+            self.results = _in_case_order(
+                load, crop._case_order, crop._batch_bounds)
 
     def __enter__(self):
         return self
@@ -1197,10 +2466,172 @@ class Reaper(object):
 
     def __exit__(self, exception_type, exception_value, traceback):
         # Check everything gone acccording to plan
-        if tuple(self.results):
+        if next(self.results, _EXHAUSTED) is not _EXHAUSTED:
             raise XYZError("Not all results reaped!")
 
 
+_EXHAUSTED = object()
+
+
+def _in_case_order(load, case_order, bounds):
+    """Yield the results of batches packed by cost, see
+    :func:`pack_by_cost`, back in the original order of their cases. Each
+    batch is loaded with ``load(batch_id)`` when its first case is needed,
+    and dropped once all of its cases have been yielded, so only the
+    batches currently interleaved are held in memory - for packings that
+    spread consecutive cases over every batch that can still be all of
+    them.
+    """
+    positions = np.argsort(case_order)
+    batch_ids = np.searchsorted(bounds, positions, side='right')
+    remaining = np.diff(bounds)
+    loaded = {}
+
+    for pos, i in zip(positions.tolist(), batch_ids.tolist()):
+        if i not in loaded:
+            loaded[i] = load(i)
+        yield loaded[i][pos - bounds[i - 1]]
+
+        remaining[i - 1] -= 1
+        if remaining[i - 1] == 0:
+            del loaded[i]
+
+
+# --------------------------------------------------------------------------- #
+#                          Streaming results to disk                          #
+# --------------------------------------------------------------------------- #
+
+def _crop_coords(settings):
+    """Get the coordinates of every function argument iterated over, in the
+    same order and layout as :func:`~xyzpy.gen.combo_runner.combo_runner_core`.
+    """
+    coords = {}
+
+    for case in settings['cases'] or ():
+        for arg, v in case.items():
+            coords.setdefault(arg, set()).add(v)
+
+    for arg, values in coords.items():
+        try:
+            coords[arg] = sorted(values)
+        except TypeError:  # unsortable
+            coords[arg] = list(values)
+
+    coords.update(settings['combos'] or ())
+    return coords
+
+
+def _as_dataset(result):
+    if isinstance(result, xr.DataArray):
+        if result.name is None:
+            raise ValueError("Can only reap named ``DataArray`` objects to "
+                             "disk.")
+        return result.to_dataset()
+    return result
+
+
+def _stream_outputs(result, var_names):
+    """Split a single result into a mapping of variable name to array.
+    """
+    if var_names == (None,):
+        return {k: np.asarray(v)
+                for k, v in _as_dataset(result).data_vars.items()}
+
+    if len(var_names) == 1:
+        result = (result,)
+    return {k: np.asarray(v) for k, v in zip(var_names, result)}
+
+
+def _stream_template(reference, coords, var_names, var_dims, var_coords,
+                     constants, attrs, chunks, may_be_missing):
+    """Create a lazy dataset describing the full output, given a single
+    ``reference`` result, from which the on-disk store can be initialized.
+    """
+    import dask.array as da
+
+    fn_args = tuple(coords)
+    shape = tuple(map(len, coords.values()))
+    ds_coords = dict(coords)
+
+    if var_names == (None,):
+        reference = _as_dataset(reference)
+        ds_coords.update(reference.coords)
+        attrs = {**reference.attrs, **attrs}
+        outputs = [(k, v.dims, np.asarray(v))
+                   for k, v in reference.data_vars.items()]
+    else:
+        ds_coords.update(var_coords)
+        outputs = [(k, var_dims[k], np.asarray(v))
+                   for k, v in _stream_outputs(reference, var_names).items()]
+
+    data_vars = {}
+    for name, dims, x in outputs:
+        dtype = x.dtype
+        if dtype.kind not in 'biufc':
+            raise TypeError("Only numeric or boolean outputs can be reaped to "
+                            f"disk, but '{name}' has dtype {dtype}.")
+
+        # missing results need to be representable as nan
+        if may_be_missing and dtype.kind in 'biu':
+            dtype = np.result_type(dtype, float)
+
+        fill = np.nan if dtype.kind in 'fc' else 0
+        data_vars[name] = (fn_args + tuple(dims),
+                           da.full(shape + x.shape, fill, dtype=dtype,
+                                   chunks=chunks))
+
+    ds = xr.Dataset(data_vars, coords=ds_coords, attrs=dict(attrs))
+
+    # Add constants to attrs, but filter out those which should be coords
+    for k, v in constants.items():
+        if k in ds.dims:
+            ds.coords[k] = v
+        else:
+            ds.attrs[k] = v
+
+    return ds
+
+
+class _StreamWriter:
+    """Write batches of results into their locations in a preallocated zarr
+    or netCDF store.
+    """
+
+    def __init__(self, file_name, engine):
+        self.engine = engine
+        if engine == 'zarr':
+            import zarr
+            self._store = zarr.open_group(file_name, mode='r+')
+        else:
+            # netCDF4 files are HDF5 files, whichever engine wrote them
+            import h5netcdf
+            self._store = h5netcdf.File(file_name, 'r+')
+
+    def write(self, name, index, values):
+        """Write ``values[i]`` to location ``[index[0][i], index[1][i], ...]``
+        of variable ``name``.
+        """
+        if self.engine == 'zarr':
+            inner_shape = values.shape[1:]
+            if inner_shape:
+                # broadcast each outer location over the inner dimensions
+                inner_index = np.indices(inner_shape).reshape(
+                    len(inner_shape), -1)
+                index = (
+                    tuple(np.repeat(ix, prod(inner_shape)) for ix in index) +
+                    tuple(np.tile(ix, len(values)) for ix in inner_index)
+                )
+            self._store[name].vindex[index] = values.reshape(-1)
+        else:
+            var = self._store.variables[name]
+            for loc, value in zip(zip(*index), values):
+                var[loc] = value
+
+    def close(self):
+        if self.engine != 'zarr':
+            self._store.close()
+
+
 # --------------------------------------------------------------------------- #
 #                     Automatic Batch Submission Scripts                      #
 # --------------------------------------------------------------------------- #
@@ -1235,47 +2666,67 @@ _SLURM_HEADER = (
     "#SBATCH --job-name={name}\n"
     "#SBATCH --array={run_start}-{run_stop}\n")
 
+_LOCAL_HEADER = (
+    "#!/bin/bash\n"
+    "# tasks {run_start}-{run_stop} of {name}, {num_concurrent} at a time\n"
+    "mkdir -p {output_directory}\n")
+
 _BASE = (
     "cd {working_directory}\n"
     "export OMP_NUM_THREADS={num_threads}\n"
     "export MKL_NUM_THREADS={num_threads}\n"
     "export OPENBLAS_NUM_THREADS={num_threads}\n"
-    "{shell_setup}\n"
-    "tmpfile=$(mktemp .xyzpy-qsub.XXXXXXXX)\n"
-    "cat <<EOF > $tmpfile\n"
-    "{setup}\n"
-    "from xyzpy.gen.cropping import grow, Crop\n"
-    "if __name__ == '__main__':\n"
-    "    crop = Crop(name='{name}', parent_dir='{parent_dir}')\n")
-
-_CLUSTER_SGE_GROW_ALL_SCRIPT = (
-    "    grow($SGE_TASK_ID, crop=crop, debugging={debugging})\n")
-
-_CLUSTER_PBS_GROW_ALL_SCRIPT = (
-    "    grow($PBS_ARRAY_INDEX, crop=crop, debugging={debugging})\n")
-
-_CLUSTER_SLURM_GROW_ALL_SCRIPT = (
-    "    grow($SLURM_ARRAY_TASK_ID, crop=crop, debugging={debugging})\n")
-
-_CLUSTER_SGE_GROW_PARTIAL_SCRIPT = (
-    "    batch_ids = {batch_ids}]\n"
-    "    grow(batch_ids[$SGE_TASK_ID - 1], crop=crop, "
-    "debugging={debugging})\n")
-
-_CLUSTER_PBS_GROW_PARTIAL_SCRIPT = (
-    "    batch_ids = {batch_ids}\n"
-    "    grow(batch_ids[$PBS_ARRAY_INDEX - 1], crop=crop, "
-    "debugging={debugging})\n")
+    "{shell_setup}\n")
+
+_CLUSTER_GROW = (
+    "{launcher} -m xyzpy grow {grow_args}\n")
+
+_LOCAL_GROW = (
+    "for XYZPY_TASK_ID in $(seq {run_start} {run_stop}); do\n"
+    "    while [ $(jobs -rp | wc -l) -ge {num_concurrent} ]; do\n"
+    "        wait -n\n"
+    "    done\n"
+    "    {launcher} -m xyzpy grow {grow_args} \\\n"
+    "        > \"{output_directory}/{name}.$XYZPY_TASK_ID.log\" 2>&1 &\n"
+    "done\n"
+    "wait\n")
+
+_CLUSTER_TASK_ID = {
+    'sge': "$SGE_TASK_ID",
+    'pbs': "$PBS_ARRAY_INDEX",
+    'slurm': "$SLURM_ARRAY_TASK_ID",
+    'local': "$XYZPY_TASK_ID",
+}
+
+
+def format_batch_ids(batch_ids):
+    """Compactly format ``batch_ids`` as comma separated ids and ranges, e.g.
+    ``(1, 2, 3, 5, 7, 8)`` as ``'1-3,5,7-8'``.
+    """
+    spans = []
+    for i in sorted(batch_ids):
+        if spans and (i == spans[-1][1] + 1):
+            spans[-1][1] = i
+        else:
+            spans.append([i, i])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in spans)
 
-_CLUSTER_SLURM_GROW_PARTIAL_SCRIPT = (
-    "    batch_ids = {batch_ids}\n"
-    "    grow(batch_ids[$SLURM_ARRAY_TASK_ID - 1], crop=crop, "
-    "debugging={debugging})\n")
 
-_BASE_CLUSTER_SCRIPT_END = (
-    "EOF\n"
-    "{launcher} $tmpfile\n"
-    "rm $tmpfile\n")
+def parse_batch_ids(spec):
+    """Parse batch ids formatted like ``'1-3,5,7-8'``, into a tuple.
+    """
+    batch_ids = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            start, _, stop = part.partition('-')
+            batch_ids.extend(range(int(start), int(stop or start) + 1))
+        except ValueError:
+            raise ValueError(f"Invalid batch ids '{spec}', should be like "
+                             "'1-3,5,7-8'.")
+    return tuple(batch_ids)
 
 
 def gen_cluster_script(
@@ -1283,10 +2734,14 @@ def gen_cluster_script(
     hours=None,
     minutes=None,
     seconds=None,
-    gigabytes=2,
-    num_procs=1,
+    gigabytes=None,
+    num_procs=None,
     num_threads=None,
+    num_workers=None,
+    batches_per_task=None,
+    seconds_per_batch=None,
     num_nodes=1,
+    num_concurrent=None,
     launcher='python',
     setup="#",
     shell_setup="",
@@ -1302,23 +2757,49 @@ def gen_cluster_script(
     ----------
     crop : Crop
         The crop to grow.
-    scheduler : {'sge', 'pbs', 'slurm'}
-        Whether to use a SGE, PBS or slurm submission script template.
+    scheduler : {'sge', 'pbs', 'slurm', 'local'}
+        Whether to use a SGE, PBS or slurm submission script template, or a
+        script that runs the tasks as local processes, ``num_concurrent`` at
+        a time, e.g. on a large node without a scheduler.
     batch_ids : int or tuple[int]
-        Which batch numbers to grow, defaults to all missing batches.
+        Which batch numbers to grow, defaults to all missing batches, apart
+        from those currently claimed by a live process.
     hours : int
-        How many hours to request, default=0.
+        How many hours to request. If none of ``hours``, ``minutes`` and
+        ``seconds`` are given, the walltime suggested by
+        :meth:`Crop.suggest_batching` with ``apply=True``, else one hour.
     minutes : int, optional
-        How many minutes to request, default=20.
+        How many minutes to request.
     seconds : int, optional
         How many seconds to request, default=0.
     gigabytes : int, optional
-        How much memory to request, default: 2.
+        How much memory to request, by default that suggested by
+        :meth:`Crop.suggest_batching` with ``apply=True``, else 2.
     num_procs : int, optional
-        How many processes to request (threaded cores or MPI), default: 1.
+        How many processes to request (threaded cores or MPI), by default
+        that suggested by :meth:`Crop.suggest_batching` with ``apply=True``,
+        else 1.
+    num_threads : int, optional
+        How many threads each process should use, by default ``num_procs``
+        divided by ``num_workers``, or ``1`` if ``mpi=True``.
+    num_workers : int or bool, optional
+        If given, grow the cases of each batch in parallel with a local pool
+        of this many processes, or ``num_procs`` processes if ``True``.
+    batches_per_task : int, optional
+        Grow this many consecutive batches in each task of the job array,
+        rather than one, to avoid overloading the scheduler with many small
+        tasks and paying the start-up cost of each.
+    seconds_per_batch : float, optional
+        An estimate of how long each batch takes to grow, if given (and
+        ``batches_per_task`` is not), pack as many batches into each task as
+        fit into the requested walltime.
+    num_concurrent : int, optional
+        For ``scheduler='local'``, how many tasks to run at once, by default
+        the number of cpus divided by ``num_procs``.
     launcher : str, optional
-        How to launch the script, default: ``'python'``. But could for example
-        be ``'mpiexec python'`` for a MPI program.
+        How to launch python, default: ``'python'``. But could for example
+        be ``'mpiexec python'`` for a MPI program. Each task runs
+        ``{launcher} -m xyzpy grow ...``.
     setup : str, optional
         Python script to run before growing, for things that shouldnt't be put
         in the crop function itself, e.g. one-time imports with side-effects
@@ -1327,11 +2808,15 @@ def gen_cluster_script(
         Commands to be run by the shell before the python script is executed.
         E.g. ``conda activate my_env``.
     mpi : bool, optional
-        Request MPI processes not threaded processes.
+        Request MPI processes not threaded processes. The tasks, like any
+        launched with ``mpiexec``, then don't claim their batches, since the
+        ranks of each couldn't agree on which to grow.
     temp_gigabytes : int, optional
         How much temporary on-disk memory.
     output_directory : str, optional
         What directory to write output to. Defaults to "$HOME/Scratch/output".
+        For ``scheduler='local'`` the output of each task is written to
+        ``"{output_directory}/{crop.name}.{task_id}.log"``.
     extra_resources : str, optional
         Extra "#$ -l" resources, e.g. 'gpu=1'
     debugging : bool, optional
@@ -1344,11 +2829,21 @@ def gen_cluster_script(
 
     scheduler = scheduler.lower()  # be case-insensitive for scheduler
 
-    if scheduler not in {'sge', 'pbs', 'slurm'}:
-        raise ValueError("scheduler must be one of 'sge', 'pbs', or 'slurm'")
+    if scheduler not in {'sge', 'pbs', 'slurm', 'local'}:
+        raise ValueError("scheduler must be one of 'sge', 'pbs', 'slurm', or "
+                         "'local'")
+
+    # resources suggested by ``Crop.suggest_batching(apply=True)``
+    suggested = crop.cluster_settings or {}
+    if gigabytes is None:
+        gigabytes = suggested.get('gigabytes', 2)
+    if num_procs is None:
+        num_procs = suggested.get('num_procs', 1)
 
     if hours is minutes is seconds is None:
-        hours, minutes, seconds = 1, 0, 0
+        hours = suggested.get('hours', 1)
+        minutes = suggested.get('minutes', 0)
+        seconds = 0
     else:
         hours = 0 if hours is None else int(hours)
         minutes = 0 if minutes is None else int(minutes)
@@ -1369,11 +2864,28 @@ def gen_cluster_script(
     else:
         extra_resources = "#$ -l {}".format(extra_resources)
 
+    if num_workers is True:
+        num_workers = num_procs
+
+    if seconds_per_batch is not None:
+        if batches_per_task is not None:
+            raise ValueError("Only one of `batches_per_task` and "
+                             "`seconds_per_batch` should be given.")
+        walltime = 3600 * hours + 60 * minutes + seconds
+        batches_per_task = max(1, int(walltime // seconds_per_batch))
+    elif batches_per_task is None:
+        batches_per_task = 1
+    elif batches_per_task < 1:
+        raise ValueError("`batches_per_task` should be at least 1.")
+
     if num_threads is None:
         if mpi:
             num_threads = 1
         else:
-            num_threads = num_procs
+            num_threads = max(1, num_procs // (num_workers or 1))
+
+    if num_concurrent is None:
+        num_concurrent = max(1, (os.cpu_count() or 1) // num_procs)
 
     # get absolute path
     full_parent_dir = str(pathlib.Path(crop.parent_dir).expanduser().resolve())
@@ -1384,70 +2896,71 @@ def gen_cluster_script(
         'seconds': seconds,
         'gigabytes': gigabytes,
         'name': crop.name,
-        'parent_dir': full_parent_dir,
         'num_procs': num_procs,
         'num_threads': num_threads,
         'num_nodes': num_nodes,
         'run_start': 1,
+        'num_concurrent': num_concurrent,
+        'task_id': _CLUSTER_TASK_ID[scheduler],
         'launcher': launcher,
-        'setup': setup,
         'shell_setup': shell_setup,
         'pe': 'mpi' if mpi else 'smp',
         'temp_gigabytes': temp_gigabytes,
         'output_directory': output_directory,
         'working_directory': full_parent_dir,
         'extra_resources': extra_resources,
-        'debugging': debugging,
     }
 
+    # grow all ids, using the array index as the batch id
+    if (batch_ids is None) and (crop.num_results == 0) and \
+            (batches_per_task == 1):
+        batch_ids = range(1, crop.num_batches + 1)
+        batches = opts['task_id']
+    else:
+        if batch_ids is not None:
+            # grow specific ids
+            batch_ids = tuple(batch_ids)
+        elif crop.num_results == 0:
+            batch_ids = range(1, crop.num_batches + 1)
+        else:
+            # grow missing ids only - batches being grown by live processes
+            #     are skipped, but any whose process has died are resubmitted
+            batch_ids = crop.missing_results(skip_claimed=True)
+        batches = (f"{format_batch_ids(batch_ids)} "
+                   f"--task-id {opts['task_id']}")
+        if batches_per_task > 1:
+            batches += f" --batches-per-task {batches_per_task}"
+
+    grow_args = [shlex.quote(crop.name),
+                 "--parent-dir", shlex.quote(full_parent_dir),
+                 "--batches", batches]
+    if not (mpi or 'mpi' in launcher):
+        # only rank 0 could claim, leaving the other ranks to grow alone
+        grow_args.append("--claim")
+    if num_workers:
+        grow_args += ["--num-workers", str(num_workers)]
+    if setup.strip() not in {"", "#"}:
+        grow_args += ["--setup", shlex.quote(setup)]
+    if debugging:
+        grow_args.append("--debugging")
+
+    opts['grow_args'] = " ".join(grow_args)
+    opts['run_stop'] = math.ceil(len(batch_ids) / batches_per_task)
+
     if scheduler == 'sge':
         script = _SGE_HEADER
     elif scheduler == 'pbs':
         script = _PBS_HEADER
     elif scheduler == 'slurm':
         script = _SLURM_HEADER
+    elif scheduler == 'local':
+        script = _LOCAL_HEADER
 
     script += _BASE
-
-    # grow specific ids
-    if batch_ids is not None:
-        if scheduler == 'sge':
-            script += _CLUSTER_SGE_GROW_PARTIAL_SCRIPT
-        elif scheduler == 'pbs':
-            script += _CLUSTER_PBS_GROW_PARTIAL_SCRIPT
-        elif scheduler == 'slurm':
-            script += _CLUSTER_SLURM_GROW_PARTIAL_SCRIPT
-        batch_ids = tuple(batch_ids)
-        opts['run_stop'] = len(batch_ids)
-        opts['batch_ids'] = batch_ids
-
-    # grow all ids
-    elif crop.num_results == 0:
-        batch_ids = tuple(range(crop.num_batches))
-        if scheduler == 'sge':
-            script += _CLUSTER_SGE_GROW_ALL_SCRIPT
-        elif scheduler == 'pbs':
-            script += _CLUSTER_PBS_GROW_ALL_SCRIPT
-        elif scheduler == 'slurm':
-            script += _CLUSTER_SLURM_GROW_ALL_SCRIPT
-        opts['run_stop'] = crop.num_batches
-
-    # grow missing ids only
-    else:
-        if scheduler == 'sge':
-            script += _CLUSTER_SGE_GROW_PARTIAL_SCRIPT
-        elif scheduler == 'pbs':
-            script += _CLUSTER_PBS_GROW_PARTIAL_SCRIPT
-        elif scheduler == 'slurm':
-            script += _CLUSTER_SLURM_GROW_PARTIAL_SCRIPT
-        batch_ids = crop.missing_results()
-        opts['run_stop'] = len(batch_ids)
-        opts['batch_ids'] = batch_ids
-
-    script += _BASE_CLUSTER_SCRIPT_END
+    script += _LOCAL_GROW if scheduler == 'local' else _CLUSTER_GROW
     script = script.format(**opts)
 
-    if (scheduler == 'pbs') and len(batch_ids) == 1:
+    if (scheduler == 'pbs') and opts['run_stop'] == 1:
         # PBS can't handle arrays jobs of size 1...
         script = (script.replace('#PBS -J 1-1\n', "")
                         .replace("$PBS_ARRAY_INDEX", '1'))
@@ -1460,10 +2973,14 @@ def grow_cluster(
     hours=None,
     minutes=None,
     seconds=None,
-    gigabytes=2,
-    num_procs=1,
+    gigabytes=None,
+    num_procs=None,
     num_threads=None,
+    num_workers=None,
+    batches_per_task=None,
+    seconds_per_batch=None,
     num_nodes=1,
+    num_concurrent=None,
     launcher='python',
     setup="#",
     shell_setup="",
@@ -1472,31 +2989,57 @@ def grow_cluster(
     output_directory=None,
     extra_resources=None,
     debugging=False,
-):  # pragma: no cover
+):
     """Automagically submit SGE, PBS, or slurm jobs to grow all missing
-    results.
+    results, or run them as local processes.
 
     Parameters
     ----------
     crop : Crop
         The crop to grow.
-    scheduler : {'sge', 'pbs', 'slurm'}
-        Whether to use a SGE, PBS or slurm submission script template.
+    scheduler : {'sge', 'pbs', 'slurm', 'local'}
+        Whether to use a SGE, PBS or slurm submission script template, or a
+        script that runs the tasks as local processes, ``num_concurrent`` at
+        a time, e.g. on a large node without a scheduler.
     batch_ids : int or tuple[int]
-        Which batch numbers to grow, defaults to all missing batches.
+        Which batch numbers to grow, defaults to all missing batches, apart
+        from those currently claimed by a live process.
     hours : int
-        How many hours to request, default=0.
+        How many hours to request. If none of ``hours``, ``minutes`` and
+        ``seconds`` are given, the walltime suggested by
+        :meth:`Crop.suggest_batching` with ``apply=True``, else one hour.
     minutes : int, optional
-        How many minutes to request, default=20.
+        How many minutes to request.
     seconds : int, optional
         How many seconds to request, default=0.
     gigabytes : int, optional
-        How much memory to request, default: 2.
+        How much memory to request, by default that suggested by
+        :meth:`Crop.suggest_batching` with ``apply=True``, else 2.
     num_procs : int, optional
-        How many processes to request (threaded cores or MPI), default: 1.
+        How many processes to request (threaded cores or MPI), by default
+        that suggested by :meth:`Crop.suggest_batching` with ``apply=True``,
+        else 1.
+    num_threads : int, optional
+        How many threads each process should use, by default ``num_procs``
+        divided by ``num_workers``, or ``1`` if ``mpi=True``.
+    num_workers : int or bool, optional
+        If given, grow the cases of each batch in parallel with a local pool
+        of this many processes, or ``num_procs`` processes if ``True``.
+    batches_per_task : int, optional
+        Grow this many consecutive batches in each task of the job array,
+        rather than one, to avoid overloading the scheduler with many small
+        tasks and paying the start-up cost of each.
+    seconds_per_batch : float, optional
+        An estimate of how long each batch takes to grow, if given (and
+        ``batches_per_task`` is not), pack as many batches into each task as
+        fit into the requested walltime.
+    num_concurrent : int, optional
+        For ``scheduler='local'``, how many tasks to run at once, by default
+        the number of cpus divided by ``num_procs``.
     launcher : str, optional
-        How to launch the script, default: ``'python'``. But could for example
-        be ``'mpiexec python'`` for a MPI program.
+        How to launch python, default: ``'python'``. But could for example
+        be ``'mpiexec python'`` for a MPI program. Each task runs
+        ``{launcher} -m xyzpy grow ...``.
     setup : str, optional
         Python script to run before growing, for things that shouldnt't be put
         in the crop function itself, e.g. one-time imports with side-effects
@@ -1505,20 +3048,34 @@ def grow_cluster(
         Commands to be run by the shell before the python script is executed.
         E.g. ``conda activate my_env``.
     mpi : bool, optional
-        Request MPI processes not threaded processes.
+        Request MPI processes not threaded processes. The tasks, like any
+        launched with ``mpiexec``, then don't claim their batches, since the
+        ranks of each couldn't agree on which to grow.
     temp_gigabytes : int, optional
         How much temporary on-disk memory.
     output_directory : str, optional
         What directory to write output to. Defaults to "$HOME/Scratch/output".
+        For ``scheduler='local'`` the output of each task is written to
+        ``"{output_directory}/{crop.name}.{task_id}.log"``.
     extra_resources : str, optional
         Extra "#$ -l" resources, e.g. 'gpu=1'
     debugging : bool, optional
         Set the python log level to debugging.
+
+    Returns
+    -------
+    subprocess.Popen or None
+        For ``scheduler='local'``, the process running the tasks, which can
+        be waited on.
     """
     if crop.is_ready_to_reap():
         print("Crop ready to reap: nothing to submit.")
         return
 
+    if (batch_ids is None) and not crop.missing_results(skip_claimed=True):
+        print("All missing batches are being grown: nothing to submit.")
+        return
+
     import subprocess
 
     script = gen_cluster_script(
@@ -1531,7 +3088,11 @@ def grow_cluster(
         output_directory=output_directory,
         num_procs=num_procs,
         num_threads=num_threads,
+        num_workers=num_workers,
+        batches_per_task=batches_per_task,
+        seconds_per_batch=seconds_per_batch,
         num_nodes=num_nodes,
+        num_concurrent=num_concurrent,
         launcher=launcher,
         setup=setup,
         shell_setup=shell_setup,
@@ -1540,6 +3101,11 @@ def grow_cluster(
         debugging=debugging,
     )
 
+    if scheduler == 'local':
+        # run in the background, as if submitted, in this environment
+        return subprocess.Popen(['bash', '-c', script],
+                                start_new_session=True)
+
     script_file = os.path.join(crop.location, "__qsub_script__.sh")
 
     with open(script_file, mode='w') as f:
@@ -1568,7 +3134,8 @@ def gen_qsub_script(
     crop : Crop
         The crop to grow.
     batch_ids : int or tuple[int]
-        Which batch numbers to grow, defaults to all missing batches.
+        Which batch numbers to grow, defaults to all missing batches, apart
+        from those currently claimed by a live process.
     scheduler : {'sge', 'pbs'}, optional
         Whether to use a SGE or PBS submission script template.
     kwargs
@@ -1592,7 +3159,8 @@ def qsub_grow(
     crop : Crop
         The crop to grow.
     batch_ids : int or tuple[int]
-        Which batch numbers to grow, defaults to all missing batches.
+        Which batch numbers to grow, defaults to all missing batches, apart
+        from those currently claimed by a live process.
     scheduler : {'sge', 'pbs'}, optional
         Whether to use a SGE or PBS submission script template.
     kwargs
@@ -1620,3 +3188,7 @@ Crop.grow_pbs = functools.partialmethod(Crop.grow_cluster, scheduler='pbs')
 Crop.gen_slurm_script = functools.partialmethod(Crop.gen_cluster_script,
                                                 scheduler='slurm')
 Crop.grow_slurm = functools.partialmethod(Crop.grow_cluster, scheduler='slurm')
+
+Crop.gen_local_script = functools.partialmethod(Crop.gen_cluster_script,
+                                                scheduler='local')
+Crop.grow_local = functools.partialmethod(Crop.grow_cluster, scheduler='local')
@@ -2,8 +2,13 @@
 """
 
 import os
+import glob
+import json
+import time
+import uuid
 import shutil
 import functools
+import threading
 
 import numpy as np
 import pandas as pd
@@ -23,7 +28,14 @@ from .prepare import (
 )
 from .combo_runner import combo_runner_to_ds
 from .case_runner import case_runner_to_ds
-from ..manage import load_ds, save_ds, load_df, save_df
+from ..manage import (
+    load_ds,
+    save_ds,
+    load_df,
+    save_df,
+    auto_add_extension,
+    append_merge_zarr,
+)
 from . import cropping
 
 
@@ -233,7 +245,10 @@ class Runner(object):
              parent_dir=None,
              save_fn=None,
              batchsize=None,
-             num_batches=None):
+             num_batches=None,
+             storage=None,
+             codec=None,
+             zarr_store=None):
         """Return a Crop instance with this runner, from which ``fn``
         will be set, and then combos can be sown, grown, and reaped into the
         ``Runner.last_ds``. See :class:`~xyzpy.Crop`.
@@ -244,7 +259,8 @@ class Runner(object):
         """
         return cropping.Crop(farmer=self, name=name, parent_dir=parent_dir,
                              save_fn=save_fn, batchsize=batchsize,
-                             num_batches=num_batches)
+                             num_batches=num_batches, storage=storage,
+                             codec=codec, zarr_store=zarr_store)
 
     def __repr__(self):
         string = "<xyzpy.Runner>\n"
@@ -365,6 +381,41 @@ def label(var_names,
 #                                 HARVESTER                                   #
 # --------------------------------------------------------------------------- #
 
+# attributes recording how each shard is merged, and which shards have
+#     already been compacted into the full dataset, by name since shards
+#     can appear out of order
+_SHARD_OVERWRITE = 'xyzpy_shard_overwrite'
+_MERGED_SHARDS = 'xyzpy_merged_shards'
+
+
+def _merge_ds(old_ds, new_ds, overwrite=None):
+    """Merge ``new_ds`` into ``old_ds``, see :meth:`Harvester.add_ds`.
+    """
+    # Overwrite with new data
+    if overwrite is True:
+        return new_ds.combine_first(old_ds)
+    # Overwrite nothing
+    if overwrite is False:
+        return old_ds.combine_first(new_ds)
+    # Merge, raising error if the two datasets conflict
+    return old_ds.merge(new_ds, compat='no_conflicts', join='outer')
+
+
+def _load_part(ds, select):
+    """Load only ``select(ds)`` into memory, then close ``ds``.
+    """
+    part = select(ds).load()
+    ds.close()
+    return part
+
+
+def _overlap(ds, new_ds):
+    """The part of ``ds`` at the coordinates of ``new_ds``.
+    """
+    return ds.sel({dim: ds.indexes[dim].intersection(new_ds.indexes[dim])
+                   for dim in new_ds.indexes if dim in ds.indexes})
+
+
 class Harvester(object):
     """Container class for collecting and aggregating data to disk.
 
@@ -399,6 +450,7 @@ class Harvester(object):
         self.engine = engine
         self.chunks = chunks
         self._full_ds = full_ds
+        self._merged_shards = ()
 
     @property
     def fn(self):
@@ -434,20 +486,166 @@ class Harvester(object):
         if chunks is None:
             chunks = self.chunks
 
+        full_ds, merged_shards = self._merge_disk_ds(engine, chunks=chunks)
+
+        if full_ds is not None:
+            self._full_ds = full_ds
+            self._merged_shards = merged_shards
+
+    def _merge_disk_ds(self, engine, chunks=None, select=None):
+        """Merge the on-disk dataset with any shards written since the last
+        compaction, returning the result and the names of all the shards it
+        includes. If ``select`` is given, only ``select(ds)`` of each is
+        loaded.
+        """
+        fname = auto_add_extension(self.data_name, engine)
+        load_to_mem = False if select is not None else None
+        full_ds = None
+        compacted = ()
+
         # Check file exists and can be written to
-        if os.access(self.data_name, os.W_OK):
-            self._full_ds = load_ds(self.data_name,
-                                    engine=engine,
-                                    chunks=chunks)
+        if os.access(fname, os.W_OK):
+            full_ds = load_ds(fname, engine=engine, chunks=chunks,
+                              load_to_mem=load_to_mem)
+            compacted = json.loads(full_ds.attrs.pop(_MERGED_SHARDS, '[]'))
 
         # Do nothing if file does not exist at all
-        elif not os.path.isfile(self.data_name):  # pragma: no cover
+        elif not os.path.isfile(fname):  # pragma: no cover
             pass
 
         # Catch read-only errors etc.
         else:
             raise OSError("The file '{}' exists but cannot be written "
-                          "to".format(self.data_name))
+                          "to".format(fname))
+
+        if (full_ds is not None) and (select is not None):
+            full_ds = _load_part(full_ds, select)
+
+        # fold in any shards not yet compacted, in order
+        merged_shards = []
+        for fname in self.shard_files(engine=engine):
+            name = os.path.basename(fname)
+            merged_shards.append(name)
+            if name in compacted:
+                # compacted, but not yet removed
+                continue
+
+            ds = load_ds(fname, engine=engine, chunks=chunks,
+                         load_to_mem=load_to_mem)
+            overwrite = {'True': True, 'False': False}.get(
+                ds.attrs.pop(_SHARD_OVERWRITE, None))
+            if select is not None:
+                ds = _load_part(ds, select)
+
+            if full_ds is None:
+                full_ds = ds
+            else:
+                try:
+                    full_ds = _merge_ds(full_ds, ds, overwrite)
+                except xr.MergeError as e:
+                    raise xr.MergeError(
+                        f"The shard '{fname}' conflicts with the data "
+                        "harvested before it, remove it and harvest its "
+                        f"data again with ``overwrite`` set. {e}") from e
+
+        return full_ds, tuple(merged_shards)
+
+    def shard_files(self, engine=None):
+        """The shards written by ``add_ds(..., sync='shard')`` that have not
+        been removed by :meth:`compact` yet, oldest first.
+        """
+        if engine is None:
+            engine = self.engine
+
+        base, ext = os.path.splitext(
+            auto_add_extension(self.data_name, engine))
+        return sorted(glob.glob(f"{glob.escape(base)}.shard-*{ext}"))
+
+    def _check_shard(self, new_ds, engine):
+        """Raise if ``new_ds`` conflicts with the data harvested so far, only
+        loading the part of that at the coordinates of ``new_ds``.
+        """
+        old_ds, _ = self._merge_disk_ds(
+            engine, select=functools.partial(_overlap, new_ds=new_ds))
+        if old_ds is not None:
+            _merge_ds(old_ds, new_ds)
+
+    def _write_shard(self, new_ds, overwrite=None, engine=None):
+        base, ext = os.path.splitext(
+            auto_add_extension(self.data_name, engine))
+        # sorting by name sorts by time, the suffix avoids collisions
+        fname = (f"{base}.shard-{time.time_ns():020d}-"
+                 f"{uuid.uuid4().hex[:8]}{ext}")
+
+        new_ds = new_ds.copy()
+        new_ds.attrs[_SHARD_OVERWRITE] = str(overwrite)
+
+        # write to a temporary file first so that shards are never partial
+        save_ds(new_ds, fname + '.tmp', engine=engine)
+        os.replace(fname + '.tmp', fname)
+
+    def _remove_shards(self, merged_shards, engine=None):
+        """Remove the shards named ``merged_shards``, once they have been
+        merged into the full on-disk dataset.
+        """
+        if engine is None:
+            engine = self.engine
+
+        data_dir = os.path.dirname(auto_add_extension(self.data_name, engine))
+        num_removed = 0
+        for name in merged_shards:
+            fname = os.path.join(data_dir, name)
+            try:
+                os.remove(fname)
+                num_removed += 1
+            except FileNotFoundError:  # pragma: no cover
+                # removed by a concurrent compaction
+                pass
+        return num_removed
+
+    def compact(self, engine=None, background=False):
+        """Merge the shards written by ``add_ds(..., sync='shard')`` into the
+        full on-disk dataset, which is replaced atomically, then remove them.
+        Shards written meanwhile, e.g. by other processes, are left for the
+        next compaction.
+
+        Parameters
+        ----------
+        engine : str, optional
+            Engine to use to save and load datasets.
+        background : bool, optional
+            If True, compact in a background thread, which is returned.
+            Datasets already loaded lazily, with ``chunks``, might still
+            reference the removed shards.
+
+        Returns
+        -------
+        num_compacted : int or threading.Thread
+            The number of shards compacted, or the thread doing so.
+        """
+        if background:
+            thread = threading.Thread(
+                target=self.compact, kwargs={'engine': engine}, daemon=True)
+            thread.start()
+            return thread
+
+        if engine is None:
+            engine = self.engine
+
+        if not self.shard_files(engine=engine):
+            return 0
+
+        # load into a separate harvester to leave this one untouched
+        harvester = Harvester(self.runner, self.data_name, engine=engine)
+        harvester.load_full_ds()
+        full_ds = harvester._full_ds.copy()
+        full_ds.attrs[_MERGED_SHARDS] = json.dumps(harvester._merged_shards)
+
+        fname = auto_add_extension(self.data_name, engine)
+        save_ds(full_ds, fname + '.tmp', engine=engine)
+        os.replace(fname + '.tmp', fname)
+
+        return self._remove_shards(harvester._merged_shards, engine=engine)
 
     @property
     def full_ds(self):
@@ -480,26 +678,41 @@ class Harvester(object):
             if self._full_ds is not None:
                 self._full_ds.close()
 
-            if os.path.exists(self.data_name):
+            # with shards the old dataset is instead replaced atomically
+            if os.path.exists(self.data_name) and not self._merged_shards:
                 if engine == 'zarr':
                     shutil.rmtree(self.data_name)
                 else:
                     os.remove(self.data_name)
             self._full_ds = new_full_ds
 
-        save_ds(self._full_ds, self.data_name, engine=engine)
+        if not self._merged_shards:
+            save_ds(self._full_ds, self.data_name, engine=engine)
+        else:
+            # record which shards the full dataset now includes, and only
+            #     remove them once it has fully replaced the old one
+            full_ds = self._full_ds.copy()
+            full_ds.attrs[_MERGED_SHARDS] = json.dumps(self._merged_shards)
+            fname = auto_add_extension(self.data_name, engine)
+            save_ds(full_ds, fname + '.tmp', engine=engine)
+            os.replace(fname + '.tmp', fname)
+            self._remove_shards(self._merged_shards, engine=engine)
 
     def delete_ds(self, backup=False):
         """Delete the on-disk dataset, optionally backing it up first.
         """
-        from ..manage import auto_add_extension
-
         file_name = auto_add_extension(self.data_name, self.engine)
+        shards = self.shard_files()
+
+        # only shards might have been written so far
+        file_names = [file_name] if os.path.exists(file_name) or \
+            not shards else []
 
         if backup:
             import datetime
             ts = '{:%Y%m%d-%H%M%S}'.format(datetime.datetime.now())
-            shutil.copy(file_name, file_name + '.BAK-{}'.format(ts))
+            for fname in file_names + shards:
+                shutil.copy(fname, fname + '.BAK-{}'.format(ts))
 
         if self._full_ds is not None:
             self._full_ds.close()
@@ -507,7 +720,9 @@ class Harvester(object):
         if self.engine == 'zarr':
             shutil.rmtree(file_name)
         else:
-            os.remove(file_name)
+            for fname in file_names + shards:
+                os.remove(fname)
+        self._merged_shards = ()
 
     def add_ds(self, new_ds,
                sync=True,
@@ -520,9 +735,22 @@ class Harvester(object):
         ----------
         new_ds : xr.Dataset or xr.DataArray
             Data to be merged into the full dataset.
-        sync : bool, optional
+        sync : {True, False, 'append', 'shard'}, optional
             If True (default), load and save the disk dataset before
-            and after merging in the new data.
+            and after merging in the new data. If ``'append'``, and
+            ``engine='zarr'``, instead write the new data straight into the
+            on-disk dataset, see :func:`~xyzpy.manage.append_merge_zarr`,
+            such that the cost only scales with the size of the new data.
+            If ``'shard'``, and not ``engine='zarr'``, write the new data
+            as a separate file next to the full dataset, which is merged
+            in, according to ``overwrite``, whenever the full dataset is
+            loaded, until :meth:`compact` is called. Any number of
+            processes can harvest like this at once. With
+            ``overwrite=None``, the new data is first checked against only
+            the part of the data already harvested at its coordinates, and
+            conflicts raise straight away. Shards written concurrently can
+            still conflict, in which case loading the full dataset raises,
+            naming the shard to remove.
         overwrite : {None, False, True}, optional
             How to combine data from the new run into the current full_ds:
 
@@ -549,6 +777,48 @@ class Harvester(object):
 
         # only sync with disk if data name present
         sync_with_disk = sync and (self.data_name is not None)
+
+        if sync_with_disk and (sync == 'append'):
+            if engine is None:
+                engine = self.engine
+            if engine != 'zarr':
+                raise XYZError("Syncing with ``sync='append'`` requires "
+                               "``engine='zarr'``.")
+
+            # the first time round the full dataset still needs saving
+            if os.path.exists(auto_add_extension(self.data_name, engine)):
+                if self._full_ds is not None:
+                    self._full_ds.close()
+                self._full_ds = None
+                append_merge_zarr(new_ds, self.data_name,
+                                  overwrite=overwrite)
+                return
+
+        if sync_with_disk and (sync == 'shard'):
+            if engine is None:
+                engine = self.engine
+            if engine == 'zarr':
+                raise XYZError("Syncing with ``sync='shard'`` requires a "
+                               "file based engine, use ``sync='append'`` "
+                               "with ``engine='zarr'``.")
+
+            # data only in memory so far needs saving as the full dataset
+            fname = auto_add_extension(self.data_name, engine)
+            if ((self._full_ds is not None) and (not self._merged_shards)
+                    and not os.path.exists(fname)):
+                self.save_full_ds(engine=engine)
+
+            if overwrite is None:
+                # raise now, rather than every time the shards are merged
+                self._check_shard(new_ds, engine=engine)
+
+            self._write_shard(new_ds, overwrite=overwrite, engine=engine)
+            # the full dataset is merged from the shards when next needed
+            if self._full_ds is not None:
+                self._full_ds.close()
+            self._full_ds = None
+            return
+
         if sync_with_disk:
             self.load_full_ds(chunks=chunks, engine=engine)
 
@@ -558,16 +828,7 @@ class Harvester(object):
             new_full_ds = new_ds.copy(deep=True)
 
         else:
-            # Overwrite with new data
-            if overwrite is True:
-                new_full_ds = new_ds.combine_first(self._full_ds)
-            # Overwrite nothing
-            elif overwrite is False:
-                new_full_ds = self._full_ds.combine_first(new_ds)
-            # Merge, raising error if the two datasets conflict
-            else:
-                new_full_ds = self._full_ds.merge(
-                    new_ds, compat='no_conflicts')
+            new_full_ds = _merge_ds(self._full_ds, new_ds, overwrite)
 
         if sync_with_disk:
             self.save_full_ds(new_full_ds, engine=engine)
@@ -630,9 +891,11 @@ class Harvester(object):
             The combos to run. The only difference here is that you can supply
             an ellipse ``...``, meaning the all values for that coordinate will
             be loaded from the current full dataset.
-        sync : bool, optional
+        sync : {True, False, 'append', 'shard'}, optional
             If True (default), load and save the disk dataset before
-            and after merging in the new data.
+            and after merging in the new data, or if ``'append'`` or
+            ``'shard'``, write just the new data to disk, see
+            :meth:`~xyzpy.Harvester.add_ds`.
         overwrite : {None, False, True}, optional
 
             - ``None`` (default): attempt the merge and only raise if
@@ -669,9 +932,11 @@ class Harvester(object):
         ---------
         cases : list of dict or tuple
             The cases to run.
-        sync : bool, optional
+        sync : {True, False, 'append', 'shard'}, optional
             If True (default), load and save the disk dataset before
-            and after merging in the new data.
+            and after merging in the new data, or if ``'append'`` or
+            ``'shard'``, write just the new data to disk, see
+            :meth:`~xyzpy.Harvester.add_ds`.
         overwrite : {None, False, True}, optional
             What to do regarding clashes with old data:
 
@@ -698,7 +963,10 @@ class Harvester(object):
              parent_dir=None,
              save_fn=None,
              batchsize=None,
-             num_batches=None):
+             num_batches=None,
+             storage=None,
+             codec=None,
+             zarr_store=None):
         """Return a Crop instance with this Harvester, from which `fn`
         will be set, and then combos can be sown, grown, and reaped into the
         ``Harvester.full_ds``. See :class:`~xyzpy.Crop`.
@@ -709,7 +977,8 @@ class Harvester(object):
         """
         return cropping.Crop(farmer=self, name=name, parent_dir=parent_dir,
                              save_fn=save_fn, batchsize=batchsize,
-                             num_batches=num_batches)
+                             num_batches=num_batches, storage=storage,
+                             codec=codec, zarr_store=zarr_store)
 
     def __repr__(self):
         string = ("<xyzpy.Harvester>\n"
@@ -737,6 +1006,11 @@ class Sampler:
     engine : {'pickle', 'csv', 'json', 'hdf', ...}, optional
         How to save and load the on-disk dataframe. See
         :func:`~xyzpy.manage.load_df` and :func:`~xyzpy.manage.save_df`.
+    arrow : bool, optional
+        If True, build and store the data as ``pyarrow.Table`` instances
+        rather than ``pandas.DataFrame``, avoiding copying the columns. In
+        this case ``engine`` should be one of ``{'parquet', 'feather',
+        'pickle'}``.
 
     Attributes
     ----------
@@ -747,7 +1021,7 @@ class Sampler:
     """
 
     def __init__(self, runner, data_name=None, default_combos=None,
-                 full_df=None, engine='pickle'):
+                 full_df=None, engine='pickle', arrow=False):
         self.runner = runner
         self.data_name = data_name
         self.default_combos = ({} if default_combos is None
@@ -755,6 +1029,7 @@ class Sampler:
         self._full_df = full_df
         self._last_df = None
         self.engine = engine
+        self.arrow = arrow
 
     @property
     def fn(self):
@@ -772,7 +1047,8 @@ class Sampler:
 
         # Check file exists and can be written to
         if os.access(self.data_name, os.W_OK):
-            self._full_df = load_df(self.data_name, engine=engine)
+            self._full_df = load_df(self.data_name, engine=engine,
+                                    arrow=self.arrow)
 
         # Do nothing if file does not exist at all
         elif not os.path.isfile(self.data_name):  # pragma: no cover
@@ -833,23 +1109,43 @@ class Sampler:
 
         Parameters
         ----------
-        new_df : pandas.DataFrame or dict
+        new_df : pandas.DataFrame, pyarrow.Table or dict
             Data to be appended to the full dataset.
         sync : bool, optional
             If True (default), load and save the disk dataframe before
-            and after merging in the new data.
+            and after merging in the new data. Unlike for a
+            :class:`Harvester`, ``'append'`` and ``'shard'`` are not
+            supported.
         engine : str, optional
             Which engine to save the dataframe with.
         """
         if isinstance(new_df, dict):
-            new_df = pd.DataFrame(new_df)
+            if self.arrow:
+                import pyarrow as pa
+                new_df = pa.table(new_df)
+            else:
+                new_df = pd.DataFrame(new_df)
+
+        if sync in ('append', 'shard'):
+            # only the datasets of a ``Harvester`` can be synced this way
+            raise XYZError(f"``sync='{sync}'`` is not supported by a "
+                           "``Sampler``, use ``sync=True``.")
 
         # only sync with disk if data name present
         sync_with_disk = sync and (self.data_name is not None)
+
         if sync_with_disk:
             self.load_full_df(engine=engine)
 
-        if self._full_df is None:
+        if self.arrow:
+            # arrow tables are immutable and concatenate without copying
+            import pyarrow as pa
+            if self._full_df is None:
+                new_full_df = new_df
+            else:
+                new_full_df = pa.concat_tables(
+                    [self._full_df, new_df], promote_options='default')
+        elif self._full_df is None:
             # No full df yet, deep copy to maintain distinction between
             #   'full_df' and 'last_df'.
             new_full_df = new_df.copy(deep=True)
@@ -901,8 +1197,9 @@ class Sampler:
             :func:`~xyzpy.combo_runner`. This includes ``parallel=True`` etc.
         """
         fn_args, cases = self.gen_cases_fnargs(n, combos)
-        last_df = self.runner.run_cases(cases, fn_args=fn_args,
-                                        to_df=True, **case_runner_settings)
+        last_df = self.runner.run_cases(cases, fn_args=fn_args, to_df=True,
+                                        arrow=self.arrow,
+                                        **case_runner_settings)
         self._last_df = last_df
         self.add_df(last_df, engine=engine)
         return last_df
@@ -914,6 +1211,8 @@ class Sampler:
         save_fn=None,
         batchsize=None,
         num_batches=None,
+        storage=None,
+        codec=None,
     ):
         """Return a Crop instance with this Sampler, from which `fn`
         will be set, and then samples can be sown, grown, and reaped into the
@@ -925,7 +1224,8 @@ class Sampler:
         """
         return cropping.Crop(farmer=self, name=name, parent_dir=parent_dir,
                              save_fn=save_fn, batchsize=batchsize,
-                             num_batches=num_batches)
+                             num_batches=num_batches, storage=storage,
+                             codec=codec)
 
     def __repr__(self):
         string = ("<xyzpy.Sampler>\n"
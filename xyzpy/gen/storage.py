@@ -0,0 +1,1609 @@
+"""Backends for storing the batches, results and progress of a
+:class:`~xyzpy.Crop`.
+"""
+import abc
+import os
+import re
+import io
+import glob
+import json
+import math
+import time
+import pickle
+import select
+import socket
+import struct
+import threading
+import zipfile
+import zlib
+
+import numpy as np
+
+
+BTCH_NM = "xyz-batch-{}.jbdmp"
+RSLT_NM = "xyz-result-{}.jbdmp"
+MARK_NM = "xyz-marked-{}.flag"
+CLAIM_NM = "xyz-claim-{}.lock"
+CHKPT_NM = "xyz-checkpoint-{}.jbdmp"
+PRGS_NM = "xyz-progress.bin"
+MNFST_NM = "xyz-manifest.jsonl"
+TLMTRY_NM = "xyz-telemetry.jsonl"
+PACK_NM = "xyz-pack-{}.zip"
+SQLITE_NM = "xyz-storage.sqlite"
+
+# seconds after its last heartbeat that a claim is assumed dead
+DEFAULT_LEASE = 120.0
+
+
+def result_entry(result, data):
+    """The metadata recorded in the manifest for ``result``, serialized as
+    ``data``, by which it can later be checked without loading it.
+    """
+    return {'num_cases': len(result), 'nbytes': len(data),
+            'crc32': zlib.crc32(data)}
+
+
+def append_line(fname, line):
+    """Append ``line`` to ``fname`` with a single write, such that lines
+    appended by several processes at once don't interleave.
+    """
+    fd = os.open(fname, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (line + "\n").encode())
+    finally:
+        os.close(fd)
+
+
+def read_lines(fname):
+    """Parse every line of a JSON lines file, written with
+    :func:`append_line`, into a list of mappings, each with an ``'id'``.
+    Lines that can't be parsed, e.g. mangled by appends from several nodes,
+    are skipped.
+    """
+    try:
+        with open(fname, 'rb') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+    entries = []
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict) and ('id' in entry):
+            entries.append(entry)
+    return entries
+
+
+def dumps(obj, compress=False):
+    """Pickle ``obj``, optionally compressing it with ``zlib``.
+
+    Parameters
+    ----------
+    obj : object
+        The object to serialize.
+    compress : bool or int, optional
+        Whether to compress, or if an integer, the zlib compression level.
+    """
+    data = pickle.dumps(obj)
+    if compress:
+        data = zlib.compress(data, -1 if compress is True else compress)
+    return data
+
+
+def loads(data):
+    """The inverse of :func:`dumps` and :meth:`ResultCodec.encode`, detecting
+    the format and any compression automatically.
+    """
+    if data[:len(_CODEC_MAGIC)] == _CODEC_MAGIC:
+        return _decode_container(data)
+    # pickles using protocol 2 and above always start with this opcode
+    if data[:1] != pickle.PROTO:
+        data = zlib.decompress(data)
+    return pickle.loads(data)
+
+
+def write_to_disk(obj, fname, compress=False):
+    return write_bytes_to_disk(dumps(obj, compress=compress), fname)
+
+
+def write_bytes_to_disk(data, fname):
+    with open(fname, 'wb') as file:
+        file.write(data)
+    return len(data)
+
+
+def read_from_disk(fname):
+    with open(fname, 'rb') as file:
+        return loads(file.read())
+
+
+def atomic_write_to_disk(obj, fname, data=None):
+    """Write ``obj``, or if given, the already serialized ``data``, to
+    ``fname`` via a temporary file and rename, so that other processes never
+    see a partially written file.
+    """
+    if data is None:
+        data = dumps(obj)
+    directory, name = os.path.split(fname)
+    tmp_fname = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    write_bytes_to_disk(data, tmp_fname)
+    os.replace(tmp_fname, fname)
+
+
+# ------------------------------ result codecs ------------------------------ #
+
+# distinct from both the pickle and zlib headers
+_CODEC_MAGIC = b"\x93XYZ"
+
+
+class _Zlib:
+    """Minimal stand-in for ``numcodecs.Zlib``, so that plain compression
+    doesn't require ``numcodecs``.
+    """
+
+    def __init__(self, level=-1):
+        self.level = level
+
+    def encode(self, buf):
+        return zlib.compress(buf, self.level)
+
+    def decode(self, buf):
+        return zlib.decompress(buf)
+
+    def get_config(self):
+        return {'id': 'zlib', 'level': self.level}
+
+
+def get_compressor(compressor):
+    """Parse ``compressor`` into an object with ``encode``, ``decode`` and
+    ``get_config`` methods, or ``None``.
+
+    Parameters
+    ----------
+    compressor : None, bool, str, dict or numcodecs codec
+        ``True`` or ``'zlib'`` uses the built-in ``zlib``. Any other string,
+        e.g. ``'lz4'``, ``'zstd'`` or ``'blosc'``, or a configuration dict
+        like ``{'id': 'zstd', 'level': 3}``, is looked up with
+        ``numcodecs.get_codec``, which must be installed.
+    """
+    if compressor is None or compressor is False:
+        return None
+    if compressor is True:
+        compressor = 'zlib'
+    if isinstance(compressor, str):
+        compressor = {'id': compressor}
+    if not isinstance(compressor, dict):
+        return compressor
+
+    if compressor['id'] == 'zlib':
+        return _Zlib(compressor.get('level', -1))
+
+    try:
+        import numcodecs
+    except ImportError:
+        raise ImportError(f"The compressor '{compressor['id']}' requires "
+                          "``numcodecs`` to be installed.")
+    return numcodecs.get_codec(compressor)
+
+
+def _encode_container(header, payload, compressor):
+    if compressor is not None:
+        header['compressor'] = compressor.get_config()
+        payload = compressor.encode(payload)
+    header = json.dumps(header).encode()
+    return b"".join((_CODEC_MAGIC, struct.pack('<I', len(header)),
+                     header, payload))
+
+
+def _parse_container_header(data):
+    """Get the header and offset of the payload of encoded ``data``, of
+    which only the start need be supplied.
+    """
+    i = len(_CODEC_MAGIC)
+    size, = struct.unpack('<I', data[i:i + 4])
+    header = json.loads(bytes(data[i + 4:i + 4 + size]))
+    return header, i + 4 + size
+
+
+def _decode_container(data):
+    header, offset = _parse_container_header(data)
+    payload = memoryview(data)[offset:]
+    if header.get('compressor') is not None:
+        payload = get_compressor(header['compressor']).decode(payload)
+
+    if header['codec'] == 'pickle':
+        return pickle.loads(payload)
+
+    buffer = io.BytesIO(payload)
+    arrays = [np.lib.format.read_array(buffer, allow_pickle=False)
+              for _ in range(header['num_arrays'])]
+    return _unstack_results(arrays, header['outputs'])
+
+
+def _stack_results(result):
+    """Stack a grown batch - a tuple with the output(s) of each case - into
+    one array per output, if every output is a numpy array with consistent
+    shape and dtype. Return ``None`` if this isn't possible.
+    """
+    if not isinstance(result, tuple) or not result:
+        return None
+
+    first = result[0]
+    if isinstance(first, np.ndarray):
+        outputs, columns = None, (result,)
+    elif isinstance(first, tuple) and first:
+        outputs = len(first)
+        if any(not isinstance(r, tuple) or len(r) != outputs
+               for r in result):
+            return None
+        columns = tuple(zip(*result))
+    else:
+        return None
+
+    arrays = []
+    for column in columns:
+        x0 = column[0]
+        if not isinstance(x0, np.ndarray) or x0.dtype.hasobject:
+            return None
+        if any(not isinstance(x, np.ndarray) or x.shape != x0.shape or
+               x.dtype != x0.dtype for x in column):
+            return None
+        arrays.append(np.stack(column))
+
+    return arrays, outputs
+
+
+def _unstack_results(arrays, outputs):
+    if outputs is None:
+        return tuple(arrays[0])
+    return tuple(zip(*arrays))
+
+
+class ResultCodec(abc.ABC):
+    """Base class for how the results of each grown batch are serialized.
+    Whatever the codec, results are always read back by detecting their
+    format, so a crop's codec can be changed at any point.
+
+    Parameters
+    ----------
+    compressor : None, bool, str, dict or numcodecs codec, optional
+        How to compress the serialized results, see
+        :func:`get_compressor`.
+    """
+
+    name = None
+
+    def __init__(self, compressor=None):
+        self.compressor = compressor
+
+    @abc.abstractmethod
+    def encode(self, result):
+        """Serialize ``result`` into bytes.
+        """
+
+    def spec(self):
+        """How to record this codec in a crop's settings.
+        """
+        compressor = get_compressor(self.compressor)
+        if compressor is not None:
+            compressor = compressor.get_config()
+        return (self.name, compressor)
+
+    def __repr__(self):
+        return (f"<{self.__class__.__name__}("
+                f"compressor={self.compressor!r})>")
+
+
+class PickleCodec(ResultCodec):
+    """Pickle the results - the default, which works for any result.
+    """
+
+    name = 'pickle'
+
+    def encode(self, result):
+        data = pickle.dumps(result)
+        compressor = get_compressor(self.compressor)
+        if compressor is None:
+            return data
+        return _encode_container({'codec': 'pickle'}, data, compressor)
+
+
+class NpyCodec(ResultCodec):
+    """Store the results as raw ``.npy`` format arrays, one per function
+    output, stacked over the cases of the batch. This avoids pickle entirely
+    and, when uncompressed and stored as files, allows the results to be
+    memory-mapped when reaped. Results which are not all numpy arrays of
+    matching shape and dtype fall back to being pickled.
+    """
+
+    name = 'npy'
+
+    def encode(self, result):
+        stacked = _stack_results(result)
+        if stacked is None:
+            return PickleCodec(self.compressor).encode(result)
+
+        arrays, outputs = stacked
+        buffer = io.BytesIO()
+        for x in arrays:
+            np.lib.format.write_array(buffer, x, allow_pickle=False)
+
+        header = {'codec': 'npy', 'outputs': outputs,
+                  'num_arrays': len(arrays)}
+        return _encode_container(header, buffer.getvalue(),
+                                 get_compressor(self.compressor))
+
+
+def read_result_from_disk(fname, mmap=False):
+    """Read a result written by any codec from ``fname``. If ``mmap=True``,
+    and it was written uncompressed by :class:`NpyCodec`, memory-map the
+    arrays rather than reading them into memory.
+    """
+    if not mmap:
+        return read_from_disk(fname)
+
+    with open(fname, 'rb') as file:
+        start = file.read(len(_CODEC_MAGIC) + 4)
+        if start[:len(_CODEC_MAGIC)] != _CODEC_MAGIC:
+            return loads(start + file.read())
+
+        size, = struct.unpack('<I', start[len(_CODEC_MAGIC):])
+        header, offset = _parse_container_header(start + file.read(size))
+        if (header['codec'] != 'npy') or header.get('compressor'):
+            file.seek(0)
+            return loads(file.read())
+
+        arrays = []
+        for _ in range(header['num_arrays']):
+            if np.lib.format.read_magic(file) == (1, 0):
+                read_header = np.lib.format.read_array_header_1_0
+            else:
+                read_header = np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(file)
+            offset = file.tell()
+            arrays.append(np.memmap(fname, dtype=dtype, mode='r',
+                                    shape=shape, offset=offset,
+                                    order='F' if fortran_order else 'C'))
+            file.seek(offset + arrays[-1].nbytes)
+
+    return _unstack_results(arrays, header['outputs'])
+
+
+def _pwrite(fd, data, offset):
+    if hasattr(os, 'pwrite'):
+        os.pwrite(fd, data, offset)
+    else:  # pragma: no cover
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def _pread(fd, n, offset):
+    if hasattr(os, 'pread'):
+        return os.pread(fd, n, offset)
+    else:  # pragma: no cover
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, n)
+
+
+class Inotify:
+    """Minimal ``ctypes`` interface to linux's inotify, for being woken as
+    soon as the contents of a directory change, rather than polling it.
+    Note that changes made by other nodes of a network filesystem are not
+    reported.
+
+    Parameters
+    ----------
+    path : str
+        The directory to watch.
+    mask : int, optional
+        Which events to watch for, by default files being modified, closed
+        after writing, or moved into the directory.
+    """
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, path, mask=IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        # raises AttributeError if not on linux
+        init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed.")
+
+        if add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Could not watch {path}.")
+
+    def wait(self, timeout=None):
+        """Wait for at most ``timeout`` seconds for any events.
+
+        Returns
+        -------
+        names : list[str]
+            The names of the files the events happened to, empty if timed out.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+
+        names = []
+        i = 0
+        while i < len(data):
+            _, _, _, n = self._EVENT.unpack_from(data, i)
+            i += self._EVENT.size
+            names.append(os.fsdecode(data[i:i + n].rstrip(b'\0')))
+            i += n
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def default_owner():
+    """Identifier for the current process, used when claiming batches.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Heartbeat:
+    """Context manager that, from a background thread, periodically refreshes
+    the claim that ``owner`` holds on a batch, so that other processes can
+    tell it is still being grown.
+
+    Parameters
+    ----------
+    storage : CropStorage
+        The storage holding the claim.
+    batch_id : int
+        The claimed batch.
+    owner : str
+        The owner of the claim.
+    interval : float
+        How often, in seconds, to refresh the claim.
+    """
+
+    def __init__(self, storage, batch_id, owner, interval):
+        self.storage = storage
+        self.batch_id = batch_id
+        self.owner = owner
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.storage.heartbeat(self.batch_id, self.owner)
+            except Exception:  # pragma: no cover
+                # a missed heartbeat only risks the batch being regrown
+                pass
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._stop.set()
+        self._thread.join()
+
+
+class CropStorage(abc.ABC):
+    """Base class for the backend that stores the batches, results and
+    progress of a crop, located in the crop's directory. Subclasses need to
+    implement all of the abstract methods.
+
+    Parameters
+    ----------
+    location : str
+        The crop directory, ``"{parent_dir}/.xyz-{name}"``.
+    """
+
+    name = None
+
+    def __init__(self, location):
+        self.location = location
+
+    def options(self):
+        """The keyword arguments, other than ``location``, needed to recreate
+        this storage, see :func:`storage_spec`.
+        """
+        return {}
+
+    def prepare(self):
+        """Make sure this storage exists on disk.
+        """
+        os.makedirs(self.location, exist_ok=True)
+
+    def close(self):
+        """Release any resources, such as open files, held by this storage.
+        """
+        pass
+
+    # -------------------------------- batches ------------------------------ #
+
+    @abc.abstractmethod
+    def write_batch(self, batch_id, batch, compress=False):
+        """Write ``batch``, returning how many bytes it was stored as.
+        """
+
+    @abc.abstractmethod
+    def read_batch(self, batch_id):
+        """Read the batch ``batch_id``.
+        """
+
+    @abc.abstractmethod
+    def batch_ids(self):
+        """Sorted tuple of the ids of all sown batches.
+        """
+
+    def num_batches(self):
+        return len(self.batch_ids())
+
+    # -------------------------------- results ------------------------------ #
+
+    @abc.abstractmethod
+    def write_result(self, batch_id, result, codec=None):
+        """Write ``result``, serialized with the :class:`ResultCodec`
+        ``codec``, or by default pickled.
+        """
+
+    @abc.abstractmethod
+    def read_result(self, batch_id, mmap=False):
+        """Read the result of batch ``batch_id``, if possible memory-mapping
+        any arrays when ``mmap=True``.
+        """
+
+    @abc.abstractmethod
+    def mark_result(self, batch_id):
+        """Record batch ``batch_id`` as grown without storing its result,
+        for results written elsewhere, e.g. into a crop's zarr store.
+        """
+
+    @abc.abstractmethod
+    def has_result(self, batch_id):
+        """Whether batch ``batch_id`` has been grown.
+        """
+
+    @abc.abstractmethod
+    def delete_result(self, batch_id):
+        """Delete the result of batch ``batch_id``.
+        """
+
+    @abc.abstractmethod
+    def result_ids(self):
+        """Sorted tuple of the ids of all grown batches.
+        """
+
+    def num_results(self):
+        return len(self.result_ids())
+
+    def missing_results(self, num_batches):
+        """Tuple of the ids, out of ``1, ..., num_batches``, that haven't been
+        grown yet.
+        """
+        done = set(self.result_ids())
+        return tuple(i for i in range(1, num_batches + 1) if i not in done)
+
+    def result_manifest(self):
+        """Mapping of each result id to the entry, see :func:`result_entry`,
+        recorded when it was written. Results without an entry, e.g. written
+        by older versions, are missing.
+        """
+        return {}
+
+    @abc.abstractmethod
+    def result_nbytes(self, batch_id):
+        """How many bytes the result of batch ``batch_id`` is stored as,
+        without reading it.
+        """
+
+    @abc.abstractmethod
+    def result_checksum(self, batch_id):
+        """The CRC32 checksum of the stored result of batch ``batch_id``,
+        without deserializing it.
+        """
+
+    def watch(self):
+        """Get an object whose ``wait(timeout)`` method returns as soon as
+        this storage might have changed, or ``None`` if this can't be done.
+        """
+        return None
+
+    def iter_results(self, batch_ids, timeout=None,
+                     min_delay=0.01, max_delay=5.0):
+        """Wait for the results of ``batch_ids``, yielding each id in the
+        order that its result arrives. If the storage can be watched for
+        changes this wakes as soon as a result is written locally, otherwise,
+        or for results written by other nodes, the storage is polled with
+        exponential backoff.
+
+        Parameters
+        ----------
+        batch_ids : sequence of int
+            The batches to wait for.
+        timeout : float, optional
+            If given, raise a ``TimeoutError`` if no new result arrives for
+            this many seconds.
+        min_delay : float, optional
+            The initial delay between polls, restored whenever a result
+            arrives.
+        max_delay : float, optional
+            The maximum delay between polls.
+
+        Yields
+        ------
+        batch_id : int
+        """
+        pending = set(batch_ids)
+        delay = min_delay
+        last_arrival = time.time()
+        watcher = self.watch()
+
+        try:
+            while pending:
+                arrived = pending.intersection(self.result_ids())
+
+                if arrived:
+                    pending -= arrived
+                    yield from sorted(arrived)
+                    delay = min_delay
+                    last_arrival = time.time()
+                    continue
+
+                if (timeout is not None) and \
+                        (time.time() - last_arrival > timeout):
+                    raise TimeoutError(
+                        f"No new results in {self.location} for {timeout}s, "
+                        f"still waiting for {len(pending)} batches.")
+
+                if watcher is None:
+                    time.sleep(delay)
+                else:
+                    watcher.wait(delay)
+                delay = min(2 * delay, max_delay)
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+    def consolidate(self):
+        """Fold the separately stored results of finished batches into as
+        few files as possible, returning how many were folded. Backends that
+        already store everything in a single file have nothing to do.
+        """
+        return 0
+
+    # ------------------------------- telemetry ----------------------------- #
+
+    def write_telemetry(self, batch_id, entry):
+        """Record ``entry``, a JSON serializable mapping of how growing batch
+        ``batch_id`` went, e.g. how long it took, to ``xyz-telemetry.jsonl``.
+        This is kept when the crop is sown again.
+        """
+        append_line(os.path.join(self.location, TLMTRY_NM),
+                    json.dumps({'id': batch_id, **entry}))
+
+    def read_telemetry(self):
+        """List of every entry recorded by :meth:`write_telemetry`, in
+        order, each with its batch ``'id'``.
+        """
+        return read_lines(os.path.join(self.location, TLMTRY_NM))
+
+    # ------------------------------ checkpoints ---------------------------- #
+
+    @abc.abstractmethod
+    def write_checkpoint(self, batch_id, results):
+        """Save the results of the first ``len(results)`` cases of batch
+        ``batch_id``, so that growing it can be resumed.
+        """
+
+    @abc.abstractmethod
+    def read_checkpoint(self, batch_id):
+        """Load the partial results of batch ``batch_id``, or ``None`` if
+        there is no checkpoint.
+        """
+
+    @abc.abstractmethod
+    def delete_checkpoint(self, batch_id):
+        """Delete any checkpoint of batch ``batch_id``.
+        """
+
+    @abc.abstractmethod
+    def checkpoint_ids(self):
+        """Sorted tuple of the ids of all batches with a checkpoint.
+        """
+
+    # -------------------------------- claims ------------------------------- #
+
+    @abc.abstractmethod
+    def claim(self, batch_id, owner=None, lease=None):
+        """Atomically claim ``batch_id`` for growing. Return ``True`` if the
+        claim succeeded, or ``False`` if another process already holds it.
+        If ``lease`` is given, a claim whose last heartbeat is more than
+        ``lease`` seconds old is assumed to belong to a dead process, and is
+        taken over.
+        """
+
+    @abc.abstractmethod
+    def heartbeat(self, batch_id, owner=None):
+        """Refresh the claim on ``batch_id``, if it is still held by
+        ``owner``.
+        """
+
+    @abc.abstractmethod
+    def release(self, batch_id, owner=None):
+        """Release any claim on ``batch_id``, or if ``owner`` is given, only
+        if it still holds it.
+        """
+
+    @abc.abstractmethod
+    def claim_times(self):
+        """Mapping of each claimed batch id to the time of the last heartbeat
+        of its claim.
+        """
+
+    def claimed_ids(self, lease=None):
+        """Sorted tuple of the ids of all currently claimed batches, or if
+        ``lease`` is given, only those whose claim has been refreshed within
+        the last ``lease`` seconds.
+        """
+        times = self.claim_times()
+        if lease is not None:
+            expiry = time.time() - lease
+            times = {i: t for i, t in times.items() if t >= expiry}
+        return tuple(sorted(times))
+
+    def expired_ids(self, lease):
+        """Sorted tuple of the ids of claimed batches whose claim has not been
+        refreshed within the last ``lease`` seconds.
+        """
+        expiry = time.time() - lease
+        return tuple(sorted(
+            i for i, t in self.claim_times().items() if t < expiry))
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}(location='{self.location}')>"
+
+
+class FileStorage(CropStorage):
+    """Store each batch and result as a separate pickle file, in the
+    ``batches/`` and ``results/`` sub-folders of the crop directory. Claims
+    are taken by exclusively creating lock files in ``claims/``.
+
+    Progress is tracked in a manifest, ``xyz-progress.bin``, holding one
+    byte of flags per batch id, each of which is updated with a single
+    positional write as batches are sown and grown. Querying progress is
+    thus a single small file read rather than a scan of the directories. The
+    manifest is rebuilt from the directories if it is missing, e.g. for
+    crops sown by older versions, or with :meth:`rebuild_progress`.
+
+    The size, number of cases and checksum of every result are appended as a
+    line of ``xyz-manifest.jsonl`` as it is written, such that results can
+    be checked without reading them, see :meth:`result_manifest`.
+
+    To save inodes, :meth:`consolidate` moves the files of finished results,
+    and their batches, into a single uncompressed zip, ``xyz-pack-{}.zip``,
+    from which they are then read whenever the separate file doesn't exist.
+    """
+
+    name = 'files'
+
+    SOWN = 1
+    GROWN = 2
+
+    def __init__(self, location):
+        super().__init__(location)
+        self._packs = {}
+        self._pack_index = {}
+        self._pack_stamp = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_packs'] = {}
+        state['_pack_index'] = {}
+        state['_pack_stamp'] = None
+        return state
+
+    def close(self):
+        for pack in self._packs.values():
+            pack.close()
+        self._packs = {}
+
+    def prepare(self):
+        for sub_dir in ("batches", "results", "claims"):
+            os.makedirs(os.path.join(self.location, sub_dir), exist_ok=True)
+        if not os.path.exists(self.progress_path):
+            self.rebuild_progress()
+
+    @property
+    def progress_path(self):
+        return os.path.join(self.location, PRGS_NM)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.location, MNFST_NM)
+
+    def _flags(self, batch_id):
+        try:
+            fd = os.open(self.progress_path, os.O_RDONLY)
+        except FileNotFoundError:
+            flags = self.rebuild_progress()
+            return flags[batch_id] if batch_id < len(flags) else 0
+        try:
+            flag = _pread(fd, 1, batch_id)
+        finally:
+            os.close(fd)
+        return flag[0] if flag else 0
+
+    def _mark(self, batch_id, flags):
+        if not os.path.exists(self.progress_path):
+            self.rebuild_progress()
+        fd = os.open(self.progress_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            _pwrite(fd, bytes((flags,)), batch_id)
+        finally:
+            os.close(fd)
+
+    def progress(self):
+        """Get the flags of every batch, indexed by batch id, as an array.
+        """
+        try:
+            with open(self.progress_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = self.rebuild_progress()
+        return np.frombuffer(data, dtype=np.uint8)
+
+    def rebuild_progress(self):
+        """Rebuild the progress manifest by scanning the batch and result
+        directories.
+        """
+        # results deleted since being consolidated are counted again
+        batch_ids = (self._glob_ids("batches", BTCH_NM) +
+                     self._packed_ids(BTCH_NM))
+        result_ids = (self._glob_ids("results", RSLT_NM) +
+                      self._glob_ids("results", MARK_NM) +
+                      self._packed_ids(RSLT_NM))
+
+        flags = bytearray(max(batch_ids + result_ids, default=0) + 1)
+        for i in batch_ids:
+            flags[i] |= self.SOWN
+        for i in result_ids:
+            flags[i] |= self.GROWN
+        flags = bytes(flags)
+
+        if os.path.isdir(self.location):
+            tmp_path = f"{self.progress_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(flags)
+            os.replace(tmp_path, self.progress_path)
+
+        return flags
+
+    def _ids_with(self, flag):
+        return tuple(map(int, np.flatnonzero(self.progress() & flag)))
+
+    def batch_path(self, batch_id):
+        return os.path.join(self.location, "batches", BTCH_NM.format(batch_id))
+
+    def result_path(self, batch_id):
+        return os.path.join(self.location, "results", RSLT_NM.format(batch_id))
+
+    def mark_path(self, batch_id):
+        return os.path.join(self.location, "results", MARK_NM.format(batch_id))
+
+    def claim_path(self, batch_id):
+        return os.path.join(self.location, "claims", CLAIM_NM.format(batch_id))
+
+    def checkpoint_path(self, batch_id):
+        return os.path.join(self.location, "checkpoints",
+                            CHKPT_NM.format(batch_id))
+
+    def _glob_ids(self, sub_dir, template):
+        rgx = re.compile(re.escape(template).replace(r'\{\}', r'(\d+)'))
+        fnames = glob.glob(os.path.join(self.location, sub_dir,
+                                        template.format("*")))
+        return tuple(sorted(
+            int(rgx.fullmatch(os.path.basename(f)).group(1)) for f in fnames
+        ))
+
+    def pack_index(self):
+        """Mapping of the name of every consolidated file to the path of the
+        zip holding it and its ``ZipInfo``. This is only re-read when the
+        crop directory changes, e.g. a new zip is moved into it.
+        """
+        try:
+            stat = os.stat(self.location)
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return {}
+
+        if stamp != self._pack_stamp:
+            index = {}
+            # in order of creation, so later zips win
+            for path in sorted(glob.glob(
+                    os.path.join(self.location, PACK_NM.format("*")))):
+                with zipfile.ZipFile(path) as pack:
+                    for info in pack.infolist():
+                        index[info.filename] = (path, info)
+            self._pack_index = index
+            self._pack_stamp = stamp
+
+        return self._pack_index
+
+    def _packed_ids(self, template):
+        rgx = re.compile(re.escape(template).replace(r'\{\}', r'(\d+)'))
+        return tuple(sorted(
+            int(m.group(1)) for m in map(rgx.fullmatch, self.pack_index())
+            if m is not None
+        ))
+
+    def _packed_info(self, fname):
+        try:
+            return self.pack_index()[os.path.basename(fname)]
+        except KeyError:
+            raise FileNotFoundError(f"No such file, separate or consolidated:"
+                                    f" {fname}.") from None
+
+    def _read_packed(self, fname):
+        path, info = self._packed_info(fname)
+        if path not in self._packs:
+            # kept open, so that reading many results is sequential
+            self._packs[path] = zipfile.ZipFile(path)
+        return self._packs[path].read(info)
+
+    def _read_file(self, fname, reader, **kwargs):
+        try:
+            return reader(fname, **kwargs)
+        except FileNotFoundError:
+            return loads(self._read_packed(fname))
+
+    def consolidate(self):
+        """Move the files of every finished result, and its batch, into a
+        new zip, ``xyz-pack-{}.zip``, written to one side and renamed into
+        place, such that several processes can read results or consolidate
+        at once. Results grown afterwards are again written as separate
+        files, so this can be called repeatedly while the crop grows.
+        """
+        result_ids = self._glob_ids("results", RSLT_NM)
+        if not result_ids:
+            return 0
+
+        paths = [self.result_path(i) for i in result_ids]
+        paths += [self.batch_path(i) for i in result_ids
+                  if os.path.exists(self.batch_path(i))]
+
+        name = PACK_NM.format(f"{time.time_ns()}-{os.getpid()}")
+        tmp_path = os.path.join(self.location, f".{name}.tmp")
+        stats = {}
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as pack:
+            for path in paths:
+                stats[path] = os.stat(path)
+                pack.write(path, os.path.basename(path))
+        os.replace(tmp_path, os.path.join(self.location, name))
+
+        for path, stat in stats.items():
+            try:
+                # leave any file replaced meanwhile, e.g. regrown
+                if os.stat(path).st_mtime_ns == stat.st_mtime_ns:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        return len(result_ids)
+
+    def write_batch(self, batch_id, batch, compress=False):
+        nbytes = write_to_disk(batch, self.batch_path(batch_id), compress)
+        self._mark(batch_id, self.SOWN | (self._flags(batch_id) & self.GROWN))
+        return nbytes
+
+    def read_batch(self, batch_id):
+        return self._read_file(self.batch_path(batch_id), read_from_disk)
+
+    def batch_ids(self):
+        return self._ids_with(self.SOWN)
+
+    def num_batches(self):
+        return int(np.count_nonzero(self.progress() & self.SOWN))
+
+    def write_result(self, batch_id, result, codec=None):
+        data = parse_codec(codec).encode(result)
+        # write the result before marking it, so a crash in between leaves
+        #     the batch to be grown again rather than missing
+        atomic_write_to_disk(result, self.result_path(batch_id), data=data)
+
+        # a single small appended write, later entries for the same id win
+        append_line(self.manifest_path, json.dumps(
+            {'id': batch_id, **result_entry(result, data)}))
+
+        self._mark(batch_id, self.SOWN | self.GROWN)
+
+    def read_result(self, batch_id, mmap=False):
+        return self._read_file(self.result_path(batch_id),
+                               read_result_from_disk, mmap=mmap)
+
+    def mark_result(self, batch_id):
+        # an empty flag file, so the mark survives the progress manifest
+        #     being rebuilt
+        with open(self.mark_path(batch_id), 'a'):
+            pass
+        self._mark(batch_id, self.SOWN | self.GROWN)
+
+    def has_result(self, batch_id):
+        return bool(self._flags(batch_id) & self.GROWN)
+
+    def delete_result(self, batch_id):
+        try:
+            os.remove(self.result_path(batch_id))
+        except FileNotFoundError:
+            try:
+                os.remove(self.mark_path(batch_id))
+            except FileNotFoundError:
+                # consolidated results are only marked as missing
+                self._packed_info(self.result_path(batch_id))
+        self._mark(batch_id, self._flags(batch_id) & self.SOWN)
+
+    def result_ids(self):
+        return self._ids_with(self.GROWN)
+
+    def num_results(self):
+        return int(np.count_nonzero(self.progress() & self.GROWN))
+
+    def missing_results(self, num_batches):
+        grown = np.zeros(num_batches + 1, dtype=bool)
+        flags = self.progress()[:num_batches + 1]
+        grown[:flags.size] = flags & self.GROWN
+        return tuple(map(int, np.flatnonzero(~grown[1:]) + 1))
+
+    def result_manifest(self):
+        # later entries for the same id win, and results with mangled
+        #     entries are just checked in full
+        manifest = {}
+        for entry in read_lines(self.manifest_path):
+            manifest[entry.pop('id')] = entry
+        return manifest
+
+    def result_nbytes(self, batch_id):
+        try:
+            return os.stat(self.result_path(batch_id)).st_size
+        except FileNotFoundError:
+            return self._packed_info(self.result_path(batch_id))[1].file_size
+
+    def result_checksum(self, batch_id):
+        try:
+            with open(self.result_path(batch_id), 'rb') as f:
+                return zlib.crc32(f.read())
+        except FileNotFoundError:
+            # zips record the same checksum of each file
+            return self._packed_info(self.result_path(batch_id))[1].CRC
+
+    def watch(self):
+        # the manifest is modified after every result is written
+        try:
+            return Inotify(self.location)
+        except (OSError, AttributeError):
+            return None
+
+    def write_checkpoint(self, batch_id, results):
+        os.makedirs(os.path.join(self.location, "checkpoints"),
+                    exist_ok=True)
+        atomic_write_to_disk(results, self.checkpoint_path(batch_id))
+
+    def read_checkpoint(self, batch_id):
+        try:
+            return read_from_disk(self.checkpoint_path(batch_id))
+        except FileNotFoundError:
+            return None
+
+    def delete_checkpoint(self, batch_id):
+        try:
+            os.remove(self.checkpoint_path(batch_id))
+        except FileNotFoundError:
+            pass
+
+    def checkpoint_ids(self):
+        return self._glob_ids("checkpoints", CHKPT_NM)
+
+    def claim(self, batch_id, owner=None, lease=None):
+        if owner is None:
+            owner = default_owner()
+
+        path = self.claim_path(batch_id)
+        os.makedirs(os.path.join(self.location, "claims"), exist_ok=True)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if (lease is None) or not self._steal_claim(batch_id, lease):
+                return False
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                return False
+
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{owner}\n")
+        return True
+
+    def _steal_claim(self, batch_id, lease):
+        """Remove the claim on ``batch_id`` if its heartbeat has expired,
+        returning whether it was removed.
+        """
+        path = self.claim_path(batch_id)
+        try:
+            if time.time() - os.stat(path).st_mtime <= lease:
+                return False
+            # renaming is atomic, so only one process can take the claim away
+            stale = f"{path}.{default_owner()}.{threading.get_ident()}.stale"
+            os.rename(path, stale)
+        except FileNotFoundError:
+            return False
+
+        if time.time() - os.stat(stale).st_mtime <= lease:
+            # raced with another process that had just claimed it afresh,
+            #     give it back, unless yet another claim has since been made
+            try:
+                os.link(stale, path)
+            except FileExistsError:
+                pass
+            os.remove(stale)
+            return False
+
+        os.remove(stale)
+        return True
+
+    def _claim_owner(self, batch_id):
+        try:
+            with open(self.claim_path(batch_id)) as f:
+                return f.readline().strip()
+        except FileNotFoundError:
+            return None
+
+    def heartbeat(self, batch_id, owner=None):
+        if owner is None:
+            owner = default_owner()
+        if self._claim_owner(batch_id) == owner:
+            try:
+                os.utime(self.claim_path(batch_id))
+            except FileNotFoundError:
+                pass
+
+    def release(self, batch_id, owner=None):
+        if (owner is not None) and (self._claim_owner(batch_id) != owner):
+            return
+        try:
+            os.remove(self.claim_path(batch_id))
+        except FileNotFoundError:
+            pass
+
+    def claim_times(self):
+        times = {}
+        for batch_id in self._glob_ids("claims", CLAIM_NM):
+            try:
+                times[batch_id] = os.stat(self.claim_path(batch_id)).st_mtime
+            except FileNotFoundError:
+                pass
+        return times
+
+
+_SQLITE_CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (id INTEGER PRIMARY KEY, data BLOB);
+"""
+
+_SQLITE_MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest (id INTEGER PRIMARY KEY,
+                                     num_cases INTEGER, nbytes INTEGER,
+                                     crc32 INTEGER);
+"""
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (id INTEGER PRIMARY KEY, data BLOB);
+CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY, data BLOB);
+CREATE TABLE IF NOT EXISTS claims (id INTEGER PRIMARY KEY, owner TEXT,
+                                   time REAL);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER);
+INSERT OR IGNORE INTO counters VALUES ('batches', 0), ('results', 0);
+""" + _SQLITE_CHECKPOINT_SCHEMA + _SQLITE_MANIFEST_SCHEMA
+
+
+class SQLiteStorage(CropStorage):
+    """Store all batches, results, claims and progress counters in a single
+    SQLite database, ``xyz-storage.sqlite``, in the crop directory. This
+    avoids creating many small files, and every write and claim is a
+    transaction, so any number of processes can safely grow the same crop.
+
+    Parameters
+    ----------
+    location : str
+        The crop directory.
+    journal_mode : str, optional
+        The SQLite journal mode. The default, ``'wal'``, allows reads to
+        proceed concurrently with a write, but relies on shared memory and so
+        requires that all processes run on the same host. Use ``'delete'``
+        for processes on several nodes of a network filesystem that supports
+        file locking.
+    timeout : float, optional
+        How long in seconds to wait for another process's transaction to
+        finish before raising.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, location, journal_mode='wal', timeout=600.0):
+        super().__init__(location)
+        self.journal_mode = journal_mode
+        self.timeout = timeout
+        self._conns = {}
+
+    def options(self):
+        options = {}
+        if self.journal_mode != 'wal':
+            options['journal_mode'] = self.journal_mode
+        if self.timeout != 600.0:
+            options['timeout'] = self.timeout
+        return options
+
+    @property
+    def path(self):
+        return os.path.join(self.location, SQLITE_NM)
+
+    @property
+    def conn(self):
+        # connections can't be shared between processes or threads
+        key = (os.getpid(), threading.get_ident())
+        try:
+            return self._conns[key]
+        except KeyError:
+            import sqlite3
+
+        if any(pid != key[0] for pid, _ in tuple(self._conns)):
+            # inherited from the parent process, which still owns them
+            self._conns = {}
+
+        # each thread uses its own connection, but any thread can close them
+        conn = sqlite3.connect(self.path, timeout=self.timeout,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._conns[key] = conn
+        return conn
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conns'] = {}
+        return state
+
+    def _transact(self, *statements):
+        """Run several ``(sql, params)`` statements as a single write
+        transaction, returning the cursor of each.
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursors = [conn.execute(sql, params) for sql, params in statements]
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return cursors
+
+    def prepare(self):
+        super().prepare()
+        self.conn.executescript(_SQLITE_SCHEMA)
+
+    def close(self):
+        pid = os.getpid()
+        for key, conn in tuple(self._conns.items()):
+            if key[0] == pid:
+                conn.close()
+        self._conns = {}
+
+    def _write(self, table, batch_id, obj, compress=False, data=None,
+               extra=()):
+        if data is None:
+            data = dumps(obj, compress=compress)
+        self._transact(
+            (f"UPDATE counters SET value = value + 1 WHERE name = '{table}' "
+             f"AND NOT EXISTS (SELECT 1 FROM {table} WHERE id = ?)",
+             (batch_id,)),
+            (f"INSERT OR REPLACE INTO {table} VALUES (?, ?)",
+             (batch_id, data)),
+            *extra,
+        )
+        return len(data)
+
+    def _read(self, table, batch_id):
+        row = self.conn.execute(
+            f"SELECT data FROM {table} WHERE id = ?", (batch_id,)).fetchone()
+        self._check_row(row, table, batch_id)
+        return loads(row[0])
+
+    def _check_row(self, row, table, batch_id):
+        if row is None:
+            raise FileNotFoundError(
+                f"No entry {batch_id} in table '{table}' of {self.path}.")
+        if row[0] is None:
+            raise FileNotFoundError(
+                f"Entry {batch_id} in table '{table}' of {self.path} is only "
+                "marked, its data was stored elsewhere.")
+
+    def _ids(self, table):
+        rows = self.conn.execute(f"SELECT id FROM {table} ORDER BY id")
+        return tuple(i for i, in rows)
+
+    def _count(self, table):
+        row = self.conn.execute(
+            "SELECT value FROM counters WHERE name = ?", (table,)).fetchone()
+        return row[0]
+
+    def write_batch(self, batch_id, batch, compress=False):
+        return self._write('batches', batch_id, batch, compress)
+
+    def read_batch(self, batch_id):
+        return self._read('batches', batch_id)
+
+    def batch_ids(self):
+        return self._ids('batches')
+
+    def num_batches(self):
+        return self._count('batches')
+
+    def write_result(self, batch_id, result, codec=None):
+        data = parse_codec(codec).encode(result)
+        entry = result_entry(result, data)
+        self._write('results', batch_id, result, data=data, extra=(
+            # crops sown before the manifest existed won't have the table
+            (_SQLITE_MANIFEST_SCHEMA, ()),
+            ("INSERT OR REPLACE INTO manifest VALUES (?, ?, ?, ?)",
+             (batch_id, entry['num_cases'], entry['nbytes'],
+              entry['crc32'])),
+        ))
+
+    def read_result(self, batch_id, mmap=False):
+        return self._read('results', batch_id)
+
+    def mark_result(self, batch_id):
+        # NULL data, distinct from any stored result, which readers refuse
+        self._transact(
+            ("UPDATE counters SET value = value + 1 WHERE name = 'results' "
+             "AND NOT EXISTS (SELECT 1 FROM results WHERE id = ?)",
+             (batch_id,)),
+            ("INSERT OR REPLACE INTO results VALUES (?, NULL)", (batch_id,)),
+        )
+
+    def has_result(self, batch_id):
+        return self.conn.execute(
+            "SELECT 1 FROM results WHERE id = ?", (batch_id,)
+        ).fetchone() is not None
+
+    def delete_result(self, batch_id):
+        self._transact(
+            ("UPDATE counters SET value = value - 1 WHERE name = 'results' "
+             "AND EXISTS (SELECT 1 FROM results WHERE id = ?)", (batch_id,)),
+            ("DELETE FROM results WHERE id = ?", (batch_id,)),
+        )
+
+    def result_ids(self):
+        return self._ids('results')
+
+    def num_results(self):
+        return self._count('results')
+
+    def result_manifest(self):
+        import sqlite3
+        try:
+            rows = self.conn.execute(
+                "SELECT id, num_cases, nbytes, crc32 FROM manifest")
+        except sqlite3.OperationalError:
+            return {}
+        return {i: {'num_cases': n, 'nbytes': b, 'crc32': c}
+                for i, n, b, c in rows}
+
+    def result_nbytes(self, batch_id):
+        # the length of a blob is known without reading it
+        row = self.conn.execute(
+            "SELECT length(data) FROM results WHERE id = ?", (batch_id,)
+        ).fetchone()
+        self._check_row(row, 'results', batch_id)
+        return row[0]
+
+    def result_checksum(self, batch_id):
+        row = self.conn.execute(
+            "SELECT data FROM results WHERE id = ?", (batch_id,)).fetchone()
+        self._check_row(row, 'results', batch_id)
+        return zlib.crc32(row[0])
+
+    def write_checkpoint(self, batch_id, results):
+        # crops sown before checkpoints existed won't have the table yet
+        self._transact((_SQLITE_CHECKPOINT_SCHEMA, ()))
+        self._write('checkpoints', batch_id, results)
+
+    def read_checkpoint(self, batch_id):
+        import sqlite3
+        try:
+            return self._read('checkpoints', batch_id)
+        except (FileNotFoundError, sqlite3.OperationalError):
+            return None
+
+    def delete_checkpoint(self, batch_id):
+        import sqlite3
+        try:
+            self._transact(
+                ("DELETE FROM checkpoints WHERE id = ?", (batch_id,)))
+        except sqlite3.OperationalError:
+            pass
+
+    def checkpoint_ids(self):
+        import sqlite3
+        try:
+            return self._ids('checkpoints')
+        except sqlite3.OperationalError:
+            return ()
+
+    def claim(self, batch_id, owner=None, lease=None):
+        if owner is None:
+            owner = default_owner()
+        now = time.time()
+        expiry = -math.inf if lease is None else now - lease
+        _, cursor = self._transact(
+            ("DELETE FROM claims WHERE id = ? AND time < ?",
+             (batch_id, expiry)),
+            ("INSERT OR IGNORE INTO claims VALUES (?, ?, ?)",
+             (batch_id, owner, now)),
+        )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, batch_id, owner=None):
+        if owner is None:
+            owner = default_owner()
+        self._transact(
+            ("UPDATE claims SET time = ? WHERE id = ? AND owner = ?",
+             (time.time(), batch_id, owner)),
+        )
+
+    def release(self, batch_id, owner=None):
+        if owner is None:
+            self._transact(("DELETE FROM claims WHERE id = ?", (batch_id,)))
+        else:
+            self._transact(
+                ("DELETE FROM claims WHERE id = ? AND owner = ?",
+                 (batch_id, owner)),
+            )
+
+    def claim_times(self):
+        return dict(self.conn.execute("SELECT id, time FROM claims"))
+
+    def watch(self):
+        # every transaction modifies the database or its write-ahead log
+        try:
+            return Inotify(self.location)
+        except (OSError, AttributeError):
+            return None
+
+
+_STORAGE_BACKENDS = {
+    FileStorage.name: FileStorage,
+    SQLiteStorage.name: SQLiteStorage,
+}
+
+
+def register_storage(cls):
+    """Register a new :class:`CropStorage` subclass so that crops can refer
+    to, and reload, it by its ``name``. Can be used as a class decorator.
+    """
+    _STORAGE_BACKENDS[cls.name] = cls
+    return cls
+
+
+def parse_storage(storage, location):
+    """Get the storage backend instance for a crop at ``location``.
+
+    Parameters
+    ----------
+    storage : None, str, type, tuple or CropStorage
+        The name of a registered backend, e.g. ``'files'`` (the default) or
+        ``'sqlite'``, a :class:`CropStorage` subclass, either optionally
+        paired with a dict of options, e.g. ``('sqlite', {'timeout': 60})``,
+        or an instance of one.
+    location : str
+        The crop directory.
+
+    Returns
+    -------
+    CropStorage
+    """
+    if storage is None:
+        storage = FileStorage.name
+
+    if isinstance(storage, CropStorage):
+        return storage
+
+    if isinstance(storage, tuple):
+        storage, options = storage
+    else:
+        options = {}
+
+    if isinstance(storage, str):
+        try:
+            storage = _STORAGE_BACKENDS[storage]
+        except KeyError:
+            raise ValueError(f"Unknown crop storage '{storage}', should be "
+                             f"one of {tuple(_STORAGE_BACKENDS)}.")
+
+    return storage(location, **options)
+
+
+_RESULT_CODECS = {
+    PickleCodec.name: PickleCodec,
+    NpyCodec.name: NpyCodec,
+}
+
+
+def parse_codec(codec):
+    """Get the :class:`ResultCodec` instance described by ``codec``.
+
+    Parameters
+    ----------
+    codec : None, str, tuple[str, compressor] or ResultCodec
+        The name of a codec, ``'pickle'`` (the default) or ``'npy'``,
+        optionally paired with a compressor, e.g. ``('npy', 'zstd')``, or a
+        codec instance.
+
+    Returns
+    -------
+    ResultCodec
+    """
+    if codec is None:
+        codec = PickleCodec.name
+
+    if isinstance(codec, ResultCodec):
+        return codec
+
+    if isinstance(codec, str):
+        name, compressor = codec, None
+    else:
+        name, compressor = codec
+
+    try:
+        cls = _RESULT_CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown result codec '{name}', should be one of "
+                         f"{tuple(_RESULT_CODECS)}.")
+    return cls(compressor)
+
+
+def storage_spec(storage):
+    """The inverse of :func:`parse_storage` - how to record ``storage`` in a
+    crop's settings so that it can be recreated, along with any options.
+    """
+    if _STORAGE_BACKENDS.get(storage.name) is type(storage):
+        spec = storage.name
+    else:
+        spec = type(storage)
+
+    options = storage.options()
+    if options:
+        return (spec, options)
+    return spec
@@ -187,6 +187,112 @@ def save_merge_ds(ds, fname, overwrite=None, **kwargs):
     save_ds(new_ds, fname, **kwargs)
 
 
+def _cast_like(ds, dtypes):
+    """Cast the variables of ``ds`` to the ``dtypes`` of those on disk, which
+    missing values (NaN) cannot be filled into if they are e.g. integers.
+    """
+    for k, var in ds.data_vars.items():
+        dtype = dtypes[k]
+        if var.dtype == dtype:
+            continue
+        if (not np.can_cast(var.dtype, dtype, 'same_kind') and
+                bool(var.isnull().any())):
+            raise ValueError(
+                f"Missing values in '{k}' can't be written to its on-disk "
+                f"dtype {dtype}, merge the full dataset instead.")
+        ds[k] = var.astype(dtype)
+    return ds
+
+
+def append_merge_zarr(ds, fname, overwrite=None):
+    """Merge dataset ``ds`` into the zarr store ``fname`` in place, such that
+    the cost scales with the size of ``ds`` rather than the store. Values of
+    coordinates not yet in the store are appended along their dimension
+    (and so are not sorted), then data at existing coordinates is written
+    into the smallest region of the store containing it. If the store
+    doesn't exist yet, ``ds`` is simply saved.
+
+    Parameters
+    ----------
+    ds : xarray.Dataset
+        The dataset to merge in, it should have the same variables and
+        dimensions as the stored dataset.
+    fname : str
+        The zarr store.
+    overwrite : {None, False, True}, optional
+        How to merge the dataset with the existing dataset.
+
+            - None: the datasets will be merged in there are no conflicts
+            - False: data will be taken from old dataset if conflicting
+            - True: data will be taken from new dataset if conflicting
+    """
+    fname = auto_add_extension(fname, 'zarr')
+    if not os.path.exists(fname):
+        save_ds(ds, fname, engine='zarr')
+        return
+
+    old_ds = xr.open_zarr(fname, chunks=None)
+    try:
+        if (set(ds.data_vars) != set(old_ds.data_vars) or
+                set(ds.dims) != set(old_ds.dims)):
+            raise ValueError(
+                "Can only append to a zarr store with the same variables and "
+                f"dimensions, got {set(ds.data_vars)} and {set(ds.dims)}, "
+                f"but the store has {set(old_ds.data_vars)} and "
+                f"{set(old_ds.dims)}.")
+
+        # the current coordinates of the store
+        coords = {d: old_ds.indexes[d] for d in ds.dims}
+        dtypes = {k: v.dtype for k, v in old_ds.data_vars.items()}
+    finally:
+        old_ds.close()
+
+    # append new coordinate values, one dimension at a time, each block
+    #     holding the data with those values, filled out to the store
+    is_new = {d: ~np.isin(ds[d].values, coords[d]) for d in ds.dims}
+    for d in ds.dims:
+        if not is_new[d].any():
+            continue
+
+        block = ds[[k for k, v in ds.data_vars.items() if d in v.dims]]
+        block = block.isel({d: is_new[d]}).reindex(
+            {o: coords[o] for o in block.dims if o != d})
+        block = _cast_like(block.load(), dtypes)
+        block.to_zarr(fname, append_dim=d)
+        coords[d] = coords[d].append(block.indexes[d])
+
+    # write data at existing coordinates into the region containing it
+    ds = ds.isel({d: ~is_new[d] for d in ds.dims})
+    ds = ds[[k for k, v in ds.data_vars.items() if v.size]]
+    if not ds.data_vars:
+        return
+
+    region = {}
+    for d in ds.dims:
+        ix = coords[d].get_indexer(ds.indexes[d])
+        region[d] = slice(int(ix.min()), int(ix.max()) + 1)
+
+    old_ds = xr.open_zarr(fname, chunks=None)
+    try:
+        old_region = old_ds[list(ds.data_vars)].isel(region).load()
+    finally:
+        old_ds.close()
+
+    if overwrite is True:
+        new_region = ds.combine_first(old_region)
+    elif overwrite is False:
+        new_region = old_region.combine_first(ds)
+    else:
+        new_region = old_region.merge(ds, compat='no_conflicts',
+                                      join='outer')
+
+    new_region = _cast_like(new_region.reindex_like(old_region), dtypes)
+    new_region = new_region.drop_vars(
+        [k for k, v in new_region.variables.items()
+         if (k in region) or not set(region).intersection(v.dims)])
+    new_region.to_zarr(fname, region=region)
+
+
 def trimna(obj):
     """Drop values across all dimensions for which all values are NaN.
     """
@@ -338,9 +444,30 @@ def merge_sync_conflict_datasets(base_name, engine='h5netcdf',
         os.remove(fname)
 
 
+def _is_arrow_table(df):
+    return type(df).__module__.split('.')[0] == 'pyarrow'
+
+
 def save_df(df, name, engine='pickle', key='df', **kwargs):
-    """Save a dataframe to disk.
+    """Save a dataframe to disk. A ``pyarrow.Table`` can also be supplied, in
+    which case ``engine`` should be one of ``{'parquet', 'feather', 'pickle'}``.
     """
+    if _is_arrow_table(df):
+        if engine == 'pickle':
+            import pickle
+            with open(name, 'wb') as f:
+                pickle.dump(df, f)
+        elif engine == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(df, name, **kwargs)
+        elif engine == 'feather':
+            import pyarrow.feather as pf
+            pf.write_feather(df, name, **kwargs)
+        else:
+            raise ValueError("Arrow tables can only be saved with the "
+                             "'parquet', 'feather' or 'pickle' engines.")
+        return
+
     meth = "to_{}".format(engine)
     if engine == 'hdf':
         kwargs['key'] = key
@@ -349,9 +476,25 @@ def save_df(df, name, engine='pickle', key='df', **kwargs):
     getattr(df, meth)(name, **kwargs)
 
 
-def load_df(name, engine='pickle', key='df', **kwargs):
-    """Load a dataframe from disk.
+def load_df(name, engine='pickle', key='df', arrow=False, **kwargs):
+    """Load a dataframe from disk. If ``arrow=True``, load it as a
+    ``pyarrow.Table`` instead, for which ``engine`` should be one of
+    ``{'parquet', 'feather', 'pickle'}``.
     """
+    if arrow:
+        if engine == 'pickle':
+            import pickle
+            with open(name, 'rb') as f:
+                return pickle.load(f)
+        if engine == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.read_table(name, **kwargs)
+        if engine == 'feather':
+            import pyarrow.feather as pf
+            return pf.read_table(name, **kwargs)
+        raise ValueError("Arrow tables can only be loaded with the "
+                         "'parquet', 'feather' or 'pickle' engines.")
+
     import pandas as pd
     func = "read_{}".format(engine)
     if engine == 'hdf':
@@ -23,7 +23,7 @@ def isiterable(obj):
 def prod(it):
     """Product of an iterable.
     """
-    return functools.reduce(operator.mul, it)
+    return functools.reduce(operator.mul, it, 1)
 
 
 def unzip(its, zip_level=1):